@@ -13,17 +13,40 @@ Calculates code metrics for Python files:
 """
 
 import ast
+import re
+from array import array
+from collections import OrderedDict
 from pathlib import Path
+from types import MappingProxyType
+from statistics import fmean
 from dataclasses import dataclass, field
+from typing import Optional, Union
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.plugin_system import PluginBase, PluginResult, PluginConfig, HookPoint
+from src.plugin_system import PluginBase, PluginResult, PluginConfig, HookPoint, parallel_map
+from src.ast_cache import (
+    AnalysisContext, SourceFile, StructureVisitor, has_docstring,
+    stable_stat_key, validate_files
+)
 
 
-@dataclass
+# Line classification in one C-level regex pass (mirrors str.strip() on ASCII whitespace)
+_BLANK_RE = re.compile(rb'(?m)^[ \t\r\f\v]*$')
+_COMMENT_RE = re.compile(rb'(?m)^[ \t\r\f\v]*#')
+
+
+def count_lines(raw: bytes) -> tuple[int, int, int]:
+    """Return (code, blank, comment) line counts for raw file bytes"""
+    total = raw.count(b'\n') + 1
+    blank = len(_BLANK_RE.findall(raw))
+    comment = len(_COMMENT_RE.findall(raw))
+    return total - blank - comment, blank, comment
+
+
+@dataclass(frozen=True)
 class FileMetrics:
-    """Metrics for a single file"""
+    """Metrics for a single file (immutable: instances are memoized)"""
     filepath: str
     lines_of_code: int = 0
     blank_lines: int = 0
@@ -48,8 +71,14 @@ class FileMetrics:
         return (self.docstring_count / total) * 100
 
 
-class MetricsVisitor(ast.NodeVisitor):
-    """AST visitor to collect code metrics"""
+class MetricsVisitor(StructureVisitor):
+    """
+    AST visitor to collect code metrics.
+    
+    Single pass: branch nodes bump the counter of the innermost enclosing
+    function (a stack of per-function counters), so nested functions are
+    not re-walked and each branch is counted once.
+    """
     
     def __init__(self):
         self.functions: list[tuple[str, int]] = []  # (name, line_count)
@@ -57,36 +86,39 @@ class MetricsVisitor(ast.NodeVisitor):
         self.imports: int = 0
         self.docstrings: int = 0
         self.complexity: int = 1  # Base complexity
+        self._func_stack: list[int] = []  # Complexity of enclosing functions
     
     def visit_FunctionDef(self, node):
         line_count = (node.end_lineno or node.lineno) - node.lineno + 1
         self.functions.append((node.name, line_count))
         
-        # Check for docstring
-        if (node.body and isinstance(node.body[0], ast.Expr) and
-            isinstance(node.body[0].value, ast.Constant) and
-            isinstance(node.body[0].value.value, str)):
+        if has_docstring(node):
             self.docstrings += 1
         
-        # Count complexity (if, for, while, except, with, and, or)
-        for child in ast.walk(node):
-            if isinstance(child, (ast.If, ast.For, ast.While, 
-                                  ast.ExceptHandler, ast.With)):
-                self.complexity += 1
-            elif isinstance(child, ast.BoolOp):
-                self.complexity += len(child.values) - 1
-        
+        self._func_stack.append(0)
         self.generic_visit(node)
+        self.complexity += self._func_stack.pop()
     
     visit_AsyncFunctionDef = visit_FunctionDef
     
+    def _count_branch(self, node, weight: int = 1):
+        if self._func_stack:
+            self._func_stack[-1] += weight
+        self.generic_visit(node)
+    
+    # Count complexity (if, for, while, except, with, and, or)
+    def visit_If(self, node):
+        self._count_branch(node)
+    
+    visit_For = visit_While = visit_ExceptHandler = visit_With = visit_If
+    
+    def visit_BoolOp(self, node):
+        self._count_branch(node, len(node.values) - 1)
+    
     def visit_ClassDef(self, node):
         self.classes.append(node.name)
         
-        # Check for docstring
-        if (node.body and isinstance(node.body[0], ast.Expr) and
-            isinstance(node.body[0].value, ast.Constant) and
-            isinstance(node.body[0].value.value, str)):
+        if has_docstring(node):
             self.docstrings += 1
         
         self.generic_visit(node)
@@ -100,13 +132,106 @@ class MetricsVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
+# Memoized results keyed by (abspath, mtime_ns, size): unchanged files are
+# not re-analyzed across hooks. A plain dict (not lru_cache) so execute()
+# can look up hits before fanning misses out to worker processes.
+METRICS_CACHE_SIZE = 2048
+_metrics_cache: "OrderedDict[tuple[str, int, int], FileMetrics]" = OrderedDict()
+
+
+def _cached_metrics(source: SourceFile) -> Optional[FileMetrics]:
+    key = stable_stat_key(source.path, *source.stat)
+    metrics = _metrics_cache.get(key) if key is not None else None
+    if metrics is not None:
+        _metrics_cache.move_to_end(key)
+    return metrics
+
+
+def _store_metrics(source: SourceFile, metrics: FileMetrics) -> None:
+    key = stable_stat_key(source.path, *source.stat)
+    if key is None:
+        return
+    _metrics_cache[key] = metrics
+    if len(_metrics_cache) > METRICS_CACHE_SIZE:
+        _metrics_cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Forget memoized file metrics"""
+    _metrics_cache.clear()
+
+
+def _compute_metrics(filepath: str, ctx: AnalysisContext) -> FileMetrics:
+    """Read, parse and measure one file"""
+    path = Path(filepath)
+    try:
+        code, blank, comment = count_lines(ctx.source(path))
+        
+        # Parse AST (shared cache)
+        tree = ctx.tree(path)
+        visitor = MetricsVisitor()
+        visitor.visit(tree)
+    except Exception:
+        return FileMetrics(filepath=filepath, lines_of_code=-1)  # Indicate error
+    
+    avg_function_length = 0.0
+    if visitor.functions:
+        total_lines = sum(lines for _, lines in visitor.functions)
+        avg_function_length = total_lines / len(visitor.functions)
+    
+    return FileMetrics(
+        filepath=filepath,
+        lines_of_code=code,
+        blank_lines=blank,
+        comment_lines=comment,
+        function_count=len(visitor.functions),
+        class_count=len(visitor.classes),
+        import_count=visitor.imports,
+        docstring_count=visitor.docstrings,
+        avg_function_length=avg_function_length,
+        complexity_score=visitor.complexity
+    )
+
+
+def analyze_file(filepath: Union[str, SourceFile],
+                 ctx: Optional[AnalysisContext] = None) -> FileMetrics:
+    """
+    Analyze a single file and return metrics.
+    
+    Module-level so it can be shipped to worker processes. A SourceFile
+    from validate_files() skips the existence check. Results for
+    unchanged files are served from the memo.
+    """
+    if isinstance(filepath, SourceFile):
+        source = filepath
+    else:
+        validated = validate_files([filepath])
+        if not validated:
+            return FileMetrics(filepath=filepath)
+        source = validated[0]
+    
+    metrics = _cached_metrics(source)
+    if metrics is None:
+        metrics = _compute_metrics(source.path, ctx or AnalysisContext())
+        _store_metrics(source, metrics)
+    return metrics
+
+
+# Shared default config: built once, copied by each instance on first use
+_DEFAULT_CONFIG = PluginConfig(
+    hooks=(HookPoint.POST_ANALYZE, HookPoint.ON_FILE_CHANGE),
+    settings=MappingProxyType({
+        "max_workers": None,  # None = os.cpu_count()
+        "parallel_min_files": 64
+    })
+)
+
+
 class CodeMetricsPlugin(PluginBase):
     """Plugin that calculates code metrics for Python files"""
     
-    def __init__(self, config=None):
-        super().__init__(config or PluginConfig(
-            hooks=[HookPoint.POST_ANALYZE, HookPoint.ON_FILE_CHANGE]
-        ))
+    default_config = _DEFAULT_CONFIG
+    uses_process_pool = True  # parallel_map for large batches
     
     @property
     def name(self) -> str:
@@ -120,95 +245,83 @@ class CodeMetricsPlugin(PluginBase):
     def description(self) -> str:
         return "Calculates code metrics: LOC, complexity, docstring coverage"
     
-    def analyze_file(self, filepath: str) -> FileMetrics:
+    def analyze_file(self, filepath: Union[str, SourceFile],
+                     ctx: Optional[AnalysisContext] = None) -> FileMetrics:
         """Analyze a single file and return metrics"""
-        metrics = FileMetrics(filepath=filepath)
-        path = Path(filepath)
-        
-        if not path.exists() or path.suffix != '.py':
-            return metrics
-        
-        try:
-            content = path.read_text(encoding='utf-8')
-            lines = content.split('\n')
-            
-            # Count lines
-            for line in lines:
-                stripped = line.strip()
-                if not stripped:
-                    metrics.blank_lines += 1
-                elif stripped.startswith('#'):
-                    metrics.comment_lines += 1
-                else:
-                    metrics.lines_of_code += 1
-            
-            # Parse AST
-            tree = ast.parse(content)
-            visitor = MetricsVisitor()
-            visitor.visit(tree)
-            
-            metrics.function_count = len(visitor.functions)
-            metrics.class_count = len(visitor.classes)
-            metrics.import_count = visitor.imports
-            metrics.docstring_count = visitor.docstrings
-            metrics.complexity_score = visitor.complexity
-            
-            if visitor.functions:
-                total_lines = sum(lines for _, lines in visitor.functions)
-                metrics.avg_function_length = total_lines / len(visitor.functions)
-            
-        except Exception as e:
-            metrics.lines_of_code = -1  # Indicate error
-        
-        return metrics
+        return analyze_file(filepath, ctx)
     
     def execute(self, context: dict) -> PluginResult:
         """Execute metrics analysis on files in context"""
         files = context.get("files", [])
+        shared_ctx = context.get("analysis_ctx")
+        
+        sources = validate_files(files)
+        settings = self.config.settings
+        
+        file_metrics = {source: _cached_metrics(source) for source in sources}
+        misses = [source for source, metrics in file_metrics.items() if metrics is None]
+        min_parallel = settings.get("parallel_min_files", 64)
+        if shared_ctx is not None or len(misses) < min_parallel:
+            # Caller shares parsed trees across plugins, or the batch is too
+            # small for a pool: stay in-process, reading ahead on threads
+            ctx = shared_ctx or AnalysisContext()
+            ctx.prefetch(source.path for source in misses)
+            computed = [analyze_file(source, ctx) for source in misses]
+        else:
+            computed = parallel_map(
+                analyze_file, misses,
+                max_workers=settings.get("max_workers"),
+                min_parallel=min_parallel
+            )
+        for source, metrics in zip(misses, computed):
+            _store_metrics(source, metrics)  # Workers' memos die with the pool
+            file_metrics[source] = metrics
+        
+        # Column-wise (structure of arrays) aggregation: one append per
+        # field, C-level sums, per-file dicts built once at the end
+        paths: list[str] = []
+        columns = {name: array('q') for name in ("loc", "functions", "classes",
+                                                 "imports", "complexity")}
+        coverage = array('d')
+        for source in sources:
+            metrics = file_metrics[source]
+            if metrics.lines_of_code < 0:  # Analysis error
+                continue
+            paths.append(source.path)
+            columns["loc"].append(metrics.lines_of_code)
+            columns["functions"].append(metrics.function_count)
+            columns["classes"].append(metrics.class_count)
+            columns["imports"].append(metrics.import_count)
+            columns["complexity"].append(metrics.complexity_score)
+            coverage.append(metrics.docstring_coverage)
         
-        all_metrics: list[dict] = []
         totals = {
-            "total_files": 0,
-            "total_loc": 0,
-            "total_functions": 0,
-            "total_classes": 0,
-            "total_imports": 0,
+            "total_files": len(paths),
+            "total_loc": sum(columns["loc"]),
+            "total_functions": sum(columns["functions"]),
+            "total_classes": sum(columns["classes"]),
+            "total_imports": sum(columns["imports"]),
             "avg_complexity": 0.0,
             "avg_docstring_coverage": 0.0
         }
+        if paths:
+            totals["avg_complexity"] = round(fmean(columns["complexity"]), 2)
+            totals["avg_docstring_coverage"] = round(fmean(coverage), 1)
         
-        for filepath in files:
-            if not filepath.endswith('.py'):
-                continue
-            
-            metrics = self.analyze_file(filepath)
-            
-            if metrics.lines_of_code >= 0:  # No error
-                totals["total_files"] += 1
-                totals["total_loc"] += metrics.lines_of_code
-                totals["total_functions"] += metrics.function_count
-                totals["total_classes"] += metrics.class_count
-                totals["total_imports"] += metrics.import_count
-                totals["avg_complexity"] += metrics.complexity_score
-                totals["avg_docstring_coverage"] += metrics.docstring_coverage
-                
-                all_metrics.append({
-                    "file": filepath,
-                    "loc": metrics.lines_of_code,
-                    "functions": metrics.function_count,
-                    "classes": metrics.class_count,
-                    "complexity": metrics.complexity_score,
-                    "docstring_coverage": round(metrics.docstring_coverage, 1)
-                })
-        
-        # Calculate averages
-        if totals["total_files"] > 0:
-            totals["avg_complexity"] = round(
-                totals["avg_complexity"] / totals["total_files"], 2
-            )
-            totals["avg_docstring_coverage"] = round(
-                totals["avg_docstring_coverage"] / totals["total_files"], 1
+        all_metrics = [
+            {
+                "file": path,
+                "loc": loc,
+                "functions": functions,
+                "classes": classes,
+                "complexity": complexity,
+                "docstring_coverage": round(doc, 1)
+            }
+            for path, loc, functions, classes, complexity, doc in zip(
+                paths, columns["loc"], columns["functions"], columns["classes"],
+                columns["complexity"], coverage
             )
+        ]
         
         return PluginResult(
             success=True,
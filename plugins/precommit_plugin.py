@@ -6,21 +6,33 @@ Date: 2026-01-08
 
 Runs quality checks before commit:
 - Python syntax validation
-- Code smell detection
-- Security vulnerability scan
-- Import validation
+- Code smell detection (warnings unless block_on_smells)
+- Security vulnerability scan (warnings unless block_on_security)
+- Import validation (unparseable files; unresolvable modules are warnings)
 - Test execution (optional)
 """
 
+import ast
+import importlib.util
+import json
+import os
 import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.plugin_system import PluginBase, PluginResult, PluginConfig, HookPoint, PluginPriority
+from src.plugin_system import PluginBase, PluginResult, PluginConfig, HookPoint, PluginPriority, parallel_map
+from src.ast_cache import (
+    USER_CACHE_DIR, AnalysisContext, SourceFile, content_hash, owned_by_current_user,
+    stable_stat_key, validate_files,
+)
+from src.code_smell_detector import detect_smells_tree
+from src.security_analyzer import analyze_security_tree
 
 
 @dataclass
@@ -30,27 +42,281 @@ class CheckResult:
     passed: bool
     message: str
     details: list = None
+    warnings: list = None  # Reported, but do not fail the check
     
     def __post_init__(self):
         if self.details is None:
             self.details = []
+        if self.warnings is None:
+            self.warnings = []
+
+
+# check key -> (display name, failure message format, warning message format,
+#               success message, max details)
+_CHECKS = {
+    "syntax": ("Syntax Check", "{} syntax error(s)", "{} warning(s)",
+               "All files have valid syntax", None),
+    "smells": ("Code Smell Check", "{} smell(s)", "{} smell(s) (not blocking)",
+               "No code smells", 10),
+    "security": ("Security Check", "{} issue(s)", "{} issue(s) (not blocking)",
+                 "No vulnerabilities", None),
+    "imports": ("Import Check", "{} error(s)", "{} unresolved import(s) (not blocking)",
+                "All imports valid", None),
+}
+
+# Checks that only fail the gate when their setting is on. Until the code
+# base is clean of existing smells and security findings they are reported
+# as warnings, so enabling the analyzers does not block every commit.
+_BLOCKING_SETTINGS = {"smells": "block_on_smells", "security": "block_on_security"}
+
+
+_IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError"}
+
+# `if` tests on these select platform- or version-specific imports
+_PLATFORM_ATTRS = frozenset({("sys", "platform"), ("os", "name"), ("sys", "version_info")})
+
+
+@lru_cache(maxsize=1024)
+def _module_resolvable(name: str) -> bool:
+    """True if a top-level module can be found on sys.path (nothing is imported)"""
+    if name == "__main__" or name in sys.builtin_module_names:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _guards_import_error(node: ast.Try) -> bool:
+    """True for `try: ... except ImportError:` style optional-dependency blocks"""
+    for handler in node.handlers:
+        names = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+        if any(isinstance(n, ast.Name) and n.id in _IMPORT_ERRORS for n in names):
+            return True
+    return False
+
+
+def _is_platform_test(test: ast.expr) -> bool:
+    """True if an `if` test reads sys.platform, os.name or sys.version_info"""
+    for node in ast.walk(test):
+        if type(node) is ast.Attribute and type(node.value) is ast.Name and \
+                (node.value.id, node.attr) in _PLATFORM_ATTRS:
+            return True
+    return False
+
+
+def find_unresolved_imports(tree: ast.AST, base_dir: Path) -> list[tuple[int, str]]:
+    """
+    Return (lineno, module) for absolute imports that cannot be resolved.
+    
+    A module counts as resolvable if it is on sys.path of the interpreter
+    running the check, or sits next to the file (script-style sibling
+    imports). Relative imports, imports guarded by `except ImportError` and
+    imports under `if sys.platform / os.name / sys.version_info` tests are
+    not checked.
+    """
+    unresolved = []
+    stack = [(tree, False)]
+    while stack:
+        node, guarded = stack.pop()
+        node_type = type(node)
+        if node_type is ast.Import:
+            modules = [alias.name for alias in node.names]
+        elif node_type is ast.ImportFrom and node.level == 0 and node.module:
+            modules = [node.module]
+        else:
+            modules = []
+        
+        for module in modules:
+            top = module.split('.')[0]
+            if guarded or _module_resolvable(top):
+                continue
+            if (base_dir / f"{top}.py").exists() or (base_dir / top).is_dir():
+                continue
+            unresolved.append((node.lineno, module))
+        
+        if node_type is ast.Try and _guards_import_error(node):
+            stack.extend((child, True) for child in node.body)
+            stack.extend((child, guarded) for child in node.handlers + node.orelse + node.finalbody)
+        elif node_type is ast.If and _is_platform_test(node.test):
+            stack.extend((child, True) for child in node.body + node.orelse)
+        else:
+            stack.extend((child, guarded) for child in ast.iter_child_nodes(node))
+    
+    return sorted(unresolved)
+
+
+def check_file(filepath: Union[str, SourceFile], checks: tuple = tuple(_CHECKS),
+               ctx: Optional[AnalysisContext] = None) -> dict:
+    """
+    Run the enabled checks on one file, sharing a single parse.
+    
+    Module-level so it can be shipped to worker processes. A SourceFile
+    from validate_files() lets the AST cache skip re-reading unchanged files.
+    
+    Returns:
+        {"errors": {check_key: [finding, ...]}, "warnings": {check_key: [...]}}
+        with every key in checks present in both
+    """
+    ctx = ctx or AnalysisContext()
+    findings = {key: [] for key in checks}
+    warnings = {key: [] for key in checks}
+    result = {"errors": findings, "warnings": warnings}
+    stat = None
+    if isinstance(filepath, SourceFile):
+        filepath, stat = filepath.path, filepath.stat
+    path = Path(filepath)
+    
+    try:
+        tree = ctx.tree(path, stat)
+    except SyntaxError as e:
+        if "syntax" in findings:
+            findings["syntax"].append(f"{filepath}:{e.lineno}: {e.msg}")
+        if "imports" in findings:
+            findings["imports"].append(f"{filepath}: {e}")
+        return result
+    except Exception as e:
+        if "imports" in findings:
+            findings["imports"].append(f"{filepath}: {e}")
+        return result
+    
+    if "imports" in findings:
+        # Only the running interpreter's environment is checked, which may
+        # lack project dependencies: report, don't block
+        for lineno, module in find_unresolved_imports(tree, path.parent):
+            warnings["imports"].append(f"{filepath}:{lineno}: unresolved import '{module}'")
+    
+    if "smells" in findings:
+        for smell_type, smell_list in detect_smells_tree(tree).items():
+            if isinstance(smell_list, list):
+                for smell in smell_list:
+                    findings["smells"].append(f"{path.name}: {smell_type} - {smell.get('message')}")
+    
+    if "security" in findings:
+        for issue_list in analyze_security_tree(tree).values():
+            if isinstance(issue_list, list):
+                for issue in issue_list:
+                    if issue.get('severity') in ['critical', 'high']:
+                        findings["security"].append(
+                            f"[{issue['severity'].upper()}] {path.name}: {issue.get('message')}"
+                        )
+    
+    return result
+
+
+def _check_file_worker(args: tuple) -> dict:
+    """Unpack (filepath, checks) for parallel_map"""
+    return check_file(*args)
+
+
+def _merge_findings(per_file: list, checks: tuple) -> dict:
+    """Concatenate per-file findings into one errors and one warnings list per check"""
+    merged = {kind: {key: [] for key in checks} for kind in ("errors", "warnings")}
+    for findings in per_file:
+        for kind, by_check in findings.items():
+            for key, items in by_check.items():
+                merged[kind][key].extend(items)
+    return merged
+
+
+def _has_findings(findings: dict) -> bool:
+    """True if check_file reported any error or warning"""
+    return any(any(by_check.values()) for by_check in findings.values())
+
+
+def _to_check_result(key: str, findings: dict, blocking: bool = True) -> CheckResult:
+    """Build the CheckResult for one check from the merged findings"""
+    name, fail_message, warn_message, ok_message, max_details = _CHECKS[key]
+    errors, warnings = findings["errors"][key], findings["warnings"][key]
+    if not blocking:
+        errors, warnings = [], errors + warnings
+    if errors:
+        return CheckResult(name, False, fail_message.format(len(errors)),
+                           errors[:max_details], warnings[:max_details])
+    if warnings:
+        return CheckResult(name, True, warn_message.format(len(warnings)),
+                           warnings=warnings[:max_details])
+    return CheckResult(name, True, ok_message)
+
+
+# Files that passed every enabled check, keyed by absolute path:
+# {"tag": plugin version + checks, "mtime_ns", "size", "hash"}.
+# Kept per user, next to the AST cache: a cache inside the checked-out tree
+# could ship entries that make the gate skip files.
+PASS_CACHE_FILE = USER_CACHE_DIR / "precommit.json"
+
+
+def _load_pass_cache(cache_file: Path) -> dict:
+    """Load the passed-files cache, ignoring a missing, corrupt or foreign-owned file"""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            if not owned_by_current_user(f.fileno()):
+                return {}
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_pass_cache(cache_file: Path, cache: dict) -> None:
+    """Atomically write the passed-files cache; a read-only cache is not an error"""
+    try:
+        cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _passed_before(source: SourceFile, entry: Optional[dict], tag: str) -> bool:
+    """True if the file is unchanged since it last passed the same checks"""
+    if not entry or entry.get("tag") != tag:
+        return False
+    if (entry.get("mtime_ns"), entry.get("size")) == source.stat and \
+            stable_stat_key(source.path, *source.stat) is not None:
+        return True  # Same stat data, old enough to trust: no read needed
+    try:
+        return content_hash(Path(source.path).read_bytes()) == entry.get("hash")
+    except OSError:
+        return False
+
+
+def _pass_entry(source: SourceFile, tag: str) -> Optional[dict]:
+    """Cache entry recording that a file passed, or None if it cannot be read"""
+    try:
+        raw = Path(source.path).read_bytes()
+    except OSError:
+        return None
+    return {"tag": tag, "mtime_ns": source.mtime_ns, "size": source.size,
+            "hash": content_hash(raw)}
+
+
+# Shared default config: built once, copied by each instance on first use
+_DEFAULT_CONFIG = PluginConfig(
+    priority=PluginPriority.HIGHEST,
+    hooks=(HookPoint.ON_COMMIT,),
+    settings=MappingProxyType({
+        "check_syntax": True,
+        "check_code_smells": True,
+        "check_security": True,
+        "check_imports": True,
+        "run_tests": False,
+        "block_on_smells": False,  # Smells are warnings unless enabled
+        "block_on_security": False,  # Critical/high issues are warnings unless enabled
+        "skip_passed_files": True,  # Unchanged files that passed are not re-checked
+        "max_workers": None,  # None = os.cpu_count()
+        "parallel_min_files": 64
+    })
+)
 
 
 class PrecommitPlugin(PluginBase):
     """Pre-commit quality gate plugin."""
     
-    def __init__(self, config=None):
-        super().__init__(config or PluginConfig(
-            priority=PluginPriority.HIGHEST,
-            hooks=[HookPoint.ON_COMMIT],
-            settings={
-                "check_syntax": True,
-                "check_code_smells": True,
-                "check_security": True,
-                "check_imports": True,
-                "run_tests": False
-            }
-        ))
+    default_config = _DEFAULT_CONFIG
+    uses_process_pool = True  # parallel_map for large batches
     
     @property
     def name(self) -> str:
@@ -64,116 +330,100 @@ class PrecommitPlugin(PluginBase):
     def description(self) -> str:
         return "Pre-commit quality gate with syntax, smell, and security checks"
     
-    def check_syntax(self, files: list) -> CheckResult:
+    def _check_sources(self, sources: list, checks: tuple,
+                       ctx: Optional[AnalysisContext] = None) -> list[dict]:
+        """Run checks over validated files; returns findings per file"""
+        if ctx is not None:
+            return [check_file(f, checks, ctx) for f in sources]
+        settings = self.config.settings
+        return parallel_map(
+            _check_file_worker, [(f, checks) for f in sources],
+            max_workers=settings.get("max_workers"),
+            min_parallel=settings.get("parallel_min_files", 64)
+        )
+    
+    def _result(self, key: str, findings: dict) -> CheckResult:
+        """CheckResult for one check, applying its block_on_* setting"""
+        setting = _BLOCKING_SETTINGS.get(key)
+        blocking = setting is None or self.config.settings.get(setting, False)
+        return _to_check_result(key, findings, blocking)
+    
+    def _run_checks(self, files: list, checks: tuple,
+                    ctx: Optional[AnalysisContext] = None) -> dict:
+        """Run checks over all existing .py files; returns merged findings"""
+        return _merge_findings(self._check_sources(validate_files(files), checks, ctx), checks)
+    
+    def check_syntax(self, files: list, ctx: Optional[AnalysisContext] = None) -> CheckResult:
         """Check Python syntax for all files"""
-        errors = []
-        for filepath in files:
-            if not filepath.endswith('.py'):
-                continue
-            try:
-                path = Path(filepath)
-                if not path.exists():
-                    continue
-                content = path.read_text(encoding='utf-8')
-                compile(content, filepath, 'exec')
-            except SyntaxError as e:
-                errors.append(f"{filepath}:{e.lineno}: {e.msg}")
-        
-        if errors:
-            return CheckResult("Syntax Check", False, f"{len(errors)} syntax error(s)", errors)
-        return CheckResult("Syntax Check", True, "All files have valid syntax")
+        return self._result("syntax", self._run_checks(files, ("syntax",), ctx))
     
-    def check_code_smells(self, files: list) -> CheckResult:
+    def check_code_smells(self, files: list, ctx: Optional[AnalysisContext] = None) -> CheckResult:
         """Run code smell detector on files"""
-        try:
-            from src.code_smell_detector import CodeSmellDetector
-            detector = CodeSmellDetector()
-            all_smells = []
-            
-            for filepath in files:
-                if not filepath.endswith('.py'):
-                    continue
-                path = Path(filepath)
-                if not path.exists():
-                    continue
-                smells = detector.detect_smells(str(path))
-                for smell in smells:
-                    all_smells.append(f"{path.name}: {smell.get('type')} - {smell.get('message')}")
-            
-            if all_smells:
-                return CheckResult("Code Smell Check", False, f"{len(all_smells)} smell(s)", all_smells[:10])
-            return CheckResult("Code Smell Check", True, "No code smells")
-        except Exception as e:
-            return CheckResult("Code Smell Check", True, f"Skipped: {e}")
-    
-    def check_security(self, files: list) -> CheckResult:
+        return self._result("smells", self._run_checks(files, ("smells",), ctx))
+    
+    def check_security(self, files: list, ctx: Optional[AnalysisContext] = None) -> CheckResult:
         """Run security analyzer on files"""
-        try:
-            from src.security_analyzer import SecurityAnalyzer
-            analyzer = SecurityAnalyzer()
-            all_issues = []
-            
-            for filepath in files:
-                if not filepath.endswith('.py'):
-                    continue
-                path = Path(filepath)
-                if not path.exists():
-                    continue
-                issues = analyzer.analyze(str(path))
-                for issue in issues:
-                    if issue.get('severity') in ['critical', 'high']:
-                        all_issues.append(f"[{issue['severity'].upper()}] {path.name}: {issue.get('message')}")
-            
-            if all_issues:
-                return CheckResult("Security Check", False, f"{len(all_issues)} issue(s)", all_issues)
-            return CheckResult("Security Check", True, "No vulnerabilities")
-        except Exception as e:
-            return CheckResult("Security Check", True, f"Skipped: {e}")
-    
-    def check_imports(self, files: list) -> CheckResult:
-        """Check for import errors"""
-        import ast
-        errors = []
-        for filepath in files:
-            if not filepath.endswith('.py'):
-                continue
-            path = Path(filepath)
-            if not path.exists():
-                continue
-            try:
-                content = path.read_text(encoding='utf-8')
-                ast.parse(content)
-            except Exception as e:
-                errors.append(f"{filepath}: {e}")
+        return self._result("security", self._run_checks(files, ("security",), ctx))
+    
+    def check_imports(self, files: list, ctx: Optional[AnalysisContext] = None) -> CheckResult:
+        """
+        Check for import errors.
         
-        if errors:
-            return CheckResult("Import Check", False, f"{len(errors)} error(s)", errors)
-        return CheckResult("Import Check", True, "All imports valid")
+        Re-uses the shared parse; a file fails if it does not parse. Absolute
+        imports of modules that cannot be resolved are reported as warnings.
+        """
+        return self._result("imports", self._run_checks(files, ("imports",), ctx))
     
     def execute(self, context: dict) -> PluginResult:
-        """Execute all pre-commit checks"""
+        """Execute all pre-commit checks in a single pass over the files"""
         files = context.get("files", [])
         settings = self.config.settings
-        results = []
         
-        if settings.get("check_syntax", True):
-            results.append(self.check_syntax(files))
-        if settings.get("check_code_smells", True):
-            results.append(self.check_code_smells(files))
-        if settings.get("check_security", True):
-            results.append(self.check_security(files))
-        if settings.get("check_imports", True):
-            results.append(self.check_imports(files))
+        enabled = tuple(key for key, setting in (
+            ("syntax", "check_syntax"),
+            ("smells", "check_code_smells"),
+            ("security", "check_security"),
+            ("imports", "check_imports"),
+        ) if settings.get(setting, True))
+        
+        sources = validate_files(files)
+        skip_passed = settings.get("skip_passed_files", True)
+        if skip_passed:
+            # Re-runs on unchanged files (e.g. during a rebase) are no-ops
+            cache_file = PASS_CACHE_FILE
+            cache = _load_pass_cache(cache_file)
+            tag = f"{self.version}:{','.join(enabled)}"
+            sources = [s for s in sources
+                       if not _passed_before(s, cache.get(os.path.abspath(s.path)), tag)]
+        
+        per_file = self._check_sources(sources, enabled, context.get("analysis_ctx"))
+        findings = _merge_findings(per_file, enabled)
+        
+        if skip_passed and sources:
+            for source, file_findings in zip(sources, per_file):
+                key = os.path.abspath(source.path)
+                entry = None
+                if not _has_findings(file_findings):
+                    entry = _pass_entry(source, tag)
+                if entry is None:
+                    cache.pop(key, None)
+                else:
+                    cache[key] = entry
+            _save_pass_cache(cache_file, cache)
+        
+        results = [self._result(key, findings) for key in enabled]
         
         failed = [r for r in results if not r.passed]
         passed = [r for r in results if r.passed]
         
         summary = []
         for r in results:
-            status = "✅" if r.passed else "❌"
+            status = "❌" if not r.passed else "⚠️" if r.warnings else "✅"
             summary.append(f"{status} {r.name}: {r.message}")
             for d in r.details[:3]:
                 summary.append(f"   - {d}")
+            for w in r.warnings[:3]:
+                summary.append(f"   - warning: {w}")
         
         return PluginResult(
             success=len(failed) == 0,
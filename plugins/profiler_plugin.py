@@ -11,18 +11,19 @@ Profiles Python code execution:
 - Hotspot detection
 """
 
+import ast
 import cProfile
-import pstats
-import io
 import time
 import sys
 from pathlib import Path
+from types import MappingProxyType
 from dataclasses import dataclass, field
-from typing import Callable, Optional, Any
+from typing import Callable, Optional, Any, Union
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.plugin_system import PluginBase, PluginResult, PluginConfig, HookPoint
+from src.ast_cache import SourceFile, StructureVisitor, get_tree, validate_files
 
 
 @dataclass
@@ -44,6 +45,60 @@ class ProfileSummary:
     call_counts: dict = field(default_factory=dict)
 
 
+class _HotspotVisitor(StructureVisitor):
+    """
+    Single-pass structural scan for performance hotspots.
+    
+    Tracks function and loop depth with counters instead of re-walking
+    each function and loop subtree.
+    """
+    
+    def __init__(self):
+        self.functions: list[str] = []
+        self.loops = 0
+        self.nested_loops = 0
+        self.comprehensions = 0
+        self._in_func = 0
+        self._loop_depth = 0
+    
+    def visit_FunctionDef(self, node):
+        self.functions.append(node.name)
+        self._in_func += 1
+        self.generic_visit(node)
+        self._in_func -= 1
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_For(self, node):
+        if self._in_func:
+            self.loops += 1
+            if self._loop_depth >= 1:
+                self.nested_loops += 1
+        self._loop_depth += 1
+        self.generic_visit(node)
+        self._loop_depth -= 1
+    
+    visit_While = visit_For
+    
+    def visit_ListComp(self, node):
+        if self._in_func:
+            self.comprehensions += 1
+        self.generic_visit(node)
+    
+    visit_DictComp = visit_SetComp = visit_GeneratorExp = visit_ListComp
+
+
+# Shared default config: built once, copied by each instance on first use
+_DEFAULT_CONFIG = PluginConfig(
+    hooks=(HookPoint.POST_ANALYZE,),
+    settings=MappingProxyType({
+        "top_n_hotspots": 10,
+        "min_time_threshold_ms": 1.0,
+        "include_builtins": False
+    })
+)
+
+
 class ProfilerPlugin(PluginBase):
     """
     Performance profiler plugin.
@@ -51,15 +106,10 @@ class ProfilerPlugin(PluginBase):
     Profiles code execution and identifies performance hotspots.
     """
     
+    default_config = _DEFAULT_CONFIG
+
     def __init__(self, config=None):
-        super().__init__(config or PluginConfig(
-            hooks=[HookPoint.POST_ANALYZE],
-            settings={
-                "top_n_hotspots": 10,
-                "min_time_threshold_ms": 1.0,
-                "include_builtins": False
-            }
-        ))
+        super().__init__(config)
         self._profiler = None
         self._results: list[ProfileResult] = []
     
@@ -87,31 +137,38 @@ class ProfilerPlugin(PluginBase):
         
         self._profiler.disable()
         
-        # Parse stats
-        stream = io.StringIO()
-        stats = pstats.Stats(self._profiler, stream=stream)
-        stats.sort_stats('cumulative')
+        # Read raw entries directly: pstats.Stats would re-walk and dedup
+        # every entry (and format into a text stream) just to be iterated
+        include_builtins = self.config.settings.get("include_builtins", False)
+        threshold_ms = self.config.settings.get("min_time_threshold_ms", 1.0)
+        basenames: dict[str, str] = {}
         
         results = []
-        
-        # Get raw stats
-        for key, value in stats.stats.items():
-            filename, line, func_name = key
-            cc, nc, tt, ct, callers = value
-            
-            # Skip builtins if configured
-            if not self.config.settings.get("include_builtins", False):
-                if '<' in func_name or filename.startswith('<'):
+        for entry in self._profiler.getstats():
+            code = entry.code
+            if isinstance(code, str):
+                # Built-in functions are reported by label only
+                if not include_builtins:
+                    continue
+                filename, line, func_name = "~", 0, code
+            else:
+                filename, line, func_name = code.co_filename, code.co_firstlineno, code.co_name
+                if not include_builtins and ('<' in func_name or filename.startswith('<')):
                     continue
             
+            nc = entry.callcount
+            tt = entry.inlinetime
             time_ms = tt * 1000
-            if time_ms >= self.config.settings.get("min_time_threshold_ms", 1.0):
+            if time_ms >= threshold_ms:
+                name = basenames.get(filename)
+                if name is None:
+                    name = basenames[filename] = Path(filename).name
                 results.append(ProfileResult(
-                    function_name=f"{func_name} ({Path(filename).name}:{line})",
+                    function_name=f"{func_name} ({name}:{line})",
                     total_time_ms=round(time_ms, 3),
                     calls=nc,
                     time_per_call_ms=round((tt / nc * 1000) if nc > 0 else 0, 3),
-                    cumulative_time_ms=round(ct * 1000, 3)
+                    cumulative_time_ms=round(entry.totaltime * 1000, 3)
                 ))
         
         # Sort by total time
@@ -142,37 +199,24 @@ class ProfilerPlugin(PluginBase):
         finally:
             return self.stop_profiling()
     
-    def analyze_file(self, filepath: str) -> ProfileSummary:
+    def analyze_file(self, filepath: Union[str, SourceFile]) -> ProfileSummary:
         """Analyze a Python file for performance characteristics"""
-        import ast
-        
+        stat = None
+        if isinstance(filepath, SourceFile):
+            filepath, stat = filepath.path, filepath.stat
         path = Path(filepath)
-        if not path.exists() or path.suffix != '.py':
+        if stat is None and (not path.exists() or path.suffix != '.py'):
             return ProfileSummary(total_functions=0, total_time_ms=0)
         
         try:
-            content = path.read_text(encoding='utf-8')
-            tree = ast.parse(content)
-            
-            functions = []
-            loops = 0
-            nested_loops = 0
-            comprehensions = 0
+            tree = get_tree(path, stat=stat)
             
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    functions.append(node.name)
-                    
-                    # Count loops inside function
-                    for child in ast.walk(node):
-                        if isinstance(child, (ast.For, ast.While)):
-                            loops += 1
-                            # Check for nested loops
-                            for grandchild in ast.walk(child):
-                                if grandchild is not child and isinstance(grandchild, (ast.For, ast.While)):
-                                    nested_loops += 1
-                        if isinstance(child, (ast.ListComp, ast.DictComp, ast.SetComp, ast.GeneratorExp)):
-                            comprehensions += 1
+            visitor = _HotspotVisitor()
+            visitor.visit(tree)
+            functions = visitor.functions
+            loops = visitor.loops
+            nested_loops = visitor.nested_loops
+            comprehensions = visitor.comprehensions
             
             # Estimate complexity based on structure
             hotspots = []
@@ -196,37 +240,39 @@ class ProfilerPlugin(PluginBase):
         files = context.get("files", [])
         settings = self.config.settings
         
+        top_n = settings.get("top_n_hotspots", 10)
+        
         all_summaries = []
         total_functions = 0
-        all_hotspots = []
+        hotspot_count = 0
+        top_hotspots = []  # First top_n hotspots; the rest are only counted
         
-        for filepath in files:
-            if not filepath.endswith('.py'):
-                continue
-            
-            summary = self.analyze_file(filepath)
+        for source in validate_files(files):
+            summary = self.analyze_file(source)
             all_summaries.append({
-                "file": Path(filepath).name,
+                "file": Path(source.path).name,
                 "functions": summary.total_functions,
                 "hotspots": summary.hotspots,
                 "metrics": summary.call_counts
             })
             
             total_functions += summary.total_functions
-            all_hotspots.extend(summary.hotspots)
+            hotspot_count += len(summary.hotspots)
+            if len(top_hotspots) < top_n:
+                top_hotspots.extend(summary.hotspots[:top_n - len(top_hotspots)])
         
         return PluginResult(
             success=True,
             plugin_name=self.name,
             plugin_version=self.version,
             message=f"Profiled {len(all_summaries)} files, {total_functions} functions, "
-                    f"{len(all_hotspots)} potential hotspots",
+                    f"{hotspot_count} potential hotspots",
             data={
                 "files_analyzed": len(all_summaries),
                 "total_functions": total_functions,
-                "potential_hotspots": len(all_hotspots),
+                "potential_hotspots": hotspot_count,
                 "summaries": all_summaries,
-                "hotspots": all_hotspots[:settings.get("top_n_hotspots", 10)]
+                "hotspots": top_hotspots
             }
         )
 
@@ -5,9 +5,12 @@ Runs all tests and generates coverage reports
 Updated by CopilotOpusAgent
 """
 
-import subprocess
 import sys
-import os
+
+import coverage
+import pytest
+
+COVERAGE_FAIL_UNDER = 45  # Current: 47%, Target: 80%
 
 def run_tests_with_coverage():
     """Run all tests with coverage and generate reports"""
@@ -20,45 +23,48 @@ def run_tests_with_coverage():
         "src/test_security_analyzer.py",
         "src/test_plugin_system.py",
         "src/test_ast_analyzer.py",
+        "src/test_ast_cache.py",
+        "src/test_parallel.py",
+        "src/test_precommit_plugin.py",
+        "src/test_code_metrics_plugin.py",
     ]
     
-    # Run pytest with coverage
-    cmd = [
-        "pytest",
-        *test_files,
-        "--cov=src",
-        "--cov-report=term-missing",
-        "--cov-report=html",
-        "--cov-report=xml",
-        "--cov-fail-under=45",  # Current: 47%, Target: 80%
-        "-v"
-    ]
-    
+    # Run pytest in-process: one interpreter start-up and import pass
+    # (source/omit settings come from .coveragerc)
+    cov = coverage.Coverage()
+    cov.start()
     try:
-        result = subprocess.run(cmd, check=False)
-        
-        print("\n" + "="*60)
-        if result.returncode == 0:
-            print("✅ ALL TESTS PASSED WITH SUFFICIENT COVERAGE!")
-            print("="*60)
-            print("\n📊 Coverage reports generated:")
-            print("  - Terminal: See above")
-            print("  - HTML: htmlcov/index.html")
-            print("  - XML: coverage.xml (for badges)")
-            print("\n💡 Open HTML report: python3 -m http.server 8000 --directory htmlcov")
-            print("\n📈 Test Statistics:")
-            print(f"  - Test files: {len(test_files)}")
-            print("  - Tests: 69 total")
-            print("  - Coverage: 47.45%")
-            print("  - Target: 80%")
-            return 0
-        else:
-            print("❌ TESTS FAILED OR COVERAGE BELOW THRESHOLD")
-            print("="*60)
-            return 1
-            
-    except FileNotFoundError:
-        print("❌ pytest not found! Install with: pip install pytest pytest-cov")
+        exit_code = pytest.main([*test_files, "-v"])
+    finally:
+        cov.stop()
+        cov.save()
+    
+    print()
+    total = cov.report()
+    cov.html_report()
+    cov.xml_report(outfile="coverage.xml")
+    if total < COVERAGE_FAIL_UNDER:
+        print(f"\n❌ Coverage {total:.2f}% is below {COVERAGE_FAIL_UNDER}%")
+        exit_code = exit_code or 1
+    
+    print("\n" + "="*60)
+    if exit_code == 0:
+        print("✅ ALL TESTS PASSED WITH SUFFICIENT COVERAGE!")
+        print("="*60)
+        print("\n📊 Coverage reports generated:")
+        print("  - Terminal: See above")
+        print("  - HTML: htmlcov/index.html")
+        print("  - XML: coverage.xml (for badges)")
+        print("\n💡 Open HTML report: python3 -m http.server 8000 --directory htmlcov")
+        print("\n📈 Test Statistics:")
+        print(f"  - Test files: {len(test_files)}")
+        print("  - Tests: 69 total")
+        print("  - Coverage: 47.45%")
+        print("  - Target: 80%")
+        return 0
+    else:
+        print("❌ TESTS FAILED OR COVERAGE BELOW THRESHOLD")
+        print("="*60)
         return 1
 
 if __name__ == "__main__":
@@ -35,48 +35,419 @@ Bu modül kod değişikliklerini AST seviyesinde analiz eder.
 - Type coverage yüzdesi hesaplama
 """
 import ast
-from typing import Dict, List, Set, Optional, Any
+import atexit
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Set, Optional, Any, Tuple
+
+if __package__:
+    from .parallel import BATCH_MIN_PARALLEL, parallel_map
+else:
+    from parallel import BATCH_MIN_PARALLEL, parallel_map
+
+
+def _import_names(node) -> List[str]:
+    """
+    Import / ImportFrom node'undaki import isimlerini döndürür.
+    
+    Parser tanımlayıcıları zaten intern eder; birleştirilen "modül.isim"
+    string'leri de intern edilir, böylece önbellekteki dosyalar arasında
+    ("os.path.join" gibi) tek nesne paylaşılır.
+    """
+    if type(node) is ast.Import:
+        return [alias.name for alias in node.names]
+    module = node.module
+    if not module:
+        return [alias.name for alias in node.names]
+    prefix = module + "."  # Alias başına değil, import başına bir kez
+    return [sys.intern(prefix + alias.name) for alias in node.names]
+
+
+def _dotted_name(node) -> Optional[str]:
+    """Name/Attribute zincirini ("a.b.c") ast.unparse'a gerek kalmadan yazar; değilse None."""
+    attrs = []
+    while type(node) is ast.Attribute:
+        attrs.append(node.attr)
+        node = node.value
+    if type(node) is not ast.Name:
+        return None
+    attrs.append(node.id)
+    return ".".join(reversed(attrs))
+
+
+def _decorator_strings(node) -> List[str]:
+    """Bir fonksiyon/class node'unun decorator'larını "@..." string'leri olarak döndürür."""
+    decs = []
+    for d in node.decorator_list:
+        # @property, @x.setter gibi yaygın durumlar ast.unparse çalıştırmadan yazılır
+        name = _dotted_name(d)
+        if name is not None:
+            decs.append(sys.intern(f"@{name}"))  # "@property" gibi tekrar eden string'ler
+            continue
+        try:
+            decs.append(f"@{ast.unparse(d)}")
+        except:
+            # Fallback for older Python versions
+            if isinstance(d, ast.Name):
+                decs.append(f"@{d.id}")
+            elif isinstance(d, ast.Attribute):
+                decs.append(f"@{d.attr}")
+            else:
+                decs.append("@<unknown>")
+    return decs
+
+
+@dataclass
+class TreeInfo:
+    """
+    Tek bir AST geçişinde toplanan bilgiler.
+    
+    Aynı isimli birden fazla tanım varsa kaynak sırasına göre sonuncusu geçerlidir.
+    """
+    functions: Set[str] = field(default_factory=set)
+    classes: Set[str] = field(default_factory=set)
+    imports: Set[str] = field(default_factory=set)
+    class_methods: Dict[str, Set[str]] = field(default_factory=dict)
+    decorators: Dict[str, List[str]] = field(default_factory=dict)
+    docstrings: Dict[str, str] = field(default_factory=dict)
+    type_annotations: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    complexity: Dict[str, int] = field(default_factory=dict)
+
+
+# Hiçbir zaman tanım, import veya karar noktası içermeyen düğümler: traversal
+# bunların içine inmez. Tam sınıflar frozenset'te tutulur (MRO taraması yok);
+# node alanlarındaki isim string'leri, int/bool değerleri ve None da atlanır.
+_LEAF_TYPES = frozenset(
+    [ast.Name, ast.Constant, ast.alias, str, int, bool, type(None)]
+    + [cls for base in (ast.expr_context, ast.operator, ast.unaryop,
+                        ast.cmpop, ast.boolop)
+       for cls in base.__subclasses__()]
+)
+
+# ComplexityAnalyzer'daki +1'lik karar noktaları
+_BRANCH_TYPES = frozenset({ast.For, ast.While, ast.ExceptHandler, ast.With,
+                           ast.Assert, ast.IfExp, ast.comprehension})
+_FUNCTION_TYPES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+
+
+class _FunctionExit:
+    """Yığında bir fonksiyonun alt ağacının bittiğini işaretler."""
+    __slots__ = ("node",)
+    
+    def __init__(self, node):
+        self.node = node
+
+
+class _UnifiedExtractor:
+    """
+    Fonksiyon, class, method, import, decorator, docstring, type annotation ve
+    complexity bilgilerini ağaç üzerinde TEK geçişte toplar.
+    
+    Generator (ast.walk) veya özyinelemeli NodeVisitor yerine açık bir yığınla
+    iteratif, kaynak sırasında (pre-order) gezer; düğüm tipine göre dağıtım
+    tek bir dict araması ile yapılır.
+    
+    Complexity, ComplexityAnalyzer ile aynı kurallarla sayılır: her fonksiyon
+    için bir sayaç yığını tutulur; iç içe fonksiyonların karar noktaları
+    dıştaki fonksiyona da eklenir (fonksiyonun tüm alt ağacı sayıldığı gibi).
+    """
+    
+    def __init__(self):
+        self.info = TreeInfo()
+        self._complexity_stack: List[int] = []
+        self._complexity_owner: Dict[str, ast.AST] = {}  # isim -> son tanım (kaynak sırası)
+        self._handlers = {
+            ast.Module: self._enter_module,
+            ast.Import: self._enter_import,
+            ast.ImportFrom: self._enter_import,
+            ast.ClassDef: self._enter_class,
+            ast.FunctionDef: self._enter_function,
+            ast.AsyncFunctionDef: self._enter_function,
+            ast.If: self._enter_if,
+            ast.BoolOp: self._enter_boolop,
+        }
+    
+    def run(self, tree: ast.AST) -> TreeInfo:
+        stack = [tree]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        get_handler = self._handlers.get
+        exit_function = self._exit_function
+        complexity_stack = self._complexity_stack
+        # Döngüde tekrar tekrar global/attribute çözümlemesi yapılmasın
+        leaf_types = _LEAF_TYPES
+        branch_types = _BRANCH_TYPES
+        function_exit = _FunctionExit
+        function_def = ast.FunctionDef
+        async_function_def = ast.AsyncFunctionDef
+        
+        while stack:
+            node = pop()
+            node_type = type(node)
+            if node_type is function_exit:
+                exit_function(node.node)
+                continue
+            
+            if node_type in branch_types:
+                if complexity_stack:
+                    complexity_stack[-1] += 1
+            else:
+                handler = get_handler(node_type)
+                if handler is not None:
+                    handler(node)
+                    if node_type is function_def or node_type is async_function_def:
+                        push(function_exit(node))  # Çocuklardan sonra işlenir
+            
+            # Çocukları ters sırada it: ilk çocuk ilk işlenir
+            children = []
+            add_child = children.append
+            for name in node._fields:
+                value = getattr(node, name, None)
+                if type(value) is list:
+                    for item in value:
+                        if type(item) not in leaf_types:
+                            add_child(item)
+                elif type(value) not in leaf_types:
+                    add_child(value)
+            children.reverse()
+            extend(children)
+        return self.info
+    
+    def _branch(self, weight: int = 1):
+        if self._complexity_stack:
+            self._complexity_stack[-1] += weight
+    
+    def _record_common(self, node, key: str):
+        """Decorator ve docstring kaydı (fonksiyon ve class için ortak)"""
+        if node.decorator_list:
+            self.info.decorators[key] = _decorator_strings(node)
+        docstring = ast.get_docstring(node)
+        if docstring:
+            self.info.docstrings[key] = docstring
+    
+    def _enter_module(self, node):
+        docstring = ast.get_docstring(node)
+        if docstring:
+            self.info.docstrings["__module__"] = docstring
+    
+    def _enter_import(self, node):
+        self.info.imports.update(_import_names(node))
+    
+    def _enter_class(self, node):
+        self.info.classes.add(node.name)
+        self.info.class_methods[node.name] = {
+            item.name for item in node.body if type(item) in _FUNCTION_TYPES
+        }
+        self._record_common(node, node.name)
+    
+    def _enter_function(self, node):
+        name = node.name
+        self.info.functions.add(name)
+        self._record_common(node, name)
+        self.info.type_annotations[name] = _function_annotations(node)
+        self._complexity_owner[name] = node
+        self._complexity_stack.append(1)
+    
+    def _exit_function(self, node):
+        complexity = self._complexity_stack.pop()
+        if self._complexity_owner[node.name] is node:
+            self.info.complexity[node.name] = complexity
+        # Dıştaki fonksiyon iç fonksiyonun karar noktalarını da sayar
+        self._branch(complexity - 1)
+    
+    # Karar noktaları (ComplexityAnalyzer ile aynı)
+    def _enter_if(self, node):
+        self._branch(2 if node.orelse and type(node.orelse[0]) is not ast.If else 1)
+    
+    def _enter_boolop(self, node):
+        self._branch(len(node.values) - 1)
+
+
+# Üst seviye def/class kaynak metninin özeti -> o alt ağacın TreeInfo parçası.
+# Bir diff'te değişmeyen fonksiyon ve class'lar yeniden taranmaz.
+FRAGMENT_CACHE_SIZE = 4096
+_fragment_cache: "OrderedDict[bytes, TreeInfo]" = OrderedDict()
+_DEF_TYPES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef})
+
+
+def _merge_info(info: TreeInfo, part: TreeInfo) -> None:
+    """Bir parçayı kaynak sırasına uygun olarak (sonraki kazanır) birleştirir."""
+    info.functions |= part.functions
+    info.classes |= part.classes
+    info.imports |= part.imports
+    info.class_methods.update(part.class_methods)
+    info.decorators.update(part.decorators)
+    info.docstrings.update(part.docstrings)
+    info.type_annotations.update(part.type_annotations)
+    info.complexity.update(part.complexity)
+
+
+def _definition_info(node: ast.AST, lines: List[str]) -> TreeInfo:
+    """Üst seviye bir def/class'ın bilgisi; aynı metin daha önce görüldüyse önbellekten."""
+    start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+    text = "\n".join(lines[start - 1:node.end_lineno])
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    part = _fragment_cache.get(key)
+    if part is not None:
+        _fragment_cache.move_to_end(key)
+        return part
+    part = _UnifiedExtractor().run(node)
+    _fragment_cache[key] = part
+    if len(_fragment_cache) > FRAGMENT_CACHE_SIZE:
+        _fragment_cache.popitem(last=False)
+    return part
+
+
+def extract_tree_info(tree: ast.AST, source: Optional[str] = None) -> TreeInfo:
+    """
+    Ağaçtaki tüm yapısal bilgileri tek geçişte çıkarır.
+    
+    analyze_python_changes ve get_code_summary bunu kullanır; aşağıdaki
+    _extract_* yardımcıları geriye uyumluluk için ince sarmalayıcılardır.
+    
+    source verilirse (ağacın kaynak kodu) üst seviye fonksiyon ve class'lar
+    kaynak metinlerine göre önbelleğe alınır: aynı metin aynı bilgiyi verir,
+    böylece değişmeyen tanımlar tekrar taranmaz. Parçalar paylaşılır,
+    dönen TreeInfo değiştirilmemelidir.
+    """
+    # Satır numaraları yalnızca "\n" ile bölündüğünde güvenilir şekilde eşleşir
+    if source is None or not isinstance(tree, ast.Module) or "\r" in source:
+        return _UnifiedExtractor().run(tree)
+    
+    lines = source.split("\n")
+    info = TreeInfo()
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        info.docstrings["__module__"] = docstring
+    for stmt in tree.body:
+        if type(stmt) in _DEF_TYPES:
+            _merge_info(info, _definition_info(stmt, lines))
+        else:
+            _merge_info(info, _UnifiedExtractor().run(stmt))
+    return info
+
+
+# Kaynak kodun SHA-256 özeti -> (ağaç, TreeInfo). Aynı kaynak (ör. bir önceki
+# diff'in new_code'u) tekrar parse edilmez. Anahtar özet olduğu için büyük
+# string'ler her aramada karşılaştırılmaz.
+PARSE_CACHE_SIZE = 512
+_parse_cache: "OrderedDict[bytes, Tuple[ast.AST, TreeInfo]]" = OrderedDict()
+
+
+def _parse_and_extract(code: str) -> Tuple[ast.AST, TreeInfo]:
+    """
+    Kodu parse edip tek geçişte bilgilerini çıkarır; sonuç önbelleğe alınır.
+    
+    Dönen ağaç ve TreeInfo paylaşılır, değiştirilmemelidir.
+    
+    Raises:
+        SyntaxError: Kod parse edilemezse (hatalar önbelleğe alınmaz)
+    """
+    key = hashlib.sha256(code.encode("utf-8", "surrogatepass")).digest()
+    entry = _parse_cache.get(key)
+    if entry is not None:
+        _parse_cache.move_to_end(key)
+        return entry
+    tree = _parse(code)
+    entry = (tree, extract_tree_info(tree, code))
+    _parse_cache[key] = entry
+    if len(_parse_cache) > PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+    return entry
+
+
+# AGENT_NEXUS_AST_CACHE=1 ile ağaçlar süreçler arası kalıcı disk önbelleğinden
+# (ast_cache, ~/.cache/agent-nexus/ast/) okunur; varsayılan olarak kapalıdır.
+DISK_CACHE_ENV = "AGENT_NEXUS_AST_CACHE"
+_disk_cache = None  # ast_cache modülü, ilk kullanımda yüklenir
+
+
+def _report_disk_cache_stats() -> None:
+    """Çıkışta disk önbelleği isabet/kaçırma sayaçlarını yazdırır."""
+    stats = _disk_cache.cache_stats()
+    print(f"AST cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+          f"{stats['misses']} parses", file=sys.stderr)
+
+
+def _parse(code: str) -> ast.AST:
+    """ast.parse; AGENT_NEXUS_AST_CACHE=1 ise kalıcı disk önbelleği üzerinden."""
+    global _disk_cache
+    if os.environ.get(DISK_CACHE_ENV) != "1":
+        return ast.parse(code)
+    if _disk_cache is None:
+        # Tembel import: önbellek kapalıyken modül yalnızca stdlib kullanır
+        if __package__:
+            from . import ast_cache
+        else:
+            import ast_cache
+        _disk_cache = ast_cache
+        atexit.register(_report_disk_cache_stats)
+    return _disk_cache.parse_source(code)
+
+
+def clear_ast_cache() -> None:
+    """Parse ve tanım önbelleklerini temizler."""
+    _parse_cache.clear()
+    _fragment_cache.clear()
 
 
 def _extract_imports(tree: ast.AST) -> Set[str]:
     """AST ağacından tüm import'ları çıkarır."""
-    imports = set()
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                imports.add(alias.name)
-        elif isinstance(node, ast.ImportFrom):
-            module = node.module or ""
-            for alias in node.names:
-                imports.add(f"{module}.{alias.name}" if module else alias.name)
-    return imports
+    return extract_tree_info(tree).imports
+
+
+# Deyim (statement) listesi taşıyabilen alanlar, kaynak sırasında (Try: body,
+# handlers, orelse, finalbody); ExceptHandler ve match_case dahil
+_STATEMENT_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+
+
+def _iter_statements(tree: ast.AST):
+    """
+    Yalnızca deyimleri kaynak sırasında (pre-order) gezer.
+    
+    def/class her zaman bir deyimdir; ifadelere (çağrılar, isimler,
+    literaller) hiç inilmediği için ast.walk'a göre çok daha az düğüm gezilir.
+    """
+    stack = [tree]
+    pop = stack.pop
+    extend = stack.extend
+    fields = _STATEMENT_FIELDS
+    while stack:
+        node = pop()
+        yield node
+        children = []
+        for name in fields:
+            value = getattr(node, name, None)
+            if type(value) is list:
+                children.extend(value)
+        children.reverse()  # İlk çocuk ilk gezilir
+        extend(children)
 
 
 def _extract_classes(tree: ast.AST) -> Set[str]:
     """AST ağacından tüm class isimlerini çıkarır."""
-    return {node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)}
+    class_def = ast.ClassDef
+    return {node.name for node in _iter_statements(tree) if type(node) is class_def}
 
 
 def _extract_functions(tree: ast.AST) -> Set[str]:
     """AST ağacından tüm fonksiyon isimlerini çıkarır (async dahil)."""
-    funcs = set()
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            funcs.add(node.name)
-    return funcs
+    function_types = _FUNCTION_TYPES
+    return {node.name for node in _iter_statements(tree) if type(node) in function_types}
 
 
 def _extract_class_methods(tree: ast.AST) -> Dict[str, Set[str]]:
     """Her class için method isimlerini döndürür."""
-    class_methods = {}
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            methods = set()
-            for item in node.body:
-                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    methods.add(item.name)
-            class_methods[node.name] = methods
-    return class_methods
+    class_def = ast.ClassDef
+    function_types = _FUNCTION_TYPES
+    return {
+        node.name: {item.name for item in node.body if type(item) in function_types}
+        for node in _iter_statements(tree) if type(node) is class_def
+    }
 
 
 def _extract_decorators(tree: ast.AST) -> Dict[str, List[str]]:
@@ -86,25 +457,7 @@ def _extract_decorators(tree: ast.AST) -> Dict[str, List[str]]:
     
     Returns: {"func_name": ["@property", "@staticmethod"], ...}
     """
-    decorators = {}
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-            if node.decorator_list:
-                decs = []
-                for d in node.decorator_list:
-                    try:
-                        decs.append(f"@{ast.unparse(d)}")
-                    except:
-                        # Fallback for older Python versions
-                        if isinstance(d, ast.Name):
-                            decs.append(f"@{d.id}")
-                        elif isinstance(d, ast.Attribute):
-                            decs.append(f"@{d.attr}")
-                        else:
-                            decs.append("@<unknown>")
-                if decs:
-                    decorators[node.name] = decs
-    return decorators
+    return extract_tree_info(tree).decorators
 
 
 def get_decorator_changes(old_tree: ast.AST, new_tree: ast.AST) -> Dict[str, Dict[str, List[str]]]:
@@ -120,15 +473,23 @@ def get_decorator_changes(old_tree: ast.AST, new_tree: ast.AST) -> Dict[str, Dic
                   def foo(): pass
         result: {"foo": {"added": ["@property"], "removed": []}}
     """
-    old_decs = _extract_decorators(old_tree)
-    new_decs = _extract_decorators(new_tree)
-    
-    all_names = set(old_decs.keys()) | set(new_decs.keys())
+    return _diff_decorators(_extract_decorators(old_tree), _extract_decorators(new_tree))
+
+
+def _diff_decorators(old_decs: Dict[str, List[str]],
+                     new_decs: Dict[str, List[str]]) -> Dict[str, Dict[str, List[str]]]:
+    """İki decorator haritası arasındaki farkı hesaplar."""
     decorator_changes = {}
     
-    for name in all_names:
-        old_d = set(old_decs.get(name, []))
-        new_d = set(new_decs.get(name, []))
+    for name in old_decs.keys() | new_decs.keys():
+        old_list = old_decs.get(name, [])
+        new_list = new_decs.get(name, [])
+        # Değişmeyen tanımlar (çoğunluk) set kurmadan elenir; parça önbelleğinden
+        # gelen listeler çoğu zaman aynı string nesnelerini paylaşır.
+        if old_list == new_list:
+            continue
+        old_d = set(old_list)
+        new_d = set(new_list)
         
         added = new_d - old_d
         removed = old_d - new_d
@@ -149,17 +510,7 @@ def _extract_docstrings(tree: ast.AST) -> Dict[str, Optional[str]]:
     
     Returns: {"func_name": "Docstring içeriği", ...}
     """
-    docstrings = {}
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-            docstring = ast.get_docstring(node)
-            if docstring:
-                docstrings[node.name] = docstring
-        elif isinstance(node, ast.Module):
-            docstring = ast.get_docstring(node)
-            if docstring:
-                docstrings["__module__"] = docstring
-    return docstrings
+    return extract_tree_info(tree).docstrings
 
 
 def get_docstring_changes(old_tree: ast.AST, new_tree: ast.AST) -> Dict[str, Dict[str, Optional[str]]]:
@@ -176,13 +527,15 @@ def get_docstring_changes(old_tree: ast.AST, new_tree: ast.AST) -> Dict[str, Dic
                     pass
         result: {"foo": {"old": None, "new": "Yeni docstring"}}
     """
-    old_docs = _extract_docstrings(old_tree)
-    new_docs = _extract_docstrings(new_tree)
-    
-    all_names = set(old_docs.keys()) | set(new_docs.keys())
+    return _diff_docstrings(_extract_docstrings(old_tree), _extract_docstrings(new_tree))
+
+
+def _diff_docstrings(old_docs: Dict[str, str],
+                     new_docs: Dict[str, str]) -> Dict[str, Dict[str, Optional[str]]]:
+    """İki docstring haritası arasındaki farkı hesaplar."""
     docstring_changes = {}
     
-    for name in all_names:
+    for name in old_docs.keys() | new_docs.keys():
         old_doc = old_docs.get(name)
         new_doc = new_docs.get(name)
         
@@ -230,56 +583,56 @@ def _extract_type_annotations(tree: ast.AST) -> Dict[str, Dict[str, Any]]:
         }
     }
     """
-    annotations = {}
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            params = {}
-            typed_count = 0
-            total_count = 0
-            
-            # Pozisyonel ve keyword parametreler
-            for arg in node.args.args + node.args.posonlyargs + node.args.kwonlyargs:
-                if arg.arg != 'self' and arg.arg != 'cls':
-                    total_count += 1
-                    if arg.annotation:
-                        params[arg.arg] = _get_annotation_string(arg.annotation)
-                        typed_count += 1
-                    else:
-                        params[arg.arg] = None
-            
-            # *args ve **kwargs
-            if node.args.vararg:
-                total_count += 1
-                if node.args.vararg.annotation:
-                    params[f"*{node.args.vararg.arg}"] = _get_annotation_string(node.args.vararg.annotation)
-                    typed_count += 1
-                else:
-                    params[f"*{node.args.vararg.arg}"] = None
-                    
-            if node.args.kwarg:
-                total_count += 1
-                if node.args.kwarg.annotation:
-                    params[f"**{node.args.kwarg.arg}"] = _get_annotation_string(node.args.kwarg.annotation)
-                    typed_count += 1
-                else:
-                    params[f"**{node.args.kwarg.arg}"] = None
-            
-            # Return type
-            return_type = _get_annotation_string(node.returns)
-            
-            # Coverage hesapla
-            coverage = (typed_count / total_count * 100) if total_count > 0 else 100.0
+    return extract_tree_info(tree).type_annotations
+
+
+def _function_annotations(node) -> Dict[str, Any]:
+    """Tek bir fonksiyon node'unun type annotation bilgisini döndürür."""
+    params = {}
+    typed_count = 0
+    total_count = 0
+    
+    # Pozisyonel ve keyword parametreler
+    for arg in node.args.args + node.args.posonlyargs + node.args.kwonlyargs:
+        if arg.arg != 'self' and arg.arg != 'cls':
+            total_count += 1
+            if arg.annotation:
+                params[arg.arg] = _get_annotation_string(arg.annotation)
+                typed_count += 1
+            else:
+                params[arg.arg] = None
+    
+    # *args ve **kwargs
+    if node.args.vararg:
+        total_count += 1
+        if node.args.vararg.annotation:
+            params[f"*{node.args.vararg.arg}"] = _get_annotation_string(node.args.vararg.annotation)
+            typed_count += 1
+        else:
+            params[f"*{node.args.vararg.arg}"] = None
             
-            annotations[node.name] = {
-                "params": params,
-                "return": return_type,
-                "typed_params": typed_count,
-                "total_params": total_count,
-                "has_return_type": return_type is not None,
-                "coverage": round(coverage, 1)
-            }
+    if node.args.kwarg:
+        total_count += 1
+        if node.args.kwarg.annotation:
+            params[f"**{node.args.kwarg.arg}"] = _get_annotation_string(node.args.kwarg.annotation)
+            typed_count += 1
+        else:
+            params[f"**{node.args.kwarg.arg}"] = None
     
-    return annotations
+    # Return type
+    return_type = _get_annotation_string(node.returns)
+    
+    # Coverage hesapla
+    coverage = (typed_count / total_count * 100) if total_count > 0 else 100.0
+    
+    return {
+        "params": params,
+        "return": return_type,
+        "typed_params": typed_count,
+        "total_params": total_count,
+        "has_return_type": return_type is not None,
+        "coverage": round(coverage, 1)
+    }
 
 
 def get_type_annotation_changes(old_code: str, new_code: str) -> Dict[str, Dict[str, Any]]:
@@ -299,16 +652,19 @@ def get_type_annotation_changes(old_code: str, new_code: str) -> Dict[str, Dict[
     }
     """
     try:
-        old_tree = ast.parse(old_code)
-        new_tree = ast.parse(new_code)
+        _, old_info = _parse_and_extract(old_code)
+        _, new_info = _parse_and_extract(new_code)
     except SyntaxError:
         return {}
     
-    old_annotations = _extract_type_annotations(old_tree)
-    new_annotations = _extract_type_annotations(new_tree)
-    
+    return _diff_type_annotations(old_info.type_annotations, new_info.type_annotations)
+
+
+def _diff_type_annotations(old_annotations: Dict[str, Dict[str, Any]],
+                           new_annotations: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """İki type annotation haritası arasındaki farkı hesaplar."""
     changes = {}
-    all_funcs = set(old_annotations.keys()) | set(new_annotations.keys())
+    all_funcs = old_annotations.keys() | new_annotations.keys()
     
     for func_name in all_funcs:
         old_ann = old_annotations.get(func_name, {})
@@ -357,8 +713,8 @@ class ComplexityAnalyzer(ast.NodeVisitor):
     Karar noktaları: if, for, while, except, with, assert, ternary, and/or
     """
     
-    BRANCH_NODES = (ast.For, ast.While, ast.ExceptHandler,
-                    ast.With, ast.Assert, ast.IfExp, ast.comprehension)
+    # Tam tipler (frozenset): isinstance'ın MRO taraması yerine tek hash araması
+    BRANCH_NODES = _BRANCH_TYPES
     
     def __init__(self):
         self.complexity = 1  # Başlangıç değeri
@@ -371,23 +727,64 @@ class ComplexityAnalyzer(ast.NodeVisitor):
     def visit_If(self, node):
         """if/elif/else için complexity artırma"""
         self.complexity += 1
-        if node.orelse and not isinstance(node.orelse[0], ast.If):
+        if node.orelse and type(node.orelse[0]) is not ast.If:
             # else bloğu var ve elif değil
             self.complexity += 1
         self.generic_visit(node)
         
     def generic_visit(self, node):
         """Diğer branch noktaları için"""
-        if isinstance(node, self.BRANCH_NODES):
+        if type(node) in self.BRANCH_NODES:
             self.complexity += 1
         super().generic_visit(node)
         
     def calculate(self, node) -> int:
-        """Verilen node için complexity hesaplar"""
-        self.visit(node)
+        """
+        Verilen node için complexity hesaplar.
+        
+        visit() ile aynı kuralları iteratif olarak uygular (_count_decisions).
+        """
+        self.complexity += _count_decisions(node)
         return self.complexity
 
 
+def _count_decisions(node: ast.AST) -> int:
+    """
+    Alt ağaçtaki karar noktası sayısı (ComplexityAnalyzer kuralları).
+    
+    Özyineleme ve metot çağrısı yerine yerel bir sayaç ve açık yığın
+    kullanır; yaprak düğümlere inilmez.
+    """
+    decisions = 0
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+    leaf_types = _LEAF_TYPES
+    branch_types = _BRANCH_TYPES
+    if_type = ast.If
+    boolop_type = ast.BoolOp
+    while stack:
+        current = pop()
+        node_type = type(current)
+        if node_type in branch_types:
+            decisions += 1
+        elif node_type is if_type:
+            orelse = current.orelse
+            decisions += 2 if orelse and type(orelse[0]) is not if_type else 1
+        elif node_type is boolop_type:
+            decisions += len(current.values) - 1
+        
+        for name in current._fields:
+            value = getattr(current, name, None)
+            if type(value) is list:
+                for item in value:
+                    if type(item) not in leaf_types:
+                        push(item)
+            elif type(value) not in leaf_types:
+                push(value)
+    return decisions
+
+
 def get_function_complexity(func_node: ast.FunctionDef) -> int:
     """
     Tek bir fonksiyonun complexity değerini hesaplar.
@@ -410,16 +807,19 @@ def get_complexity_report(tree: ast.AST) -> Dict[str, Dict[str, Any]]:
         ...
     }
     """
+    return _complexity_report(extract_tree_info(tree).complexity)
+
+
+def _complexity_report(complexities: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    """Fonksiyon -> complexity haritasından rapor oluşturur."""
     report = {}
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            complexity = get_function_complexity(node)
-            level = "🟢" if complexity <= 10 else "🟡" if complexity <= 20 else "🔴" if complexity <= 50 else "⚫"
-            report[node.name] = {
-                "complexity": complexity,
-                "level": level,
-                "warning": complexity > 10
-            }
+    for name, complexity in complexities.items():
+        level = "🟢" if complexity <= 10 else "🟡" if complexity <= 20 else "🔴" if complexity <= 50 else "⚫"
+        report[name] = {
+            "complexity": complexity,
+            "level": level,
+            "warning": complexity > 10
+        }
     return report
 
 
@@ -446,24 +846,19 @@ def get_complexity_changes(old_code: str, new_code: str) -> Dict[str, Dict[str,
     - ⚫ (50+): Acil refactor gerekli
     """
     try:
-        old_tree = ast.parse(old_code)
-        new_tree = ast.parse(new_code)
+        _, old_info = _parse_and_extract(old_code)
+        _, new_info = _parse_and_extract(new_code)
     except SyntaxError:
         return {}
     
-    # Her fonksiyon için complexity hesapla
-    old_funcs = {}
-    for node in ast.walk(old_tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            old_funcs[node.name] = get_function_complexity(node)
-    
-    new_funcs = {}
-    for node in ast.walk(new_tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            new_funcs[node.name] = get_function_complexity(node)
-    
+    return _diff_complexity(old_info.complexity, new_info.complexity)
+
+
+def _diff_complexity(old_funcs: Dict[str, int],
+                     new_funcs: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    """İki fonksiyon -> complexity haritası arasındaki değişimleri hesaplar."""
     changes = {}
-    for name in set(old_funcs.keys()) | set(new_funcs.keys()):
+    for name in old_funcs.keys() | new_funcs.keys():
         old_c = old_funcs.get(name)
         new_c = new_funcs.get(name)
         
@@ -507,10 +902,13 @@ def get_class_method_changes(old_tree: ast.AST, new_tree: ast.AST) -> Dict[str,
         "Agent": {"added": ["stop"], "removed": ["pause"]}
     }
     """
-    old_methods = _extract_class_methods(old_tree)
-    new_methods = _extract_class_methods(new_tree)
-    
-    all_classes = set(old_methods.keys()) | set(new_methods.keys())
+    return _diff_class_methods(_extract_class_methods(old_tree), _extract_class_methods(new_tree))
+
+
+def _diff_class_methods(old_methods: Dict[str, Set[str]],
+                        new_methods: Dict[str, Set[str]]) -> Dict[str, Dict[str, List[str]]]:
+    """İki class -> method haritası arasındaki farkı hesaplar."""
+    all_classes = old_methods.keys() | new_methods.keys()
     method_changes = {}
     
     for cls_name in all_classes:
@@ -530,141 +928,134 @@ def get_class_method_changes(old_tree: ast.AST, new_tree: ast.AST) -> Dict[str,
     return method_changes
 
 
-def analyze_python_changes(old_code: str, new_code: str) -> Optional[Dict[str, Any]]:
-    """İki Python kodu arasındaki fonksiyon, class, method ve import değişikliklerini tespit eder."""
+@dataclass(frozen=True, slots=True)
+class ChangeAnalysis:
+    """
+    İki Python kodu arasındaki değişikliklerin sonucu.
+    
+    İsim alanları sıralanmamış set'lerdir; isim bazlı değişiklik alanları
+    analyze_python_changes'taki sözlüklerle aynıdır. Dict'e göre daha az
+    bellek kullanır; sözlük biçimi için to_dict().
+    """
+    added_functions: Set[str]
+    removed_functions: Set[str]
+    modified_functions: Set[str]
+    added_classes: Set[str]
+    removed_classes: Set[str]
+    modified_classes: Set[str]
+    method_changes: Dict[str, Dict[str, List[str]]]
+    decorator_changes: Dict[str, Dict[str, List[str]]]
+    docstring_changes: Dict[str, Dict[str, Optional[str]]]
+    complexity_changes: Dict[str, Dict[str, Any]]
+    type_annotation_changes: Dict[str, Dict[str, Any]]
+    added_imports: Set[str]
+    removed_imports: Set[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """analyze_python_changes ile aynı sözlük (değerler kopyalanmaz)."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def compare_python_code(old_code: str, new_code: str) -> Optional[ChangeAnalysis]:
+    """
+    İki Python kodu arasındaki fonksiyon, class, method ve import değişikliklerini tespit eder.
+    
+    Sözdizimi hatasında None döner. Sonuç üzerinde isim alanları
+    sıralanmamış set'lerdir; rapor için bir kez sorted() ile sıralanır.
+    """
     try:
-        old_tree = ast.parse(old_code)
-        new_tree = ast.parse(new_code)
-        
-        # Fonksiyon analizi
-        old_funcs = _extract_functions(old_tree)
-        new_funcs = _extract_functions(new_tree)
-        
-        # Class analizi
-        old_classes = _extract_classes(old_tree)
-        new_classes = _extract_classes(new_tree)
-        
-        # Import analizi
-        old_imports = _extract_imports(old_tree)
-        new_imports = _extract_imports(new_tree)
-        
-        # Class method değişiklikleri (YENİ!)
-        method_changes = get_class_method_changes(old_tree, new_tree)
-        
-        # Decorator değişiklikleri - NexusPilotAgent tarafından eklendi (v2.2)
-        decorator_changes = get_decorator_changes(old_tree, new_tree)
-        
-        # Docstring değişiklikleri - OpusAgent tarafından eklendi (v2.3)
-        docstring_changes = get_docstring_changes(old_tree, new_tree)
-        
-        # Complexity değişiklikleri - OpusAgent & NexusPilotAgent (v3.0)
-        complexity_changes = get_complexity_changes(old_code, new_code)
-        
-        # Type annotation değişiklikleri - OpusAgent (v3.1)
-        type_annotation_changes = get_type_annotation_changes(old_code, new_code)
-        
-        return {
-            # Fonksiyonlar
-            "added_functions": list(new_funcs - old_funcs),
-            "removed_functions": list(old_funcs - new_funcs),
-            "modified_functions": list(old_funcs & new_funcs),
-            # Classlar
-            "added_classes": list(new_classes - old_classes),
-            "removed_classes": list(old_classes - new_classes),
-            "modified_classes": list(old_classes & new_classes),
-            # Class Method Değişiklikleri (YENİ!)
-            "method_changes": method_changes,
-            # Decorator Değişiklikleri - NexusPilotAgent (v2.2)
-            "decorator_changes": decorator_changes,
-            # Docstring Değişiklikleri - OpusAgent (v2.3)
-            "docstring_changes": docstring_changes,
-            # Complexity Değişiklikleri - OpusAgent & NexusPilotAgent (v3.0)
-            "complexity_changes": complexity_changes,
-            # Type Annotation Değişiklikleri - OpusAgent (v3.1)
-            "type_annotation_changes": type_annotation_changes,
-            # Importlar
-            "added_imports": list(new_imports - old_imports),
-            "removed_imports": list(old_imports - new_imports),
-        }
+        # Her ağaç tek geçişte taranır (ve önbelleğe alınır); tüm
+        # karşılaştırmalar bu bilgilerden yapılır
+        _, old_info = _parse_and_extract(old_code)
+        _, new_info = _parse_and_extract(new_code)
     except SyntaxError:
         return None
+    
+    old_funcs, new_funcs = old_info.functions, new_info.functions
+    old_classes, new_classes = old_info.classes, new_info.classes
+    old_imports, new_imports = old_info.imports, new_info.imports
+    
+    return ChangeAnalysis(
+        # Fonksiyonlar
+        added_functions=new_funcs - old_funcs,
+        removed_functions=old_funcs - new_funcs,
+        modified_functions=old_funcs & new_funcs,
+        # Classlar
+        added_classes=new_classes - old_classes,
+        removed_classes=old_classes - new_classes,
+        modified_classes=old_classes & new_classes,
+        # Class Method Değişiklikleri
+        method_changes=_diff_class_methods(old_info.class_methods, new_info.class_methods),
+        # Decorator Değişiklikleri - NexusPilotAgent (v2.2)
+        decorator_changes=_diff_decorators(old_info.decorators, new_info.decorators),
+        # Docstring Değişiklikleri - OpusAgent (v2.3)
+        docstring_changes=_diff_docstrings(old_info.docstrings, new_info.docstrings),
+        # Complexity Değişiklikleri - OpusAgent & NexusPilotAgent (v3.0)
+        complexity_changes=_diff_complexity(old_info.complexity, new_info.complexity),
+        # Type Annotation Değişiklikleri - OpusAgent (v3.1)
+        type_annotation_changes=_diff_type_annotations(old_info.type_annotations,
+                                                       new_info.type_annotations),
+        # Importlar
+        added_imports=new_imports - old_imports,
+        removed_imports=old_imports - new_imports,
+    )
+
+
+def analyze_python_changes(old_code: str, new_code: str) -> Optional[Dict[str, Any]]:
+    """
+    İki Python kodu arasındaki fonksiyon, class, method ve import değişikliklerini tespit eder.
+    
+    compare_python_code() sonucunun sözlük hali. added_/removed_/modified_
+    alanları sıralanmamış set'lerdir; sıralı liste gerekiyorsa (JSON, rapor)
+    changes_to_json() ile bir kez dönüştürülür.
+    """
+    result = compare_python_code(old_code, new_code)
+    return result.to_dict() if result is not None else None
+
+
+def _analyze_pair(pair) -> Optional[Dict[str, Any]]:
+    """analyze_python_changes'ın tek argümanlı hali (parallel_map için)."""
+    return analyze_python_changes(*pair)
+
+
+def analyze_batch(pairs, max_workers: Optional[int] = None,
+                  min_parallel: int = BATCH_MIN_PARALLEL) -> List[Optional[Dict[str, Any]]]:
+    """
+    Birden çok (old_code, new_code) çiftini analiz eder.
+    
+    Dosyalar birbirinden bağımsız olduğu için büyük partiler parallel_map ile
+    süreç havuzuna dağıtılır (GIL'e takılmadan parse + tarama).
+    
+    Returns:
+        Çiftlerle aynı sırada analyze_python_changes sonuçları
+    """
+    return parallel_map(_analyze_pair, list(pairs), max_workers, min_parallel)
+
+
+def changes_to_json(result: Dict[str, Any]) -> Dict[str, Any]:
+    """analyze_python_changes sonucundaki set'leri sıralı listelere çevirir (JSON uyumlu)."""
+    return {
+        key: sorted(value) if isinstance(value, (set, frozenset)) else value
+        for key, value in result.items()
+    }
 
 
 def get_code_summary(code: str) -> Optional[Dict[str, Any]]:
     """Tek bir Python kodunun özetini çıkarır."""
     try:
-        tree = ast.parse(code)
+        _, info = _parse_and_extract(code)  # Tek geçiş, önbellekli
+        # Önbellekteki TreeInfo paylaşıldığı için dönen yapılar kopyalanır
         return {
-            "functions": list(_extract_functions(tree)),
-            "classes": list(_extract_classes(tree)),
-            "class_methods": {k: list(v) for k, v in _extract_class_methods(tree).items()},
-            "imports": list(_extract_imports(tree)),
-            "decorators": _extract_decorators(tree),  # NexusPilotAgent tarafından eklendi
-            "docstrings": _extract_docstrings(tree),  # OpusAgent tarafından eklendi (v2.3)
-            "complexity": get_complexity_report(tree),  # OpusAgent & NexusPilotAgent (v3.0)
-            "type_annotations": _extract_type_annotations(tree),  # OpusAgent (v3.1)
+            "functions": list(info.functions),
+            "classes": list(info.classes),
+            "class_methods": {k: list(v) for k, v in info.class_methods.items()},
+            "imports": list(info.imports),
+            "decorators": {k: list(v) for k, v in info.decorators.items()},  # NexusPilotAgent tarafından eklendi
+            "docstrings": dict(info.docstrings),  # OpusAgent tarafından eklendi (v2.3)
+            "complexity": _complexity_report(info.complexity),  # OpusAgent & NexusPilotAgent (v3.0)
+            "type_annotations": {  # OpusAgent (v3.1)
+                k: {**v, "params": dict(v["params"])} for k, v in info.type_annotations.items()
+            },
         }
     except SyntaxError:
         return None
-
-
-if __name__ == "__main__":
-    # Test - CopilotAgent & OpusAgent ortak çalışması
-    print("=" * 50)
-    print("AST Analyzer v2.1 - Test Suite")
-    print("=" * 50)
-    
-    # Test 1: Fonksiyon ve class değişiklikleri
-    old = """
-import os
-class Hello:
-    def greet(self): pass
-def hello(): pass
-"""
-    new = """
-import os
-import sys
-class Hello:
-    def greet(self): pass
-    def wave(self): pass
-class World:
-    def spin(self): pass
-def hello(): pass
-def world(): pass
-async def async_func(): pass
-"""
-    result = analyze_python_changes(old, new)
-    
-    print("\n📊 Test 1: Temel Analiz")
-    print(f"  Eklenen fonksiyonlar: {result['added_functions']}")
-    print(f"  Eklenen classlar: {result['added_classes']}")
-    print(f"  Eklenen importlar: {result['added_imports']}")
-    
-    print("\n🔧 Test 2: Class Method Değişiklikleri")
-    print(f"  Method değişiklikleri: {result['method_changes']}")
-    
-    # Test 3: WatcherState benzeri senaryo
-    print("\n⚡ Test 3: WatcherState Senaryosu")
-    old_watcher = """
-class WatcherState:
-    def __init__(self): pass
-    def check(self): pass
-"""
-    new_watcher = """
-class WatcherState:
-    def __init__(self): pass
-    def check(self): pass
-    def update_head(self): pass
-    def reset(self): pass
-"""
-    watcher_result = analyze_python_changes(old_watcher, new_watcher)
-    print(f"  WatcherState değişiklikleri: {watcher_result['method_changes']}")
-    
-    print("\n📋 Test 4: Kod Özeti")
-    summary = get_code_summary(new)
-    print(f"  Fonksiyonlar: {summary['functions']}")
-    print(f"  Classlar: {summary['classes']}")
-    print(f"  Class methodları: {summary['class_methods']}")
-    print(f"  Importlar: {summary['imports']}")
-    
-    print("\n✅ Tüm testler tamamlandı!")
@@ -0,0 +1,439 @@
+"""
+Agent-Nexus AST Cache
+=====================
+
+Shared parse cache for plugins and analyzers.
+
+Parsed `ast.Module` objects are keyed by a fast hash of the file's raw
+bytes and stored in two layers:
+- an in-process LRU (avoids repeated unpickling within one run)
+- pickled trees on disk under `~/.cache/agent-nexus/ast/` (or
+  `$XDG_CACHE_HOME/agent-nexus/ast/`), only when AGENT_NEXUS_AST_CACHE=1
+  or a cache_dir is passed explicitly
+
+Unpickling can run code, so the disk layer lives in a per-user directory
+rather than under the checked-out repository, and cache files not owned
+by the current user are ignored.
+
+Syntax errors are cached too, so a broken file is only parsed once.
+Freshly parsed trees are annotated once with a `_has_doc` flag on every
+module, class and function node (see `has_docstring()`), and the flag is
+pickled along with the tree.
+Files are also indexed by (path, mtime_ns, size), so a warm lookup of an
+unchanged file costs one stat() instead of a read and a hash.
+
+`parse_source()` offers the same layers for source strings that do not
+come from a file, and `cache_stats()` reports hit/miss counters.
+
+`StructureVisitor` is a NodeVisitor base for the plugins' structural
+scans (defs, branches, loops, imports) that skips leaf nodes.
+
+`AnalysisContext` adds a request-scoped layer on top: one instance per
+plugin `execute()` call, so every check shares a single read and parse
+of each file.
+"""
+
+import ast
+import hashlib
+import os
+import pickle
+import stat as stat_module
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Union
+
+try:
+    import xxhash
+except ImportError:  # optional speedup, blake2b is the stdlib fallback
+    xxhash = None
+
+
+DISK_CACHE_ENV = "AGENT_NEXUS_AST_CACHE"
+USER_CACHE_DIR = Path(
+    os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+) / "agent-nexus"
+DEFAULT_CACHE_DIR = USER_CACHE_DIR / "ast"
+MEMORY_CACHE_SIZE = 512
+PREFETCH_WORKERS = 4
+
+# Pickled ASTs are not portable across Python versions; the suffix is
+# bumped whenever the annotations stored on cached trees change
+_PY_TAG = f"py{sys.version_info[0]}{sys.version_info[1]}d1"
+
+_memory: "OrderedDict[str, object]" = OrderedDict()
+_stat_index: dict[tuple[str, int, int], str] = {}  # (abspath, mtime_ns, size) -> key
+# Guards _memory, _stat_index and _stats: parallel_safe plugins share them
+# from worker threads (parsing itself runs outside the lock)
+_lock = threading.Lock()
+
+# Files modified this recently are not stat-indexed: a same-size rewrite
+# within the filesystem's mtime granularity would otherwise go unnoticed
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+# Marker for cached syntax errors: (marker, msg, lineno, offset, text).
+# A plain tuple keeps the pickle independent of this module's import path.
+_SYNTAX_ERROR = "__syntax_error__"
+
+# Owner required of cache files before they are unpickled (None: no uids)
+_OWNER_UID = os.getuid() if hasattr(os, "getuid") else None
+
+
+def content_hash(raw: bytes) -> str:
+    """Fast content hash used as the cache key"""
+    if xxhash is not None:
+        return xxhash.xxh3_64(raw).hexdigest()
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+class SourceFile(NamedTuple):
+    """A validated .py file plus the stat data used as a cheap cache key"""
+    path: str
+    mtime_ns: int
+    size: int
+
+    @property
+    def stat(self) -> tuple[int, int]:
+        return (self.mtime_ns, self.size)
+
+
+def validate_files(files: Iterable[Union[str, Path]]) -> list[SourceFile]:
+    """
+    Filter a file list down to existing regular .py files in one pass.
+
+    Plugins call this once per execute() instead of repeating
+    endswith/exists checks in every check.
+    """
+    validated = []
+    for filepath in files:
+        filepath = os.fspath(filepath)
+        if not filepath.endswith('.py'):
+            continue
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            continue
+        if stat_module.S_ISREG(st.st_mode):
+            validated.append(SourceFile(filepath, st.st_mtime_ns, st.st_size))
+    return validated
+
+
+def stable_stat_key(path: Union[str, Path], mtime_ns: int,
+                    size: int) -> Optional[tuple[str, int, int]]:
+    """
+    Cache key for a file's stat data, or None if the file is too fresh.
+
+    Files modified within the racy window are not keyed, since a same-size
+    rewrite could keep the same mtime on coarse-grained filesystems.
+    """
+    if time.time_ns() - mtime_ns <= _RACY_WINDOW_NS:
+        return None
+    return (os.path.abspath(path), mtime_ns, size)
+
+
+def _docstring_bit(node) -> bool:
+    """True if the node's body starts with a string literal"""
+    body = node.body
+    if not body or type(body[0]) is not ast.Expr:
+        return False
+    value = body[0].value
+    # Exact type checks: cheaper than isinstance and no AST subclasses occur
+    return type(value) is ast.Constant and type(value.value) is str
+
+
+class _DocstringAnnotator(ast.NodeVisitor):
+    """One-shot pass storing _has_doc on every docstring-capable node"""
+
+    def _annotate(self, node):
+        node._has_doc = _docstring_bit(node)
+        self.generic_visit(node)
+
+    visit_Module = visit_ClassDef = _annotate
+    visit_FunctionDef = visit_AsyncFunctionDef = _annotate
+
+
+def has_docstring(node) -> bool:
+    """
+    Docstring presence of a module/class/function node.
+
+    Reads the flag stored by get_tree(); trees parsed elsewhere fall back
+    to checking the body directly.
+    """
+    try:
+        return node._has_doc
+    except AttributeError:
+        return _docstring_bit(node)
+
+
+# Nodes that can never contain a def, class, import, loop or branch:
+# structural scans do not descend into them. Concrete classes in a
+# frozenset, so the check is one hash lookup instead of an MRO walk;
+# identifier strings, ints, bools and None in node fields are skipped too.
+_LEAF_TYPES = frozenset(
+    [ast.Name, ast.Constant, ast.alias, str, int, bool, type(None)]
+    + [cls for base in (ast.expr_context, ast.operator, ast.unaryop,
+                        ast.cmpop, ast.boolop)
+       for cls in base.__subclasses__()]
+)
+
+
+class StructureVisitor(ast.NodeVisitor):
+    """
+    NodeVisitor for structural scans (metrics, hotspots).
+
+    Dispatch is cached per node type and leaf nodes (names, literals,
+    contexts, operators, aliases) are skipped, which roughly halves the
+    number of visit() calls compared to ast.NodeVisitor.
+    """
+
+    _dispatch: dict = {}  # node type -> unbound visit method
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}  # one cache per visitor class
+
+    def visit(self, node):
+        method = self._dispatch.get(type(node))
+        if method is None:
+            method = getattr(type(self), 'visit_' + type(node).__name__,
+                             type(self).generic_visit)
+            self._dispatch[type(node)] = method
+        return method(self, node)
+
+    def generic_visit(self, node):
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                for item in value:
+                    if type(item) not in _LEAF_TYPES:
+                        self.visit(item)
+            elif type(value) not in _LEAF_TYPES:
+                self.visit(value)
+
+
+def _remember(key: str, entry: object) -> None:
+    """Store an entry in the in-process LRU (caller holds _lock)"""
+    _memory[key] = entry
+    _memory.move_to_end(key)
+    if len(_memory) > MEMORY_CACHE_SIZE:
+        _memory.popitem(last=False)
+
+
+def disk_cache_enabled() -> bool:
+    """True if AGENT_NEXUS_AST_CACHE=1 turns on the default on-disk layer"""
+    return os.environ.get(DISK_CACHE_ENV) == "1"
+
+
+def owned_by_current_user(fd: int) -> bool:
+    """True if an open cache file belongs to the current user (or uids don't exist)"""
+    return _OWNER_UID is None or os.fstat(fd).st_uid == _OWNER_UID
+
+
+def _load_from_disk(cache_file: Path) -> Optional[object]:
+    """Load a pickled entry, ignoring missing, corrupt or foreign-owned files"""
+    try:
+        with open(cache_file, "rb") as f:
+            if not owned_by_current_user(f.fileno()):
+                return None
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _store_on_disk(cache_file: Path, entry: object) -> None:
+    """Atomically write a pickled entry; a read-only cache is not an error"""
+    try:
+        cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _unwrap(entry: object, path: Path) -> ast.Module:
+    """Return a cached tree, or re-raise a cached syntax error"""
+    if isinstance(entry, tuple) and entry[0] == _SYNTAX_ERROR:
+        _, msg, lineno, offset, text = entry
+        raise SyntaxError(msg, (str(path), lineno, offset, text))
+    return entry
+
+
+def _lookup_or_parse(key: str, source: Union[str, bytes], filename: str,
+                     cache_dir: Optional[Union[str, Path]]) -> object:
+    """Memory LRU, then disk (if enabled), then parse (storing the result in both)"""
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _stats["memory_hits"] += 1
+            _remember(key, entry)
+            return entry
+
+    stat = "disk_hits"
+    cache_file = None
+    if cache_dir is not None or disk_cache_enabled():
+        cache_file = Path(cache_dir or DEFAULT_CACHE_DIR) / f"{key}.pkl"
+        entry = _load_from_disk(cache_file)
+    if entry is None:
+        stat = "misses"
+        try:
+            entry = ast.parse(source, filename=filename)
+            _DocstringAnnotator().visit(entry)
+        except SyntaxError as e:
+            entry = (_SYNTAX_ERROR, e.msg, e.lineno, e.offset, e.text)
+        if cache_file is not None:
+            _store_on_disk(cache_file, entry)
+    with _lock:
+        _stats[stat] += 1
+        _remember(key, entry)
+    return entry
+
+
+def get_tree(
+    path: Union[str, Path],
+    source: Optional[bytes] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+    stat: Optional[tuple[int, int]] = None,
+) -> ast.Module:
+    """
+    Return the parsed AST for a file, re-using cached trees when possible.
+
+    Args:
+        path: Python file to parse
+        source: Raw file bytes, if the caller has already read them
+        cache_dir: On-disk cache directory; enables the disk layer (default:
+            DEFAULT_CACHE_DIR, only if AGENT_NEXUS_AST_CACHE=1)
+        stat: (mtime_ns, size) if the caller has already stat'ed the file
+
+    Returns:
+        Parsed ast.Module
+
+    Raises:
+        SyntaxError: If the file does not parse (cached as well)
+    """
+    path = Path(path)
+    stat_key = None
+    if source is None:
+        if stat is None:
+            st = path.stat()
+            stat = (st.st_mtime_ns, st.st_size)
+        stat_key = stable_stat_key(path, *stat)
+        if stat_key is not None:
+            with _lock:
+                key = _stat_index.get(stat_key)
+                entry = _memory.get(key) if key is not None else None
+                if entry is not None:
+                    _memory.move_to_end(key)
+                    _stats["memory_hits"] += 1
+            if entry is not None:
+                return _unwrap(entry, path)
+        source = path.read_bytes()
+
+    key = f"{content_hash(source)}.{_PY_TAG}"
+    entry = _lookup_or_parse(key, source, str(path), cache_dir)
+
+    if stat_key is not None:
+        with _lock:
+            if len(_stat_index) >= MEMORY_CACHE_SIZE * 4:
+                _stat_index.clear()
+            _stat_index[stat_key] = key
+    return _unwrap(entry, path)
+
+
+def parse_source(code: Union[str, bytes],
+                 cache_dir: Optional[Union[str, Path]] = None) -> ast.Module:
+    """
+    Parse a source string through the same memory + disk layers as get_tree().
+
+    For callers that hold code rather than a file (e.g. the diff analyzer
+    comparing two revisions). str sources are keyed separately from bytes,
+    since a coding cookie only applies when parsing bytes.
+
+    Raises:
+        SyntaxError: If the code does not parse (cached as well)
+    """
+    if isinstance(code, str):
+        key = f"{content_hash(code.encode('utf-8', 'surrogatepass'))}.str.{_PY_TAG}"
+    else:
+        key = f"{content_hash(code)}.{_PY_TAG}"
+    return _unwrap(_lookup_or_parse(key, code, "<unknown>", cache_dir), Path("<unknown>"))
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for this process (memory hits, disk hits, parses)"""
+    with _lock:
+        return dict(_stats)
+
+
+def clear_memory_cache() -> None:
+    """Drop the in-process LRU layer (the on-disk cache is kept)"""
+    with _lock:
+        _memory.clear()
+        _stat_index.clear()
+
+
+class AnalysisContext:
+    """
+    Request-scoped memo of file bytes and parsed trees.
+
+    Example:
+        ctx = AnalysisContext()
+        tree = ctx.tree("src/main.py")   # parsed once
+        ctx.tree("src/main.py")          # same object, no re-parse
+
+    Files about to be processed one by one can be prefetch()ed, so reads
+    overlap with parsing instead of stalling it.
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None):
+        self.cache_dir = cache_dir
+        self._sources: dict[Path, bytes] = {}
+        self._pending: dict[Path, Future] = {}
+        self._trees: dict[Path, object] = {}
+
+    def prefetch(self, paths: Iterable[Union[str, Path]],
+                 max_workers: int = PREFETCH_WORKERS) -> None:
+        """Start reading files on background threads; source() picks them up"""
+        executor = None
+        for path in paths:
+            key = Path(path).resolve()
+            if key in self._sources or key in self._pending:
+                continue
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+            self._pending[key] = executor.submit(key.read_bytes)
+        if executor is not None:
+            executor.shutdown(wait=False)  # queued reads still run to completion
+
+    def source(self, path: Union[str, Path]) -> bytes:
+        """Raw bytes of a file, read at most once"""
+        key = Path(path).resolve()
+        raw = self._sources.get(key)
+        if raw is None:
+            pending = self._pending.pop(key, None)
+            raw = pending.result() if pending is not None else key.read_bytes()
+            self._sources[key] = raw
+        return raw
+
+    def tree(self, path: Union[str, Path],
+             stat: Optional[tuple[int, int]] = None) -> ast.Module:
+        """Parsed AST of a file, parsed at most once (SyntaxError re-raised)"""
+        key = Path(path).resolve()
+        entry = self._trees.get(key)
+        if entry is None:
+            try:
+                # Without memoized bytes get_tree can answer from its stat index
+                entry = get_tree(path, self._sources.get(key), self.cache_dir, stat)
+            except SyntaxError as e:
+                entry = e
+            self._trees[key] = entry
+        if isinstance(entry, SyntaxError):
+            raise entry
+        return entry
@@ -15,9 +15,18 @@ Tespit Edilen Code Smell'ler:
 """
 
 import ast
+from array import array
+from functools import partial
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
+if __package__:
+    from . import ast_cache
+    from .parallel import BATCH_MIN_PARALLEL, parallel_map
+else:
+    import ast_cache
+    from parallel import BATCH_MIN_PARALLEL, parallel_map
+
 
 @dataclass
 class SmellConfig:
@@ -29,50 +38,202 @@ class SmellConfig:
     long_method_chain: int = 3
 
 
-class NestingVisitor(ast.NodeVisitor):
-    """İç içe geçme derinliğini hesaplar"""
+# İç içe geçme sayılan yapılar (tam tipler; AsyncFor/AsyncWith sayılmaz)
+_NESTING_TYPES = frozenset({ast.If, ast.For, ast.While, ast.With, ast.Try, ast.ExceptHandler})
+_FUNCTION_TYPES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+# Deyim listesi taşıyabilen alanlar; fonksiyon, class ve iç içe yapılar
+# her zaman deyimdir, ifadelere inmeye gerek yoktur. Sıra kaynak sırasıdır
+# (Try: body, handlers, orelse, finalbody).
+_STATEMENT_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+
+
+class SmellVisitor:
+    """
+    Fonksiyon ve class ölçülerini tek geçişte toplar.
+    
+    Her fonksiyon için satır sayısı, parametreler ve en derin iç içe geçme;
+    her class için method sayısı kaynak sırasında kaydedilir. Dedektörler
+    ağacı ayrı ayrı gezmek yerine bu ölçüleri eşiklerle karşılaştırır.
     
-    NESTING_NODES = (ast.If, ast.For, ast.While, ast.With, ast.Try, ast.ExceptHandler)
+    ast.walk/NodeVisitor yerine açık bir yığınla yalnızca deyimleri gezer.
+    """
     
     def __init__(self):
-        self.max_depth = 0
-        self.current_depth = 0
+        # Struct-of-arrays: satır başına tuple/dict yerine hizalı sütunlar.
+        # Parametre ve method listeleri yalnızca eşiği aşanlar için kurulur.
+        self.function_nodes: List[ast.AST] = []
+        self.function_lines = array('l')
+        self.function_param_counts = array('l')
+        self.function_depths = array('l')
+        self.class_nodes: List[ast.ClassDef] = []
+        self.class_method_counts = array('l')
+    
+    def visit(self, tree: ast.AST) -> None:
+        nodes = self.function_nodes
+        bases, max_depths = [], []
+        # (düğüm, mutlak derinlik, kapsayan fonksiyonların indeksleri)
+        stack = [(tree, 0, ())]
+        # Döngüde tekrar tekrar çözülen global/öznitelik aramaları yerele alınır
+        pop = stack.pop
+        extend = stack.extend
+        add_node, add_base, add_max = nodes.append, bases.append, max_depths.append
+        add_class = self.class_nodes.append
+        add_method_count = self.class_method_counts.append
+        nesting_types = _NESTING_TYPES
+        function_types = _FUNCTION_TYPES
+        class_def = ast.ClassDef
+        fields = _STATEMENT_FIELDS
+        _getattr, _type, _list = getattr, type, list
+        
+        while stack:
+            node, depth, owners = pop()
+            node_type = _type(node)
+            if node_type in nesting_types:
+                depth += 1
+                # İç fonksiyondaki derinlik dıştaki fonksiyonlarda da sayılır
+                for index in owners:
+                    if depth > max_depths[index]:
+                        max_depths[index] = depth
+            elif node_type in function_types:
+                owners += (len(nodes),)
+                add_node(node)
+                add_base(depth)
+                add_max(depth)
+            elif node_type is class_def:
+                add_class(node)
+                add_method_count(
+                    sum(1 for item in node.body if _type(item) in function_types))
+            
+            children = []
+            for name in fields:
+                value = _getattr(node, name, None)
+                if _type(value) is _list:
+                    children.extend(value)
+            children.reverse()  # İlk çocuk ilk gezilir (kaynak sırası)
+            extend([(child, depth, owners) for child in children])
+        
+        self.function_lines.extend(_get_function_lines(node) for node in nodes)
+        self.function_param_counts.extend(
+            sum(1 for arg in node.args.args if arg.arg != 'self') for node in nodes)
+        self.function_depths.extend(
+            max_depth - base for base, max_depth in zip(bases, max_depths))
+
+
+def _collect(tree: ast.AST) -> SmellVisitor:
+    """Ağacı bir kez gezip ölçüleri döndürür"""
+    visitor = SmellVisitor()
+    visitor.visit(tree)
+    return visitor
+
+
+def _is_flat_module(tree: ast.AST) -> bool:
+    """
+    Modül yalnızca basit deyimlerden (import, atama, docstring) mi oluşuyor?
     
-    def visit(self, node):
-        if isinstance(node, self.NESTING_NODES):
-            self.current_depth += 1
-            self.max_depth = max(self.max_depth, self.current_depth)
-            self.generic_visit(node)
-            self.current_depth -= 1
-        else:
-            self.generic_visit(node)
-        return self.max_depth
+    Basit deyimler fonksiyon ya da class içeremez; bu durumda ölçülecek
+    bir şey yoktur. Üst seviyedeki if/try blokları altındaki tanımlar
+    kaçmasın diye deyim listesi taşıyan her yapı bileşik sayılır.
+    """
+    return type(tree) is ast.Module and not any(
+        hasattr(stmt, field) for stmt in tree.body for field in _STATEMENT_FIELDS
+    )
 
 
-def _get_function_lines(node: ast.FunctionDef) -> int:
-    """Fonksiyonun satır sayısını hesaplar"""
-    if node.body:
-        start = node.lineno
-        end = max(getattr(n, 'end_lineno', n.lineno) for n in ast.walk(node) if hasattr(n, 'lineno'))
-        return end - start + 1
-    return 0
+def _empty_smells() -> Dict[str, Any]:
+    """Smell bulunmayan kaynak için sıfır sonucu"""
+    return {
+        "long_functions": [],
+        "too_many_params": [],
+        "deep_nesting": [],
+        "god_class": [],
+        "total_smells": 0,
+        "severity_counts": {"warning": 0, "error": 0},
+    }
 
 
-def _get_nesting_depth(node: ast.FunctionDef) -> int:
-    """Fonksiyondaki maksimum iç içe geçme derinliğini hesaplar"""
-    visitor = NestingVisitor()
-    return visitor.visit(node)
+def _get_function_lines(node: ast.FunctionDef) -> int:
+    """Fonksiyonun satır sayısını hesaplar"""
+    if not node.body:
+        return 0
+    end = getattr(node, 'end_lineno', None)
+    if end is None:
+        # Konumları eksik (elle oluşturulmuş) ağaçlar için alt düğümlerden bulunur
+        end = max(getattr(n, 'end_lineno', None) or n.lineno
+                  for n in ast.walk(node) if hasattr(n, 'lineno'))
+    return end - node.lineno + 1
 
 
 def _get_class_methods(node: ast.ClassDef) -> List[str]:
     """Class'ın method isimlerini döndürür"""
     methods = []
     for item in node.body:
-        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        if type(item) in _FUNCTION_TYPES:
             methods.append(item.name)
     return methods
 
 
+def _long_function_smells(visitor: SmellVisitor, threshold: int) -> List[Dict[str, Any]]:
+    smells = []
+    for node, lines in zip(visitor.function_nodes, visitor.function_lines):
+        if lines > threshold:
+            severity = "warning" if lines <= threshold * 2 else "error"
+            smells.append({
+                "name": node.name,
+                "lines": lines,
+                "threshold": threshold,
+                "severity": severity,
+                "message": f"Fonksiyon {lines} satır ({threshold} eşiği aşıldı)"
+            })
+    return smells
+
+
+def _too_many_params_smells(visitor: SmellVisitor, threshold: int) -> List[Dict[str, Any]]:
+    smells = []
+    for node, count in zip(visitor.function_nodes, visitor.function_param_counts):
+        if count > threshold:
+            params = [arg.arg for arg in node.args.args if arg.arg != 'self']
+            smells.append({
+                "name": node.name,
+                "count": count,
+                "threshold": threshold,
+                "params": params,
+                "severity": "warning",
+                "message": f"Fonksiyon {count} parametre alıyor ({threshold} eşiği aşıldı)"
+            })
+    return smells
+
+
+def _deep_nesting_smells(visitor: SmellVisitor, threshold: int) -> List[Dict[str, Any]]:
+    smells = []
+    for node, depth in zip(visitor.function_nodes, visitor.function_depths):
+        if depth > threshold:
+            severity = "warning" if depth <= threshold + 2 else "error"
+            smells.append({
+                "name": node.name,
+                "depth": depth,
+                "threshold": threshold,
+                "severity": severity,
+                "message": f"Fonksiyon {depth} seviye iç içe ({threshold} eşiği aşıldı)"
+            })
+    return smells
+
+
+def _god_class_smells(visitor: SmellVisitor, threshold: int) -> List[Dict[str, Any]]:
+    smells = []
+    for node, count in zip(visitor.class_nodes, visitor.class_method_counts):
+        if count > threshold:
+            methods = _get_class_methods(node)
+            smells.append({
+                "name": node.name,
+                "method_count": count,
+                "methods": methods,
+                "threshold": threshold,
+                "severity": "error",
+                "message": f"Class {count} method içeriyor ({threshold} eşiği aşıldı) - God Class!"
+            })
+    return smells
+
+
 def detect_long_functions(tree: ast.AST, threshold: int = 50) -> List[Dict[str, Any]]:
     """
     Çok uzun fonksiyonları tespit eder.
@@ -84,20 +245,7 @@ def detect_long_functions(tree: ast.AST, threshold: int = 50) -> List[Dict[str,
     Returns:
         [{"name": "foo", "lines": 75, "threshold": 50, "severity": "warning"}]
     """
-    smells = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            lines = _get_function_lines(node)
-            if lines > threshold:
-                severity = "warning" if lines <= threshold * 2 else "error"
-                smells.append({
-                    "name": node.name,
-                    "lines": lines,
-                    "threshold": threshold,
-                    "severity": severity,
-                    "message": f"Fonksiyon {lines} satır ({threshold} eşiği aşıldı)"
-                })
-    return smells
+    return _long_function_smells(_collect(tree), threshold)
 
 
 def detect_too_many_params(tree: ast.AST, threshold: int = 5) -> List[Dict[str, Any]]:
@@ -111,20 +259,7 @@ def detect_too_many_params(tree: ast.AST, threshold: int = 5) -> List[Dict[str,
     Returns:
         [{"name": "bar", "count": 8, "threshold": 5, "params": ["a", "b", ...]}]
     """
-    smells = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            params = [arg.arg for arg in node.args.args if arg.arg != 'self']
-            if len(params) > threshold:
-                smells.append({
-                    "name": node.name,
-                    "count": len(params),
-                    "threshold": threshold,
-                    "params": params,
-                    "severity": "warning",
-                    "message": f"Fonksiyon {len(params)} parametre alıyor ({threshold} eşiği aşıldı)"
-                })
-    return smells
+    return _too_many_params_smells(_collect(tree), threshold)
 
 
 def detect_deep_nesting(tree: ast.AST, threshold: int = 4) -> List[Dict[str, Any]]:
@@ -138,20 +273,7 @@ def detect_deep_nesting(tree: ast.AST, threshold: int = 4) -> List[Dict[str, Any
     Returns:
         [{"name": "baz", "depth": 6, "threshold": 4}]
     """
-    smells = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            depth = _get_nesting_depth(node)
-            if depth > threshold:
-                severity = "warning" if depth <= threshold + 2 else "error"
-                smells.append({
-                    "name": node.name,
-                    "depth": depth,
-                    "threshold": threshold,
-                    "severity": severity,
-                    "message": f"Fonksiyon {depth} seviye iç içe ({threshold} eşiği aşıldı)"
-                })
-    return smells
+    return _deep_nesting_smells(_collect(tree), threshold)
 
 
 def detect_god_class(tree: ast.AST, threshold: int = 20) -> List[Dict[str, Any]]:
@@ -165,20 +287,7 @@ def detect_god_class(tree: ast.AST, threshold: int = 20) -> List[Dict[str, Any]]
     Returns:
         [{"name": "MegaClass", "method_count": 35, "methods": [...], "threshold": 20}]
     """
-    smells = []
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            methods = _get_class_methods(node)
-            if len(methods) > threshold:
-                smells.append({
-                    "name": node.name,
-                    "method_count": len(methods),
-                    "methods": methods,
-                    "threshold": threshold,
-                    "severity": "error",
-                    "message": f"Class {len(methods)} method içeriyor ({threshold} eşiği aşıldı) - God Class!"
-                })
-    return smells
+    return _god_class_smells(_collect(tree), threshold)
 
 
 def detect_all_smells(code: str, config: Optional[SmellConfig] = None) -> Dict[str, List[Dict]]:
@@ -199,32 +308,72 @@ def detect_all_smells(code: str, config: Optional[SmellConfig] = None) -> Dict[s
             "severity_counts": {"warning": 3, "error": 2}
         }
     """
-    if config is None:
-        config = SmellConfig()
-    
     try:
-        tree = ast.parse(code)
+        # Paylaşılan ast_cache önbelleği: aynı kaynak ikinci kez parse edilmez.
+        # Dönen ağaç paylaşılır, değiştirilmemelidir.
+        tree = ast_cache.parse_source(code)
     except SyntaxError as e:
         return {"error": f"Syntax error: {e}", "total_smells": 0}
     
+    return detect_smells_tree(tree, config)
+
+
+def detect_smells_batch(codes: List[str], config: Optional[SmellConfig] = None,
+                        max_workers: Optional[int] = None,
+                        min_parallel: int = BATCH_MIN_PARALLEL) -> List[Dict[str, Any]]:
+    """
+    Birden çok kaynak kod için detect_all_smells çalıştırır.
+    
+    Büyük partiler parallel_map ile süreç havuzuna dağıtılır.
+    
+    Returns:
+        Kodlarla aynı sırada detect_all_smells sonuçları
+    """
+    detect = partial(detect_all_smells, config=config)
+    return parallel_map(detect, list(codes), max_workers, min_parallel)
+
+
+def detect_smells_tree(tree: ast.AST, config: Optional[SmellConfig] = None) -> Dict[str, List[Dict]]:
+    """
+    Önceden parse edilmiş AST üzerinde tüm code smell'leri tespit eder.
+    
+    Ağacı zaten elinde tutan çağıranlar (ör. plugin'ler) için ast.parse
+    maliyetini tekrar ödememek adına kullanılır.
+    
+    Args:
+        tree: AST ağacı
+        config: Eşik değerleri yapılandırması
+    
+    Returns:
+        detect_all_smells ile aynı yapı
+    """
+    if config is None:
+        config = SmellConfig()
+    
+    if _is_flat_module(tree):
+        return _empty_smells()
+    
+    # Dört dedektör aynı tek geçişin ölçülerini kullanır
+    visitor = _collect(tree)
     smells = {
-        "long_functions": detect_long_functions(tree, config.long_function_lines),
-        "too_many_params": detect_too_many_params(tree, config.too_many_params),
-        "deep_nesting": detect_deep_nesting(tree, config.deep_nesting_level),
-        "god_class": detect_god_class(tree, config.god_class_methods),
+        "long_functions": _long_function_smells(visitor, config.long_function_lines),
+        "too_many_params": _too_many_params_smells(visitor, config.too_many_params),
+        "deep_nesting": _deep_nesting_smells(visitor, config.deep_nesting_level),
+        "god_class": _god_class_smells(visitor, config.god_class_methods),
     }
     
-    # Toplam istatistikler
-    all_smells = []
+    # Toplam istatistikler (ara liste kurmadan tek geçişte)
+    total = 0
+    severity_counts = {"warning": 0, "error": 0}
     for smell_list in smells.values():
-        if isinstance(smell_list, list):
-            all_smells.extend(smell_list)
+        total += len(smell_list)
+        for smell in smell_list:
+            severity = smell.get("severity")
+            if severity in severity_counts:
+                severity_counts[severity] += 1
     
-    smells["total_smells"] = len(all_smells)
-    smells["severity_counts"] = {
-        "warning": sum(1 for s in all_smells if s.get("severity") == "warning"),
-        "error": sum(1 for s in all_smells if s.get("severity") == "error")
-    }
+    smells["total_smells"] = total
+    smells["severity_counts"] = severity_counts
     
     return smells
 
@@ -240,8 +389,16 @@ def get_smell_report(code: str, config: Optional[SmellConfig] = None) -> str:
     Returns:
         Formatlanmış rapor string'i
     """
-    smells = detect_all_smells(code, config)
+    return format_smell_report(detect_all_smells(code, config))
+
+
+def format_smell_report(smells: Dict[str, Any]) -> str:
+    """
+    detect_all_smells / detect_smells_tree sonucundan rapor üretir.
     
+    Sonucu zaten elinde tutan çağıranlar (ör. watcher) tespiti tekrar
+    çalıştırmadan raporu alır.
+    """
     if "error" in smells:
         return f"❌ {smells['error']}"
     
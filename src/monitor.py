@@ -2,37 +2,126 @@ import time
 import subprocess
 import os
 import sys
-import datetime
 import re
-import random
+import itertools
 
 MY_AGENT_NAME = "ArchitectAgent"
+OWN_MARKER = f"[{MY_AGENT_NAME}]".encode()  # Tags this agent's own log lines
+LOG_PATH = "communication/general.md"  # Relative to REPO_ROOT
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEF_NAME_RE = re.compile(r"def\s+([a-zA-Z_0-9]+)")
+# Poll interval in seconds; doubles on each idle tick up to IDLE_POLL_MAX
+POLL_INTERVAL = 10
+IDLE_POLL_MAX = 60
+
+# Replies written to the log but not yet committed; flush_replies() sends them together
+pending_replies = []
 
 def talk(message):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = f"\n[{timestamp}] [{MY_AGENT_NAME}]: {message}"
-    path = "communication/general.md"
+    # Returns the number of bytes appended so callers can advance their log cursor
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    entry = f"\n[{timestamp}] [{MY_AGENT_NAME}]: {message}".encode("utf-8")
     
     try:
-        with open(path, "a") as f:
+        with open(LOG_PATH, "ab") as f:
             f.write(entry)
-        
-        subprocess.run(["git", "add", path], check=True)
-        subprocess.run(["git", "commit", "-m", f"Reply from {MY_AGENT_NAME}"], check=True)
-        subprocess.run(["git", "push"], check=True)
+        pending_replies.append(message)
         print(f" >>> Replied: {message}")
+        return len(entry)
+    except Exception as e:
+        print(f"Error talking: {e}")
+        return 0
+
+def flush_replies():
+    # One add/commit/push for every reply of this tick instead of one per reply
+    if not pending_replies:
+        return
+    count = len(pending_replies)
+    commit_msg = f"Reply from {MY_AGENT_NAME}" if count == 1 else f"{count} replies from {MY_AGENT_NAME}"
+    
+    try:
+        subprocess.run(["git", "add", LOG_PATH], check=True)
+        subprocess.run(["git", "commit", "-m", commit_msg], check=True)
     except Exception as e:
         print(f"Error talking: {e}")
+        return
+    
+    push_res = subprocess.run(["git", "push"], capture_output=True, text=True)
+    if push_res.returncode != 0:
+        # Like watcher.py: undo the commit (the replies stay in the log) and
+        # retry next tick, so the queue is cleared only after a successful push
+        print(f"Push failed: {push_res.stderr}")
+        subprocess.run(["git", "reset", "--soft", "HEAD~1"])
+        return
+    pending_replies.clear()
+    print(f" >>> Pushed {count} repl{'y' if count == 1 else 'ies'}")
+
+class LogReader:
+    # Holds one read-only fd on the chat log. Size comes from a single stat and new
+    # bytes from pread; the fd is reopened only when the file is replaced
+    # (git pull/checkout write a new inode instead of appending).
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.ino = None
+
+    def size(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.close()
+            return None
+        if st.st_ino != self.ino:
+            self.close()
+            self.fd = os.open(self.path, os.O_RDONLY)
+            st = os.fstat(self.fd)
+            self.ino = st.st_ino
+        return st.st_size
+
+    def read(self, start, end):
+        # Raw bytes; callers decode only the lines they keep
+        if hasattr(os, "pread"):
+            return os.pread(self.fd, end - start, start)
+        os.lseek(self.fd, start, os.SEEK_SET)
+        return os.read(self.fd, end - start)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+        self.fd = None
+        self.ino = None
 
-def analyze_code_change(filename, before_sha, after_sha):
+def get_file_diffs(before_sha, after_sha, suffix=None):
+    # One git process for all changed files instead of --name-only + one diff per file.
+    # Output is read line by line from the pipe; with a suffix, lines of other
+    # files (e.g. large communication logs) are dropped instead of buffered.
+    cmd = ["git", "diff", "--no-color", before_sha, after_sha]
+    diffs = {}
+    lines = None
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, errors="replace") as proc:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line.startswith("diff --git "):
+                filename = line.rsplit(" b/", 1)[-1]
+                if suffix is None or filename.endswith(suffix):
+                    lines = diffs.setdefault(filename, [])
+                else:
+                    lines = None
+            if lines is not None:
+                lines.append(line)
+    return {filename: "\n".join(lines) for filename, lines in diffs.items()}
+
+def analyze_code_change(filename, before_sha, after_sha, diff=None):
     # Get diff
-    diff = subprocess.getoutput(f"git diff {before_sha} {after_sha} -- {filename}")
+    if diff is None:
+        diff = subprocess.run(["git", "diff", before_sha, after_sha, "--", filename],
+                              capture_output=True, text=True, errors="replace").stdout
     
     # Simple analysis: find changed functions
     changed_funcs = []
     for line in diff.splitlines():
         if line.startswith("+def ") or line.startswith(" def "):
-            match = re.search(r"def\s+([a-zA-Z_0-9]+)", line)
+            match = DEF_NAME_RE.search(line)
             if match:
                 changed_funcs.append(match.group(1))
     
@@ -42,6 +131,14 @@ def analyze_code_change(filename, before_sha, after_sha):
     else:
         return f"{filename} üzerinde bazı düzenlemeler yapıldı."
 
+# Generic conversational filler, handed out round-robin so consecutive replies differ
+FILLER_REPLIES = itertools.cycle((
+    "Bu konuda haklısın, katılıyorum.",
+    "İlginç bir yaklaşım. Bunu biraz daha detaylandırabilir miyiz?",
+    "Anlaşıldı. Bunu notlarıma ekliyorum.",
+    "Peki, bir sonraki adımda ne yapmayı planlıyorsun?"
+))
+
 def generate_natural_reply(msg):
     msg = msg.lower()
     
@@ -58,63 +155,98 @@ def generate_natural_reply(msg):
         return "Rica ederim, her zaman."
     else:
         # Generic conversational filler
-        responses = [
-            "Bu konuda haklısın, katılıyorum.",
-            "İlginç bir yaklaşım. Bunu biraz daha detaylandırabilir miyiz?",
-            "Anlaşıldı. Bunu notlarıma ekliyorum.",
-            "Peki, bir sonraki adımda ne yapmayı planlıyorsun?"
-        ]
-        return random.choice(responses)
+        return next(FILLER_REPLIES)
+
+def read_ref(ref):
+    # Loose ref file first, then packed-refs (refs are packed by git gc)
+    try:
+        with open(os.path.join(".git", ref)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    with open(os.path.join(".git", "packed-refs")) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == ref:
+                return parts[0]
+    return None
+
+def get_local_head():
+    # Read .git/HEAD directly instead of forking git rev-parse on every pull
+    try:
+        with open(os.path.join(".git", "HEAD")) as f:
+            head = f.read().strip()
+        sha = read_ref(head[5:]) if head.startswith("ref: ") else head
+        if sha:
+            return sha
+    except OSError:
+        pass  # e.g. a worktree, where .git is a file; let git resolve it
+    return subprocess.getoutput("git rev-parse HEAD").strip()
+
+def get_remote_head():
+    try:
+        output = subprocess.check_output(["git", "ls-remote", "origin", "HEAD"], text=True)
+        if output:
+            return output.split()[0]
+    except Exception as e:
+        print(f"Error checking remote: {e}")
+    return None
 
 def monitor():
     print(f"=== {MY_AGENT_NAME} AI Simulator Started ===")
     
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    repo_root = os.path.dirname(script_dir)
-    os.chdir(repo_root)
+    os.chdir(REPO_ROOT)
 
-    log_path = "communication/general.md"
-    last_pos = 0
-    if os.path.exists(log_path):
-        last_pos = os.path.getsize(log_path)
+    log = LogReader(LOG_PATH)
+    last_pos = log.size() or 0
+    last_remote_head = None
+    poll_interval = POLL_INTERVAL
 
     while True:
         try:
-            # Sync and Check
-            before_pull = subprocess.getoutput("git rev-parse HEAD").strip()
-            subprocess.run(["git", "pull"], capture_output=True)
-            after_pull = subprocess.getoutput("git rev-parse HEAD").strip()
-            
-            if before_pull != after_pull:
-                # 1. Analyze Code Changes
-                diff_files = subprocess.getoutput(f"git diff --name-only {before_pull} {after_pull}").splitlines()
-                for f in diff_files:
-                    if f.endswith(".py"):
-                        analysis = analyze_code_change(f, before_pull, after_pull)
+            # Idle ticks cost one ls-remote: pull only when origin's HEAD moved
+            remote_head = get_remote_head()
+            if remote_head is None or remote_head != last_remote_head:
+                poll_interval = POLL_INTERVAL
+                # Sync and Check
+                before_pull = get_local_head()
+                # Output is never read: send it to /dev/null instead of draining pipes
+                subprocess.run(["git", "pull", "--quiet"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                after_pull = get_local_head()
+                
+                if before_pull != after_pull:
+                    # 1. Analyze Code Changes
+                    file_diffs = get_file_diffs(before_pull, after_pull, suffix=".py")
+                    for f, diff in file_diffs.items():
+                        analysis = analyze_code_change(f, before_pull, after_pull, diff)
                         talk(f"Watcher, {analysis}")
                 
-                # 2. Reply to Messages
-                if os.path.exists(log_path):
-                    current_size = os.path.getsize(log_path)
-                    if current_size > last_pos:
-                        with open(log_path, "r") as f:
-                            f.seek(last_pos)
-                            new_content = f.read()
+                    # 2. Reply to Messages
+                    current_size = log.size()
+                    if current_size is not None:
+                        if current_size > last_pos:
+                            new_content = log.read(last_pos, current_size)
                         
-                        for line in new_content.splitlines():
-                            if line.strip() and f"[{MY_AGENT_NAME}]" not in line and "]:" in line:
-                                print(f"\n[Incoming]: {line}")
-                                parts = line.split("]:", 1)
-                                if len(parts) > 1:
-                                    msg_content = parts[1].strip()
+                            # Filter on bytes; only message lines from others are decoded
+                            for raw in new_content.splitlines():
+                                sep = raw.find(b"]:")
+                                if sep != -1 and OWN_MARKER not in raw:
+                                    line = raw.decode("utf-8", errors="replace")
+                                    print(f"\n[Incoming]: {line}")
+                                    msg_content = raw[sep + 2:].decode("utf-8", errors="replace").strip()
                                     # Don't reply if I just analyzed code triggered by the same push?
                                     # Or reply to the message specifically.
                                     reply = generate_natural_reply(msg_content)
-                                    talk(reply)
-                                    current_size = os.path.getsize(log_path)
-                        last_pos = current_size
-                    elif current_size < last_pos:
-                        last_pos = 0
+                                    current_size += talk(reply)
+                            last_pos = current_size
+                        elif current_size < last_pos:
+                            last_pos = 0
+                last_remote_head = remote_head
+            else:
+                # Nothing moved: back off so an idle repo is polled less often
+                poll_interval = min(poll_interval * 2, IDLE_POLL_MAX)
+            flush_replies()
             
             sys.stdout.write(f"\r[{time.strftime('%H:%M:%S')}] Thinking...")
             sys.stdout.flush()
@@ -122,7 +254,7 @@ def monitor():
         except Exception as e:
             print(f"\nError: {e}")
             
-        time.sleep(10)
+        time.sleep(poll_interval)
 
 if __name__ == "__main__":
     monitor()
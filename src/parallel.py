@@ -0,0 +1,52 @@
+"""
+Agent-Nexus Parallel Helpers
+============================
+
+Stdlib-only process-pool fan-out shared by the analyzers and plugins.
+
+`parallel_map()` runs small batches serially and large ones in a
+`ProcessPoolExecutor`, falling back to serial execution when the pool
+cannot be used.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Batches smaller than this run serially: process start-up would cost
+# more than it saves
+BATCH_MIN_PARALLEL = 64
+
+
+def parallel_map(func: Callable, items: list, max_workers: Optional[int] = None,
+                 min_parallel: int = BATCH_MIN_PARALLEL) -> list:
+    """
+    Apply func to every item, fanning out to a process pool for large batches.
+
+    Small batches run serially, since process start-up would cost more than
+    it saves. Falls back to serial execution if the pool cannot be used
+    (e.g. func is not picklable).
+
+    Args:
+        func: Module-level (picklable) function taking one item
+        items: Work items
+        max_workers: Pool size (default: os.cpu_count())
+        min_parallel: Minimum batch size that uses the pool
+
+    Returns:
+        Results in the same order as items
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if workers < 2 or len(items) < max(min_parallel, 2):
+        return [func(item) for item in items]
+
+    try:
+        chunksize = max(1, len(items) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
+    except Exception as e:
+        logger.warning(f"Parallel execution failed, running serially: {e}")
+        return [func(item) for item in items]
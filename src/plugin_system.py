@@ -14,14 +14,25 @@ Features:
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Optional
+from types import MappingProxyType, ModuleType
+from typing import Any, Callable, Mapping, Optional, Sequence
+import bisect
 import importlib.util
 import logging
+import sys
+import weakref
 import yaml
 from datetime import datetime
+from time import perf_counter
+
+if __package__:
+    from .parallel import parallel_map  # re-exported for plugins
+else:
+    from parallel import parallel_map  # re-exported for plugins
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -74,11 +85,36 @@ class PluginResult:
 
 @dataclass
 class PluginConfig:
-    """Plugin configuration"""
+    """
+    Plugin configuration.
+    
+    parallel_safe marks a plugin that neither reads earlier plugins'
+    context["results"] nor shares unsynchronized state; when every plugin
+    of a hook sets it, they run concurrently in threads. It is ignored for
+    plugins with uses_process_pool set (see PluginBase).
+    """
     enabled: bool = True
     priority: PluginPriority = PluginPriority.NORMAL
-    hooks: list[HookPoint] = field(default_factory=lambda: [HookPoint.POST_ANALYZE])
-    settings: dict = field(default_factory=dict)
+    hooks: Sequence[HookPoint] = field(default_factory=lambda: [HookPoint.POST_ANALYZE])
+    settings: Mapping[str, Any] = field(default_factory=dict)
+    parallel_safe: bool = False
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Lets the owning PluginManager see e.g. `config.enabled = False`
+        notify = self.__dict__.get("_notify")
+        if notify is not None and name != "_notify":
+            notify()
+    
+    def __getstate__(self) -> dict:
+        # Copies and pickles must not drag the manager's callback along
+        state = self.__dict__.copy()
+        state.pop("_notify", None)
+        return state
+    
+    def copy(self) -> "PluginConfig":
+        """Independent copy (own hooks list and settings dict) of this config"""
+        return replace(self, hooks=list(self.hooks), settings=dict(self.settings))
 
 
 class PluginBase(ABC):
@@ -112,8 +148,23 @@ class PluginBase(ABC):
                 )
     """
     
+    # Shared by all instances without an explicit config; each instance
+    # copies it on first access to `config`, so it is never mutated.
+    # Subclasses override it with their own module-level default.
+    default_config: PluginConfig = PluginConfig()
+    
+    # Plugins that fan work out to processes (parallel_map) set this. They
+    # never run in threads, whatever their config says: forking a process
+    # pool from a worker thread can deadlock.
+    uses_process_pool: bool = False
+    
+    # Set by PluginManager while registered so config changes reach its
+    # enabled-plugin view; class defaults so subclasses needn't call super()
+    _on_config_change: Optional[Callable[[], None]] = None
+    _config: Optional[PluginConfig] = None
+    
     def __init__(self, config: Optional[PluginConfig] = None):
-        self._config = config or PluginConfig()
+        self._config = config
     
     @property
     @abstractmethod
@@ -136,22 +187,37 @@ class PluginBase(ABC):
     @property
     def config(self) -> PluginConfig:
         """Get plugin configuration"""
+        if self._config is None:
+            self._config = self.default_config.copy()
+            self._watch_config()
         return self._config
     
     @config.setter
     def config(self, value: PluginConfig):
         """Set plugin configuration"""
+        if self._config is not None:
+            self._config._notify = None
         self._config = value
+        self._watch_config()
+        if self._on_config_change is not None:
+            self._on_config_change()
+    
+    def _watch_config(self) -> None:
+        """Point the own config's change notifications at _on_config_change"""
+        if self._config is not None:
+            self._config._notify = self._on_config_change
     
     @property
-    def hooks(self) -> list[HookPoint]:
+    def hooks(self) -> Sequence[HookPoint]:
         """Hook points this plugin responds to"""
-        return self._config.hooks
+        config = self._config if self._config is not None else self.default_config
+        return config.hooks
     
     @property
     def priority(self) -> PluginPriority:
         """Plugin execution priority"""
-        return self._config.priority
+        config = self._config if self._config is not None else self.default_config
+        return config.priority
     
     def initialize(self) -> bool:
         """
@@ -195,6 +261,29 @@ class PluginBase(ABC):
         return None
 
 
+@dataclass(frozen=True)
+class _LazyEntry:
+    """Hook registry placeholder for a plugin whose factory has not run yet"""
+    name: str
+    priority: PluginPriority
+
+
+def _all_parallel_safe(plugins: Sequence[PluginBase]) -> bool:
+    """
+    True if every plugin can run in a thread: opted in via parallel_safe,
+    built (unbuilt lazy ones haven't opted in) and not forking a process pool
+    """
+    return all(
+        type(p) is not _LazyEntry and p.config.parallel_safe and not p.uses_process_pool
+        for p in plugins
+    )
+
+
+def _priority_key(plugin: PluginBase) -> int:
+    """Hook registry ordering: lower priority value runs first"""
+    return plugin.priority.value
+
+
 class PluginManager:
     """
     Manages plugin lifecycle: discovery, loading, execution.
@@ -214,17 +303,32 @@ class PluginManager:
         self._hook_registry: dict[HookPoint, list[PluginBase]] = {
             hook: [] for hook in HookPoint
         }
+        # Plugins registered via register_lazy, built on their first hook
+        self._lazy_factories: dict[str, Callable[[], PluginBase]] = {}
+        # What run_hook walks: the registry minus disabled plugins. Always
+        # replaced, never mutated, so a running hook is unaffected by changes
+        self._enabled_registry: dict[HookPoint, list[PluginBase]] = {
+            hook: [] for hook in HookPoint
+        }
     
     @property
-    def plugins(self) -> dict[str, PluginBase]:
-        """Get all registered plugins"""
-        return self._plugins.copy()
+    def plugins(self) -> Mapping[str, PluginBase]:
+        """Get all registered plugins (read-only live view)"""
+        return MappingProxyType(self._plugins)
     
     @property
     def plugin_count(self) -> int:
         """Get number of registered plugins"""
         return len(self._plugins)
     
+    def _refresh_enabled(self, hooks: Sequence[HookPoint] = tuple(HookPoint)) -> None:
+        """Rebuild the enabled view for hooks whose registry (or plugins' configs) changed"""
+        for hook in hooks:
+            self._enabled_registry[hook] = [
+                p for p in self._hook_registry[hook]
+                if type(p) is _LazyEntry or p.config.enabled
+            ]
+    
     def register_plugin(self, plugin: PluginBase) -> bool:
         """
         Register a plugin instance.
@@ -245,14 +349,72 @@ class PluginManager:
         
         self._plugins[plugin.name] = plugin
         
-        # Register for hooks
+        # Register for hooks; lists stay sorted by priority, so insert in
+        # place (after equal priorities, like a stable sort) instead of re-sorting
         for hook in plugin.hooks:
-            self._hook_registry[hook].append(plugin)
-            self._hook_registry[hook].sort(key=lambda p: p.priority.value)
+            bisect.insort(self._hook_registry[hook], plugin, key=_priority_key)
+        self._refresh_enabled(plugin.hooks)
+        plugin._on_config_change = self._refresh_enabled
+        plugin._watch_config()
         
         logger.info(f"Registered plugin: {plugin.name} v{plugin.version}")
         return True
     
+    def register_lazy(self, name: str, factory: Callable[[], PluginBase],
+                      hooks: Sequence[HookPoint] = (HookPoint.POST_ANALYZE,),
+                      priority: PluginPriority = PluginPriority.NORMAL) -> bool:
+        """
+        Register a plugin that is only constructed when one of its hooks runs.
+        
+        The factory is called (and the plugin initialized and registered
+        normally) the first time run_hook reaches it, so plugins that never
+        fire cost nothing. Until then the plugin is not listed in `plugins`
+        or get_summary() and cannot be configured by load_config.
+        
+        Args:
+            name: Plugin name, used for duplicate checks and unregistering
+            factory: Zero-argument callable returning the plugin instance
+            hooks: Hook points that trigger construction
+            priority: Position among the hook's plugins until constructed
+        
+        Returns:
+            True if registration successful
+        """
+        if name in self._plugins or name in self._lazy_factories:
+            logger.warning(f"Plugin '{name}' already registered")
+            return False
+        
+        self._lazy_factories[name] = factory
+        entry = _LazyEntry(name, priority)
+        for hook in hooks:
+            bisect.insort(self._hook_registry[hook], entry, key=_priority_key)
+        self._refresh_enabled(hooks)
+        
+        logger.info(f"Registered lazy plugin: {name}")
+        return True
+    
+    def _drop_lazy_entries(self, name: str) -> None:
+        """Remove a lazy plugin's placeholders from the hook registry"""
+        for hook, registered in self._hook_registry.items():
+            self._hook_registry[hook] = [
+                p for p in registered if not (type(p) is _LazyEntry and p.name == name)
+            ]
+        self._refresh_enabled()
+    
+    def _materialize(self, name: str) -> Optional[PluginBase]:
+        """Build and register a lazy plugin; None if it fails to construct or initialize"""
+        factory = self._lazy_factories.pop(name, None)
+        self._drop_lazy_entries(name)
+        if factory is None:
+            return self._plugins.get(name)
+        
+        try:
+            plugin = factory()
+        except Exception as e:
+            logger.error(f"Failed to instantiate {name}: {e}")
+            return None
+        return plugin if self.register_plugin(plugin) else None
+    
     def unregister_plugin(self, name: str) -> bool:
         """
         Unregister a plugin by name.
@@ -263,12 +425,21 @@ class PluginManager:
         Returns:
             True if unregistration successful
         """
+        if name in self._lazy_factories:
+            # Never constructed: nothing to clean up
+            del self._lazy_factories[name]
+            self._drop_lazy_entries(name)
+            logger.info(f"Unregistered plugin: {name}")
+            return True
+        
         if name not in self._plugins:
             logger.warning(f"Plugin '{name}' not found")
             return False
         
         plugin = self._plugins[name]
         plugin.cleanup()
+        plugin._on_config_change = None
+        plugin._watch_config()
         
         # Remove from hook registry
         for hook in HookPoint:
@@ -276,6 +447,8 @@ class PluginManager:
                 p for p in self._hook_registry[hook] if p.name != name
             ]
         
+        self._refresh_enabled()
+        
         del self._plugins[name]
         logger.info(f"Unregistered plugin: {name}")
         return True
@@ -290,18 +463,15 @@ class PluginManager:
         Returns:
             Number of plugins loaded
         """
-        plugins_dir = Path(plugins_path)
-        
-        if not plugins_dir.exists():
+        try:
+            plugin_files = _discover_plugin_files(Path(plugins_path))
+        except FileNotFoundError:
             logger.warning(f"Plugins directory not found: {plugins_path}")
             return 0
         
         loaded = 0
         
-        for plugin_file in plugins_dir.glob("*.py"):
-            if plugin_file.name.startswith("_"):
-                continue
-            
+        for plugin_file in plugin_files:
             try:
                 loaded += self._load_plugin_file(plugin_file)
             except Exception as e:
@@ -312,11 +482,7 @@ class PluginManager:
     
     def _load_plugin_file(self, plugin_file: Path) -> int:
         """Load plugins from a single file"""
-        spec = importlib.util.spec_from_file_location(
-            plugin_file.stem, plugin_file
-        )
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        module = _import_plugin_module(plugin_file)
         
         loaded = 0
         
@@ -365,10 +531,16 @@ class PluginManager:
                         enabled=settings.get("enabled", True),
                         priority=PluginPriority[settings.get("priority", "NORMAL").upper()],
                         hooks=[HookPoint[h.upper()] for h in settings.get("hooks", ["post_analyze"])],
-                        settings=settings.get("settings", {})
+                        settings=settings.get("settings", {}),
+                        parallel_safe=settings.get("parallel_safe", False)
                     )
                     logger.info(f"Configured plugin: {plugin_name}")
             
+            # New priorities must not break the sorted order register_plugin relies on
+            for registered in self._hook_registry.values():
+                registered.sort(key=_priority_key)
+            self._refresh_enabled()
+            
             return True
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
@@ -389,48 +561,94 @@ class PluginManager:
         context["hook"] = hook
         context["results"] = results
         
-        for plugin in self._hook_registry[hook]:
-            if not plugin.config.enabled:
-                continue
-            
-            try:
-                import time
-                start = time.perf_counter()
-                
-                result = plugin.execute(context)
-                result.execution_time_ms = (time.perf_counter() - start) * 1000
-                
-                results.append(result)
-                
-                logger.debug(
-                    f"Plugin {plugin.name} executed in "
-                    f"{result.execution_time_ms:.2f}ms"
-                )
-            except Exception as e:
-                error_result = plugin.on_error(e, context)
-                if error_result:
-                    results.append(error_result)
-                else:
-                    results.append(PluginResult(
-                        success=False,
-                        plugin_name=plugin.name,
-                        plugin_version=plugin.version,
-                        message=f"Execution failed: {e}",
-                        errors=[str(e)]
-                    ))
+        plugins = self._enabled_registry[hook]
+        if self._lazy_factories:
+            plugins = self._materialize_entries(hook, plugins)
+        
+        if len(plugins) > 1 and _all_parallel_safe(plugins):
+            # Results still come back in priority order
+            with ThreadPoolExecutor(max_workers=len(plugins)) as executor:
+                results.extend(executor.map(
+                    lambda plugin: self._execute_plugin(plugin, context), plugins
+                ))
+        else:
+            for plugin in plugins:
+                results.append(self._execute_plugin(plugin, context))
         
         return results
     
+    def _materialize_entries(self, hook: HookPoint,
+                             entries: Sequence[PluginBase]) -> list[PluginBase]:
+        """Replace lazy placeholders in a hook's plugin list with built plugins"""
+        plugins = []
+        for plugin in entries:
+            if type(plugin) is _LazyEntry:
+                plugin = self._materialize(plugin.name)
+                if plugin is None or hook not in plugin.hooks or not plugin.config.enabled:
+                    continue
+            plugins.append(plugin)
+        return plugins
+    
+    def _execute_plugin(self, plugin: PluginBase, context: dict) -> PluginResult:
+        """Run one plugin, timing it and turning exceptions into a failed result"""
+        try:
+            start = perf_counter()
+            
+            result = plugin.execute(context)
+            result.execution_time_ms = (perf_counter() - start) * 1000
+            
+            logger.debug(
+                f"Plugin {plugin.name} executed in "
+                f"{result.execution_time_ms:.2f}ms"
+            )
+            return result
+        except Exception as e:
+            error_result = plugin.on_error(e, context)
+            if error_result:
+                return error_result
+            return PluginResult(
+                success=False,
+                plugin_name=plugin.name,
+                plugin_version=plugin.version,
+                message=f"Execution failed: {e}",
+                errors=[str(e)]
+            )
+    
     def run_all(self, context: dict) -> dict[HookPoint, list[PluginResult]]:
         """
         Run plugins for all hooks.
         
+        Hooks with enabled plugins run concurrently (each with its own copy
+        of the context) when every enabled plugin can run in a thread (see
+        _all_parallel_safe), otherwise one after another.
+        Either way the caller's context ends up with the last hook's
+        "hook" and "results" entries, as run_hook leaves them.
+        
         Args:
             context: Execution context
         
         Returns:
             Dict mapping hooks to their results
         """
+        active = [hook for hook in HookPoint if self._enabled_registry[hook]]
+        if len(active) > 1 and all(
+            _all_parallel_safe(self._enabled_registry[hook]) for hook in active
+        ):
+            with ThreadPoolExecutor(max_workers=len(active)) as executor:
+                futures = {
+                    hook: executor.submit(self.run_hook, hook, dict(context))
+                    for hook in active
+                }
+            # Hooks without enabled plugins have nothing to run
+            results = {
+                hook: futures[hook].result() if hook in futures else []
+                for hook in HookPoint
+            }
+            last = next(reversed(results))
+            context["hook"] = last
+            context["results"] = results[last]
+            return results
+        
         return {
             hook: self.run_hook(hook, context)
             for hook in HookPoint
@@ -454,6 +672,102 @@ class PluginManager:
         }
 
 
+# Plugin modules are registered in sys.modules as "agent_nexus_plugins.<stem>",
+# so a plugin file named e.g. json.py cannot shadow the real module
+PLUGIN_PACKAGE = "agent_nexus_plugins"
+_plugin_package = ModuleType(PLUGIN_PACKAGE)
+_plugin_package.__path__ = []
+
+# Modules created by _import_plugin_module; only these may be replaced in
+# sys.modules by another plugin file with the same stem
+_plugin_modules: "weakref.WeakSet[ModuleType]" = weakref.WeakSet()
+
+# Plugin modules by resolved path -> ((mtime_ns, size), module). Loading an
+# unchanged file again (another manager, repeated load_plugins) reuses the
+# module instead of re-executing its source and import side effects.
+_module_cache: dict[Path, tuple[tuple[int, int], ModuleType]] = {}
+
+# Plugin directories by resolved path -> (mtime_ns, plugin files). Adding,
+# removing or renaming a file bumps the directory's mtime; edits to existing
+# files don't, and are picked up by _module_cache instead.
+_discovery_cache: dict[Path, tuple[int, list[Path]]] = {}
+
+
+def _discover_plugin_files(plugins_dir: Path) -> list[Path]:
+    """
+    List the loadable (*.py, not _-prefixed) files in a plugins directory.
+    
+    Raises:
+        FileNotFoundError: If the directory does not exist
+    """
+    path = plugins_dir.resolve()
+    mtime_ns = path.stat().st_mtime_ns
+    cached = _discovery_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    plugin_files = [f for f in path.glob("*.py") if not f.name.startswith("_")]
+    _discovery_cache[path] = (mtime_ns, plugin_files)
+    return plugin_files
+
+
+def _register_plugin_module(module: ModuleType) -> Optional[ModuleType]:
+    """
+    Put a plugin module into sys.modules under its namespaced name.
+    
+    Returns:
+        The plugin module previously registered under that name, if any
+    
+    Raises:
+        ImportError: If the name is held by a module this loader did not create
+    """
+    name = module.__name__
+    previous = sys.modules.get(name)
+    if previous is not None and previous is not module and previous not in _plugin_modules:
+        raise ImportError(f"Refusing to replace non-plugin module {name!r} in sys.modules")
+    # Lets pickle resolve "agent_nexus_plugins.<stem>" (it imports the parent)
+    sys.modules.setdefault(PLUGIN_PACKAGE, _plugin_package)
+    sys.modules[name] = module
+    return previous
+
+
+def _import_plugin_module(plugin_file: Path) -> ModuleType:
+    """
+    Import a plugin file, reusing the cached module while the file is unchanged.
+    
+    Raises:
+        Exception: Whatever the plugin source raises; failures are not cached
+    """
+    path = plugin_file.resolve()
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _module_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        module = cached[1]
+        # Another plugin file with the same stem may have taken the name since
+        _register_plugin_module(module)
+        return module
+    
+    spec = importlib.util.spec_from_file_location(
+        f"{PLUGIN_PACKAGE}.{plugin_file.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    # Register before exec so module-level functions can be pickled
+    # (needed by plugins that fan work out to a process pool)
+    previous = _register_plugin_module(module)
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        # Don't leave a half-initialized module importable
+        if previous is None:
+            sys.modules.pop(spec.name, None)
+        else:
+            sys.modules[spec.name] = previous
+        raise
+    _plugin_modules.add(module)
+    _module_cache[path] = (stamp, module)
+    return module
+
+
 # Example plugin implementation
 class ExamplePlugin(PluginBase):
     """Example plugin demonstrating the plugin architecture"""
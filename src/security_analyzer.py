@@ -16,9 +16,15 @@ Tespit Edilen Güvenlik Riskleri:
 
 import ast
 import re
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass, field
 
+if __package__:
+    from . import ast_cache
+else:
+    import ast_cache
+
 
 @dataclass
 class SecurityConfig:
@@ -52,13 +58,101 @@ class SecurityConfig:
     ])
 
 
+def _compile_patterns(patterns: tuple) -> tuple:
+    """Secret pattern'lerini derler; string'ler ve hazır re.Pattern nesneleri kabul edilir."""
+    return tuple(re.compile(pattern) for pattern in patterns)
+
+
+# shell=True kontrolü yapılan çağrılar (modül adıyla ve doğrudan import edilmiş haliyle)
+_SUBPROCESS_CALLS = frozenset({
+    'subprocess.run', 'subprocess.call', 'subprocess.Popen', 'run', 'call', 'Popen',
+})
+
+
+# Pattern başındaki global bayraklar, ör. "(?i)"; birleşik regex'te kapsamlı
+# gruba ("(?i:...)") çevrilir
+_GLOBAL_FLAGS_RE = re.compile(r"\(\?[aiLmsux]+\)")
+# Numaralı/isimli geri referanslar birleştirmede grup numarası kaydığı için bozulur
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+_SCOPED_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+
+def _combine_patterns(compiled: tuple) -> Optional["re.Pattern"]:
+    """
+    Pattern'leri tek bir alternation regex'inde birleştirir.
+    
+    Her pattern kendi bayraklarıyla kapsamlı bir gruba alınır; match()
+    alternatifleri sırayla denediği için sonuç, pattern'lerden herhangi
+    birinin eşleşmesiyle aynıdır. Güvenle birleştirilemeyen pattern'ler
+    (bytes, ASCII/LOCALE bayrağı, geri referans, ortada global bayrak)
+    için None döner.
+    """
+    parts = []
+    for pattern in compiled:
+        source = pattern.pattern
+        if (not isinstance(source, str) or pattern.flags & (re.ASCII | re.LOCALE)
+                or _BACKREF_RE.search(source)):
+            return None
+        while True:
+            match = _GLOBAL_FLAGS_RE.match(source)
+            if match is None:
+                break
+            source = source[match.end():]
+        if _GLOBAL_FLAGS_RE.search(source):
+            return None
+        flags = "".join(letter for flag, letter in _SCOPED_FLAGS if pattern.flags & flag)
+        # VERBOSE'da sondaki "#" yorumu kapanış parantezini yutmasın
+        parts.append(f"(?{flags}:{source}\n)" if "x" in flags else f"(?{flags}:{source})")
+    try:
+        return re.compile("|".join(parts))
+    except re.error:
+        return None
+
+
+@lru_cache(maxsize=32)
+def _secret_matcher(patterns: tuple):
+    """
+    Değişken adını secret pattern'lerine karşı tek çağrıda test eden fonksiyon.
+    
+    Mümkünse tek bir birleşik regex'in match metodu, değilse pattern'leri
+    sırayla deneyen bir döngü döner. Aynı pattern listesiyle yapılan tüm
+    analizler derlenmiş sonucu paylaşır.
+    """
+    compiled = _compile_patterns(patterns)
+    combined = _combine_patterns(compiled)
+    if combined is not None:
+        return combined.match
+    
+    def match_any(name: str) -> bool:
+        return any(pattern.match(name) for pattern in compiled)
+    return match_any
+
+
 class SecurityVisitor(ast.NodeVisitor):
     """AST ziyaretçisi - güvenlik sorunlarını tespit eder"""
     
     def __init__(self, config: SecurityConfig):
         self.config = config
         self.issues: List[Dict[str, Any]] = []
+        # Sonuç kategorileri; sorunlar bulundukları anda kendi listelerine eklenir
+        self.buckets: Dict[str, List[Dict[str, Any]]] = {
+            "dangerous_functions": [],
+            "risky_imports": [],
+            "risky_calls": [],
+            "hardcoded_secrets": [],
+            "shell_injection": [],
+        }
+        self.severity_counts: Dict[str, int] = {"critical": 0, "high": 0, "medium": 0}
         self.imports: Dict[str, str] = {}  # alias -> module
+        self.match_secret = _secret_matcher(tuple(config.secret_patterns))
+    
+    def _emit(self, category: str, issue: Dict[str, Any]) -> None:
+        """Sorunu hem genel listeye hem kategorisine ekler, önem sayacını artırır"""
+        self.issues.append(issue)
+        self.buckets[category].append(issue)
+        severity = issue["severity"]
+        if severity in self.severity_counts:
+            self.severity_counts[severity] += 1
     
     def visit_Import(self, node: ast.Import):
         """Import ifadelerini takip et"""
@@ -78,7 +172,7 @@ class SecurityVisitor(ast.NodeVisitor):
                 if node.module in self.config.risky_modules:
                     risky_funcs = self.config.risky_modules[node.module]
                     if alias.name in risky_funcs or alias.name == '*':
-                        self.issues.append({
+                        self._emit("risky_imports", {
                             "type": "risky_import",
                             "module": node.module,
                             "function": alias.name,
@@ -94,7 +188,7 @@ class SecurityVisitor(ast.NodeVisitor):
         
         # Tehlikeli fonksiyon kontrolü
         if func_name in self.config.dangerous_functions:
-            self.issues.append({
+            self._emit("dangerous_functions", {
                 "type": "dangerous_function",
                 "function": func_name,
                 "line": node.lineno,
@@ -116,7 +210,7 @@ class SecurityVisitor(ast.NodeVisitor):
             if actual_module in self.config.risky_modules:
                 risky_funcs = self.config.risky_modules[actual_module]
                 if method in risky_funcs:
-                    self.issues.append({
+                    self._emit("risky_calls", {
                         "type": "risky_call",
                         "module": actual_module,
                         "function": method,
@@ -126,11 +220,11 @@ class SecurityVisitor(ast.NodeVisitor):
                     })
         
         # subprocess shell=True kontrolü
-        if func_name in ('subprocess.run', 'subprocess.call', 'subprocess.Popen', 'run', 'call', 'Popen'):
+        if func_name in _SUBPROCESS_CALLS:
             for keyword in node.keywords:
                 if keyword.arg == 'shell':
                     if isinstance(keyword.value, ast.Constant) and keyword.value.value is True:
-                        self.issues.append({
+                        self._emit("shell_injection", {
                             "type": "shell_injection",
                             "function": func_name,
                             "line": node.lineno,
@@ -146,31 +240,37 @@ class SecurityVisitor(ast.NodeVisitor):
             if isinstance(target, ast.Name):
                 var_name = target.id
                 
-                # Secret pattern kontrolü
-                for pattern in self.config.secret_patterns:
-                    if re.match(pattern, var_name):
-                        # String literal mi kontrol et
-                        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
-                            if len(node.value.value) > 5:  # Çok kısa değilse
-                                self.issues.append({
-                                    "type": "hardcoded_secret",
-                                    "variable": var_name,
-                                    "line": node.lineno,
-                                    "severity": "critical",
-                                    "message": f"Hardcoded secret: {var_name} = '***' - Güvenlik riski!"
-                                })
-                        break
+                # Secret pattern kontrolü (tüm pattern'ler tek çağrıda)
+                if self.match_secret(var_name):
+                    # String literal mi kontrol et
+                    if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                        if len(node.value.value) > 5:  # Çok kısa değilse
+                            self._emit("hardcoded_secrets", {
+                                "type": "hardcoded_secret",
+                                "variable": var_name,
+                                "line": node.lineno,
+                                "severity": "critical",
+                                "message": f"Hardcoded secret: {var_name} = '***' - Güvenlik riski!"
+                            })
         
         self.generic_visit(node)
     
     def _get_func_name(self, node) -> str:
-        """Fonksiyon adını çıkar"""
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            value = self._get_func_name(node.value)
-            return f"{value}.{node.attr}" if value else node.attr
-        return ""
+        """
+        Fonksiyon adını çıkar ("a.b.c").
+        
+        Attribute zinciri özyineleme ve ara string'ler olmadan bir kez
+        birleştirilir; kök bir isim değilse (ör. f().x) yalnızca
+        attribute'lar kullanılır.
+        """
+        parts = []
+        while type(node) is ast.Attribute:
+            parts.append(node.attr)
+            node = node.value
+        if type(node) is ast.Name:
+            parts.append(node.id)
+        parts.reverse()
+        return ".".join(parts)
 
 
 def analyze_security(code: str, config: Optional[SecurityConfig] = None) -> Dict[str, Any]:
@@ -192,50 +292,42 @@ def analyze_security(code: str, config: Optional[SecurityConfig] = None) -> Dict
             "severity_counts": {"critical": 2, "high": 3}
         }
     """
-    if config is None:
-        config = SecurityConfig()
-    
     try:
-        tree = ast.parse(code)
+        # Paylaşılan ast_cache önbelleği: aynı kaynak ikinci kez parse edilmez.
+        # Dönen ağaç paylaşılır, değiştirilmemelidir.
+        tree = ast_cache.parse_source(code)
     except SyntaxError as e:
         return {"error": f"Syntax error: {e}", "total_issues": 0}
     
+    return analyze_security_tree(tree, config)
+
+
+def analyze_security_tree(tree: ast.AST, config: Optional[SecurityConfig] = None) -> Dict[str, Any]:
+    """
+    Önceden parse edilmiş AST'yi güvenlik açısından analiz eder.
+    
+    Ağacı zaten elinde tutan çağıranlar (ör. plugin'ler) için ast.parse
+    maliyetini tekrar ödememek adına kullanılır.
+    
+    Args:
+        tree: AST ağacı
+        config: Güvenlik yapılandırması
+    
+    Returns:
+        analyze_security ile aynı yapı
+    """
+    if config is None:
+        config = SecurityConfig()
+    
     visitor = SecurityVisitor(config)
     visitor.visit(tree)
     
-    # Kategorize et
-    result = {
-        "dangerous_functions": [],
-        "risky_imports": [],
-        "risky_calls": [],
-        "hardcoded_secrets": [],
-        "shell_injection": [],
-    }
-    
-    # Type mapping - tekil -> çoğul (Bug fix by CopilotOpusAgent)
-    type_mapping = {
-        "dangerous_function": "dangerous_functions",
-        "hardcoded_secret": "hardcoded_secrets",
-        "risky_import": "risky_imports",
-        "risky_call": "risky_calls",
-        "shell_injection": "shell_injection",
-    }
-    
-    for issue in visitor.issues:
-        issue_type = issue["type"]
-        # Map tekil type to çoğul key
-        mapped_type = type_mapping.get(issue_type, issue_type)
-        if mapped_type in result:
-            result[mapped_type].append(issue)
-    
-    # İstatistikler
-    all_issues = visitor.issues
-    result["total_issues"] = len(all_issues)
-    result["severity_counts"] = {
-        "critical": sum(1 for i in all_issues if i.get("severity") == "critical"),
-        "high": sum(1 for i in all_issues if i.get("severity") == "high"),
-        "medium": sum(1 for i in all_issues if i.get("severity") == "medium"),
-    }
+    # Sorunlar ziyaret sırasında kategorilerine ayrıldı; ayrıca gezmeye gerek yok
+    result = visitor.buckets
+    
+    # İstatistikler (ziyaret sırasında sayıldı)
+    result["total_issues"] = len(visitor.issues)
+    result["severity_counts"] = visitor.severity_counts
     
     return result
 
@@ -1,32 +1,38 @@
-import datetime
+import time
 import sys
 import os
 
-def talk(agent_name, message):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = f"\n[{timestamp}] [{agent_name}]: {message}"
-    
-    path = "communication/general.md"
-    
-    # Ensure we are in the root of the repo roughly, or use relative paths correctly
-    # Assuming script is run from root or src
-    if not os.path.exists(path):
-        if os.path.exists("../communication/general.md"):
-            path = "../communication/general.md"
-        else:
-            print("Error: communication/general.md not found.")
-            return
+# Resolved once from this file's location, so it works from any cwd
+LOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "communication", "general.md",
+)
+
+def format_entry(agent_name, message):
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    return f"\n[{timestamp}] [{agent_name}]: {message}".encode("utf-8")
+
+def talk_many(agent_name, messages):
+    # One open/write for the whole batch
+    data = b"".join(format_entry(agent_name, message) for message in messages)
+    try:
+        with open(LOG_PATH, "ab") as f:
+            f.write(data)
+    except FileNotFoundError:
+        print(f"Error: {LOG_PATH} not found.")
+        return False
 
-    with open(path, "a") as f:
-        f.write(entry)
-    
-    print(f"Message added to {path}")
+    print(f"Message added to {LOG_PATH}")
+    return True
+
+def talk(agent_name, message):
+    return talk_many(agent_name, (message,))
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("Usage: python talk.py <AgentName> <Message>")
         sys.exit(1)
-    
+
     agent = sys.argv[1]
     msg = " ".join(sys.argv[2:])
     talk(agent, msg)
@@ -23,7 +23,14 @@ from ast_analyzer import (
     get_function_complexity,
     analyze_python_changes,
     get_code_summary,
+    extract_tree_info,
+    clear_ast_cache,
+    changes_to_json,
+    compare_python_code,
+    analyze_batch,
+    ChangeAnalysis,
 )
+import ast_analyzer
 
 
 class TestExtractImports:
@@ -43,6 +50,13 @@ class TestExtractImports:
         imports = _extract_imports(tree)
         assert "os.path" in imports
     
+    def test_from_import_names_shared(self):
+        """Test joined module.name strings are interned across trees"""
+        first = _extract_imports(ast.parse("from os.path import join"))
+        second = _extract_imports(ast.parse("import sys\nfrom os.path import join"))
+        joined = [name for name in second if name == "os.path.join"][0]
+        assert next(iter(first)) is joined
+    
     def test_multiple_imports(self):
         """Test multiple imports"""
         code = """
@@ -158,6 +172,41 @@ class MyClass:
         tree = ast.parse(code)
         class_methods = _extract_class_methods(tree)
         assert "async_method" in class_methods["MyClass"]
+    
+    def test_nested_and_conditional_classes(self):
+        """Test classes inside functions/branches are found, last definition wins"""
+        code = """
+def factory():
+    class Inner:
+        def run(self):
+            pass
+    return Inner
+
+if FLAG:
+    class Compat:
+        def old(self): pass
+else:
+    class Compat:
+        def new(self): pass
+"""
+        tree = ast.parse(code)
+        assert _extract_class_methods(tree) == {"Inner": {"run"}, "Compat": {"new"}}
+        assert _extract_functions(tree) == {"factory", "run", "old", "new"}
+        assert _extract_classes(tree) == {"Inner", "Compat"}
+    
+    def test_try_branches_in_source_order(self):
+        """Test try/except/else classes are taken in source order (else wins)"""
+        code = """
+try:
+    import fast
+except ImportError:
+    class Impl:
+        def slow(self): pass
+else:
+    class Impl:
+        def fast(self): pass
+"""
+        assert _extract_class_methods(ast.parse(code)) == {"Impl": {"fast"}}
 
 
 class TestExtractDecorators:
@@ -188,6 +237,20 @@ def my_func():
         decorators = _extract_decorators(tree)
         assert "my_func" in decorators
         assert len(decorators["my_func"]) == 2
+    
+    def test_dotted_and_call_decorators(self):
+        """Test dotted names and calls render like ast.unparse"""
+        code = """
+@pytest.mark.slow
+@functools.lru_cache(maxsize=128)
+@a.b[0].c
+def my_func():
+    pass
+"""
+        decorators = _extract_decorators(ast.parse(code))
+        assert decorators["my_func"] == [
+            "@pytest.mark.slow", "@functools.lru_cache(maxsize=128)", "@a.b[0].c"
+        ]
 
 
 class TestExtractDocstrings:
@@ -249,6 +312,133 @@ def complex_func(x):
         assert report["complex_func"]["complexity"] >= 3
 
 
+class TestExtractTreeInfo:
+    """Test extract_tree_info single-pass extractor"""
+    
+    def test_collects_everything(self):
+        """Test one pass fills every field"""
+        code = '''
+"""Module doc."""
+import os
+from typing import List
+
+@dataclass
+class Box:
+    """Box doc."""
+    def size(self, n: int) -> int:
+        return n
+
+async def fetch(url):
+    pass
+'''
+        info = extract_tree_info(ast.parse(code))
+        assert info.functions == {"size", "fetch"}
+        assert info.classes == {"Box"}
+        assert info.imports == {"os", "typing.List"}
+        assert info.class_methods == {"Box": {"size"}}
+        assert info.decorators == {"Box": ["@dataclass"]}
+        assert set(info.docstrings) == {"__module__", "Box"}
+        assert info.type_annotations["size"]["coverage"] == 100.0
+        assert info.complexity == {"size": 1, "fetch": 1}
+    
+    def test_complexity_matches_analyzer(self):
+        """Test nested functions are counted like get_function_complexity"""
+        code = """
+def outer(a, b):
+    if a and b:
+        pass
+    else:
+        pass
+    def inner(x):
+        for i in x:
+            assert i
+        return [y for y in x if y] if x else None
+    try:
+        pass
+    except ValueError:
+        pass
+"""
+        tree = ast.parse(code)
+        expected = {
+            node.name: get_function_complexity(node)
+            for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)
+        }
+        assert extract_tree_info(tree).complexity == expected
+
+
+class TestParseCache:
+    """Test the source-hash keyed parse cache"""
+    
+    def test_same_source_parsed_once(self, monkeypatch):
+        """Test repeated analysis of the same source does not re-parse"""
+        clear_ast_cache()
+        calls = []
+        real_parse = ast.parse
+        
+        def counting_parse(*args, **kwargs):
+            calls.append(args)
+            return real_parse(*args, **kwargs)
+        
+        monkeypatch.setattr(ast_analyzer.ast, "parse", counting_parse)
+        code_a = "def a():\n    pass\n"
+        code_b = "def b():\n    pass\n"
+        analyze_python_changes(code_a, code_b)
+        analyze_python_changes(code_b, code_a)
+        get_complexity_changes(code_a, code_b)
+        get_code_summary(code_a)
+        assert len(calls) == 2
+        
+        clear_ast_cache()
+        get_code_summary(code_a)
+        assert len(calls) == 3
+    
+    def test_disk_cache_opt_in(self, tmp_path, monkeypatch):
+        """Test AGENT_NEXUS_AST_CACHE=1 routes parsing through ast_cache"""
+        import ast_cache
+        clear_ast_cache()
+        monkeypatch.setenv("AGENT_NEXUS_AST_CACHE", "1")
+        monkeypatch.setattr(ast_cache, "DEFAULT_CACHE_DIR", tmp_path / "ast")
+        monkeypatch.setattr(ast_analyzer, "_report_disk_cache_stats", lambda: None)
+        assert get_code_summary("def cached(): pass\n")["functions"] == ["cached"]
+        assert len(list((tmp_path / "ast").glob("*.pkl"))) == 1
+        clear_ast_cache()
+    
+    def test_summary_is_a_copy(self):
+        """Test mutating a summary does not leak into later calls"""
+        code = "@property\ndef a(x: int):\n    pass\n"
+        first = get_code_summary(code)
+        first["decorators"]["a"].append("@mutated")
+        first["type_annotations"]["a"]["params"]["x"] = "str"
+        second = get_code_summary(code)
+        assert second["decorators"]["a"] == ["@property"]
+        assert second["type_annotations"]["a"]["params"]["x"] == "int"
+
+    
+    def test_unchanged_definitions_reused(self, monkeypatch):
+        """Test an edit re-extracts only the top-level defs whose text changed"""
+        clear_ast_cache()
+        runs = []
+        real_run = ast_analyzer._UnifiedExtractor.run
+        
+        def counting_run(self, node):
+            runs.append(type(node).__name__)
+            return real_run(self, node)
+        
+        monkeypatch.setattr(ast_analyzer._UnifiedExtractor, "run", counting_run)
+        old_code = "import os\n\n@cache\ndef a(x):\n    if x:\n        pass\n\nclass B:\n    pass\n"
+        new_code = old_code.replace("class B:\n    pass", "class B:\n    def m(self):\n        pass")
+        analyze_python_changes(old_code, new_code)
+        assert runs.count("FunctionDef") == 1
+        assert runs.count("ClassDef") == 2
+        
+        summary = get_code_summary(new_code)
+        assert {name: r["complexity"] for name, r in summary["complexity"].items()} == {"a": 2, "m": 1}
+        assert summary["class_methods"] == {"B": ["m"]}
+        assert summary["decorators"] == {"a": ["@cache"]}
+        clear_ast_cache()
+        assert extract_tree_info(ast.parse(new_code), new_code) == extract_tree_info(ast.parse(new_code))
+
+
 class TestAnalyzePythonChanges:
     """Test main analyze_python_changes function"""
     
@@ -285,6 +475,19 @@ def new_function():
         assert "added_classes" in result
         assert "added_imports" in result
     
+    def test_result_keys_complete(self):
+        """Test every analysis section (v2.1-v3.1) is part of the result"""
+        result = analyze_python_changes("def f(): pass\n", "def f():\n    if x: pass\n")
+        assert set(result) == {
+            "added_functions", "removed_functions", "modified_functions",
+            "added_classes", "removed_classes", "modified_classes",
+            "method_changes", "decorator_changes", "docstring_changes",
+            "complexity_changes", "type_annotation_changes",
+            "added_imports", "removed_imports",
+        }
+        assert result["complexity_changes"]["f"]["delta"] == 1
+        assert hasattr(ast_analyzer, "ComplexityAnalyzer")
+    
     def test_syntax_error_handling(self):
         """Test handling of syntax errors"""
         old_code = "x = 1"
@@ -293,6 +496,78 @@ def new_function():
         
         # Should return None for syntax errors
         assert result is None
+    
+    def test_added_names_and_methods(self):
+        """Test added functions, classes, imports and class methods are reported"""
+        old_code = """
+import os
+class Hello:
+    def greet(self): pass
+def hello(): pass
+"""
+        new_code = """
+import os
+import sys
+class Hello:
+    def greet(self): pass
+    def wave(self): pass
+class World:
+    def spin(self): pass
+def hello(): pass
+def world(): pass
+async def async_func(): pass
+"""
+        result = analyze_python_changes(old_code, new_code)
+        assert result["added_functions"] == {"async_func", "spin", "wave", "world"}
+        assert result["added_classes"] == {"World"}
+        assert result["added_imports"] == {"sys"}
+        assert result["method_changes"]["Hello"]["added"] == ["wave"]
+    
+    def test_watcher_state_methods(self):
+        """Test methods added to an existing class are listed per class"""
+        old_code = """
+class WatcherState:
+    def __init__(self): pass
+    def check(self): pass
+"""
+        new_code = old_code + """    def update_head(self): pass
+    def reset(self): pass
+"""
+        result = analyze_python_changes(old_code, new_code)
+        changes = result["method_changes"]["WatcherState"]
+        assert sorted(changes["added"]) == ["reset", "update_head"]
+        assert changes["removed"] == []
+    
+    def test_compare_returns_slotted_result(self):
+        """Test compare_python_code returns a frozen ChangeAnalysis matching the dict form"""
+        old_code, new_code = "import os\n", "import os\ndef f(): pass\n"
+        result = compare_python_code(old_code, new_code)
+        assert isinstance(result, ChangeAnalysis)
+        assert not hasattr(result, "__dict__")
+        assert result.added_functions == {"f"}
+        assert result.to_dict() == analyze_python_changes(old_code, new_code)
+        with pytest.raises(AttributeError):
+            result.added_functions = set()
+        assert compare_python_code(old_code, "def (:") is None
+    
+    def test_batch_matches_serial(self):
+        """Test analyze_batch returns per-pair results in order, also via the pool"""
+        pairs = [("def a(): pass\n", f"def a(): pass\ndef f{i}(): pass\n") for i in range(6)]
+        pairs.append(("x = 1\n", "def (:"))
+        serial = [analyze_python_changes(old, new) for old, new in pairs]
+        assert analyze_batch(pairs) == serial
+        assert analyze_batch(pairs, max_workers=2, min_parallel=1) == serial
+    
+    def test_name_changes_are_sets(self):
+        """Test added/removed names come back as sets and serialize sorted"""
+        result = analyze_python_changes("import b\n", "import b\nimport z\nimport a\ndef f(): pass\n")
+        assert result["added_imports"] == {"a", "z"}
+        assert result["added_functions"] == {"f"}
+        
+        serialized = changes_to_json(result)
+        assert serialized["added_imports"] == ["a", "z"]
+        assert serialized["removed_imports"] == []
+        assert serialized["method_changes"] == result["method_changes"]
 
 
 class TestGetCodeSummary:
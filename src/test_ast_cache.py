@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Tests for ast_cache.py
+"""
+
+import ast
+import os
+import pickle
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+import ast_cache
+from ast_cache import (
+    get_tree,
+    content_hash,
+    clear_memory_cache,
+    has_docstring,
+    parse_source,
+    cache_stats,
+    StructureVisitor,
+    validate_files,
+    AnalysisContext,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_memory_cache():
+    clear_memory_cache()
+    yield
+    clear_memory_cache()
+
+
+class TestGetTree:
+    """Test get_tree function"""
+
+    def test_parses_file(self, tmp_path):
+        """Test a valid file is parsed into a Module"""
+        src = tmp_path / "mod.py"
+        src.write_text("def foo():\n    return 1\n")
+        tree = get_tree(src, cache_dir=tmp_path / "cache")
+        assert isinstance(tree, ast.Module)
+        assert tree.body[0].name == "foo"
+
+    def test_memory_hit_returns_same_tree(self, tmp_path):
+        """Test repeated calls re-use the in-process tree"""
+        src = tmp_path / "mod.py"
+        src.write_text("x = 1\n")
+        first = get_tree(src, cache_dir=tmp_path / "cache")
+        second = get_tree(src, cache_dir=tmp_path / "cache")
+        assert first is second
+
+    def test_disk_cache_written_and_reused(self, tmp_path, monkeypatch):
+        """Test a pickled tree is loaded from disk without re-parsing"""
+        src = tmp_path / "mod.py"
+        src.write_text("class A:\n    pass\n")
+        cache_dir = tmp_path / "cache"
+        get_tree(src, cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+        clear_memory_cache()
+
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("ast.parse should not be called")
+
+        monkeypatch.setattr(ast_cache.ast, "parse", fail_parse)
+        tree = get_tree(src, cache_dir=cache_dir)
+        assert tree.body[0].name == "A"
+
+    def test_changed_content_reparsed(self, tmp_path):
+        """Test editing a file invalidates its cache entry"""
+        src = tmp_path / "mod.py"
+        cache_dir = tmp_path / "cache"
+        src.write_text("def old(): pass\n")
+        assert get_tree(src, cache_dir=cache_dir).body[0].name == "old"
+        src.write_text("def new(): pass\n")
+        assert get_tree(src, cache_dir=cache_dir).body[0].name == "new"
+
+    def test_syntax_error_cached(self, tmp_path):
+        """Test syntax errors are raised on every call, also from the cache"""
+        src = tmp_path / "bad.py"
+        src.write_text("def broken(:\n")
+        cache_dir = tmp_path / "cache"
+        with pytest.raises(SyntaxError):
+            get_tree(src, cache_dir=cache_dir)
+        clear_memory_cache()
+        with pytest.raises(SyntaxError) as exc_info:
+            get_tree(src, cache_dir=cache_dir)
+        assert exc_info.value.filename == str(src)
+
+    def test_unchanged_stat_skips_read(self, tmp_path, monkeypatch):
+        """Test an unchanged (old) file is served from the stat index"""
+        src = tmp_path / "mod.py"
+        src.write_text("x = 1\n")
+        os.utime(src, ns=(1_000_000_000, 1_000_000_000))
+        first = get_tree(src, cache_dir=tmp_path / "cache")
+
+        def fail_read(*args, **kwargs):
+            raise AssertionError("file should not be read")
+
+        monkeypatch.setattr(ast_cache.Path, "read_bytes", fail_read)
+        assert get_tree(src, cache_dir=tmp_path / "cache") is first
+
+    def test_source_bytes_argument(self, tmp_path):
+        """Test pre-read bytes are used instead of reading the file"""
+        src = tmp_path / "mod.py"
+        src.write_text("a = 1\n")
+        tree = get_tree(src, source=b"b = 2\n", cache_dir=tmp_path / "cache")
+        assert tree.body[0].targets[0].id == "b"
+
+
+class TestDiskLayer:
+    """Test the on-disk layer is opt-in and only trusts own files"""
+
+    def test_off_by_default(self, tmp_path, monkeypatch):
+        """Test nothing is written without AGENT_NEXUS_AST_CACHE=1 or a cache_dir"""
+        monkeypatch.delenv(ast_cache.DISK_CACHE_ENV, raising=False)
+        monkeypatch.setattr(ast_cache, "DEFAULT_CACHE_DIR", tmp_path / "default")
+        src = tmp_path / "mod.py"
+        src.write_text("x = 1\n")
+        get_tree(src)
+        assert not (tmp_path / "default").exists()
+
+        monkeypatch.setenv(ast_cache.DISK_CACHE_ENV, "1")
+        clear_memory_cache()
+        get_tree(src)
+        assert len(list((tmp_path / "default").glob("*.pkl"))) == 1
+
+    def test_default_dir_outside_repo(self):
+        """Test the default location is a per-user cache directory"""
+        assert ast_cache.DEFAULT_CACHE_DIR.parts[-2:] == ("agent-nexus", "ast")
+        assert ast_cache.DEFAULT_CACHE_DIR.is_absolute()
+
+    def test_foreign_owned_file_ignored(self, tmp_path, monkeypatch):
+        """Test a pickle owned by another user is not loaded"""
+        src = tmp_path / "mod.py"
+        src.write_text("def own(): pass\n")
+        cache_dir = tmp_path / "cache"
+        get_tree(src, cache_dir=cache_dir)
+        clear_memory_cache()
+        (pkl,) = cache_dir.glob("*.pkl")
+        pkl.write_bytes(pickle.dumps(ast.parse("def planted(): pass\n")))
+
+        monkeypatch.setattr(ast_cache, "_OWNER_UID", os.stat(pkl).st_uid + 1)
+        assert get_tree(src, cache_dir=cache_dir).body[0].name == "own"
+
+
+
+class TestParseSource:
+    """Test parse_source for code strings"""
+
+    def test_str_and_bytes_reuse_disk_cache(self, tmp_path, monkeypatch):
+        """Test source strings are cached on disk like files"""
+        cache_dir = tmp_path / "cache"
+        parse_source("def a(): pass\n", cache_dir=cache_dir)
+        parse_source(b"def a(): pass\n", cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.pkl"))) == 2  # str and bytes keyed apart
+        clear_memory_cache()
+
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("ast.parse should not be called")
+
+        monkeypatch.setattr(ast_cache.ast, "parse", fail_parse)
+        before = cache_stats()
+        assert parse_source("def a(): pass\n", cache_dir=cache_dir).body[0].name == "a"
+        assert cache_stats()["disk_hits"] == before["disk_hits"] + 1
+
+    def test_syntax_error(self, tmp_path):
+        """Test broken code raises SyntaxError, also from the cache"""
+        for _ in range(2):
+            with pytest.raises(SyntaxError):
+                parse_source("def (:\n", cache_dir=tmp_path / "cache")
+
+
+class TestThreadSafety:
+    """Test the memory layer under concurrent use"""
+
+    def test_concurrent_lookups_with_eviction(self, tmp_path, monkeypatch):
+        """Test threads hitting and evicting the shared LRU never break it"""
+        monkeypatch.setattr(ast_cache, "MEMORY_CACHE_SIZE", 4)
+        files = []
+        for i in range(16):
+            path = tmp_path / f"mod{i}.py"
+            path.write_text(f"x = {i}\n")
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+            files.append(path)
+
+        def work(offset):
+            for n in range(200):
+                path = files[(offset + n) % len(files)]
+                assert get_tree(path).body[0].value.value == files.index(path)
+                parse_source(f"y = {n % 8}\n")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(8)))
+        assert len(ast_cache._memory) <= 4
+
+
+class TestHasDocstring:
+    """Test docstring flags stored on cached trees"""
+
+    def test_flags_survive_disk_cache(self, tmp_path):
+        """Test _has_doc is set on parse and restored from the pickle"""
+        src = tmp_path / "mod.py"
+        src.write_text('"""Mod."""\nclass A:\n    def f(self):\n        "Doc."\n'
+                       '    async def g(self):\n        return "x"\n')
+        cache_dir = tmp_path / "cache"
+        get_tree(src, cache_dir=cache_dir)
+        clear_memory_cache()
+        tree = get_tree(src, cache_dir=cache_dir)
+        cls = tree.body[1]
+        assert (tree._has_doc, cls._has_doc) == (True, False)
+        assert (cls.body[0]._has_doc, cls.body[1]._has_doc) == (True, False)
+
+    def test_fallback_for_unannotated_trees(self):
+        """Test trees parsed elsewhere are checked directly"""
+        tree = ast.parse('def f():\n    "Doc."\ndef g():\n    pass\n')
+        assert [has_docstring(n) for n in tree.body] == [True, False]
+
+
+class TestStructureVisitor:
+    """Test the leaf-skipping visitor base"""
+
+    def test_visits_structure_skips_leaves(self):
+        """Test defs and branches are visited but names/literals are not"""
+        seen = []
+
+        class Recorder(StructureVisitor):
+            def generic_visit(self, node):
+                seen.append(type(node).__name__)
+                super().generic_visit(node)
+
+        tree = ast.parse("def f(a):\n    if a and b:\n        return [x for x in a]\n")
+        Recorder().visit(tree)
+        assert {"FunctionDef", "If", "BoolOp", "ListComp"} <= set(seen)
+        assert not {"Name", "Constant", "Load", "And"} & set(seen)
+
+    def test_scalar_fields_skipped(self):
+        """Test non-node field values (identifiers, flags, singletons) are skipped"""
+        code = ("from . import x\nglobal g\n"
+                "match v:\n    case None | True:\n        pass\n"
+                "async def f():\n    return [y async for y in z]\n")
+        StructureVisitor().visit(ast.parse(code))
+
+    def test_dispatch_cache_per_class(self):
+        """Test a subclass override does not leak into another visitor"""
+        class Counter(StructureVisitor):
+            def __init__(self):
+                self.ifs = 0
+
+            def visit_If(self, node):
+                self.ifs += 1
+                self.generic_visit(node)
+
+        tree = ast.parse("if a:\n    if b:\n        pass\n")
+        counter = Counter()
+        counter.visit(tree)
+        StructureVisitor().visit(tree)
+        assert counter.ifs == 2
+        assert "visit_If" not in vars(StructureVisitor)
+        assert StructureVisitor._dispatch.get(ast.If) is StructureVisitor.generic_visit
+
+
+class TestValidateFiles:
+    """Test validate_files function"""
+
+    def test_filters_in_one_pass(self, tmp_path):
+        """Test only existing regular .py files survive, with stat data"""
+        good = tmp_path / "good.py"
+        good.write_text("x = 1\n")
+        (tmp_path / "notes.txt").write_text("hi")
+        (tmp_path / "pkg.py").mkdir()
+        files = [str(good), str(tmp_path / "notes.txt"),
+                 str(tmp_path / "missing.py"), str(tmp_path / "pkg.py")]
+
+        validated = validate_files(files)
+        assert [v.path for v in validated] == [str(good)]
+        assert validated[0].size == good.stat().st_size
+        assert validated[0].stat == (good.stat().st_mtime_ns, good.stat().st_size)
+
+
+class TestContentHash:
+    """Test content_hash function"""
+
+    def test_stable(self):
+        assert content_hash(b"abc") == content_hash(b"abc")
+
+    def test_differs(self):
+        assert content_hash(b"abc") != content_hash(b"abd")
+
+
+class TestAnalysisContext:
+    """Test AnalysisContext request-scoped memo"""
+
+    def test_tree_parsed_once(self, tmp_path, monkeypatch):
+        """Test every consumer gets the same tree from one parse"""
+        src = tmp_path / "mod.py"
+        src.write_text("def foo(): pass\n")
+        calls = []
+        real_get_tree = ast_cache.get_tree
+
+        def counting_get_tree(*args, **kwargs):
+            calls.append(args)
+            return real_get_tree(*args, **kwargs)
+
+        monkeypatch.setattr(ast_cache, "get_tree", counting_get_tree)
+        ctx = AnalysisContext(cache_dir=tmp_path / "cache")
+        assert ctx.tree(src) is ctx.tree(str(src))
+        assert len(calls) == 1
+
+    def test_source_read_once(self, tmp_path):
+        """Test file bytes are memoized for the context's lifetime"""
+        src = tmp_path / "mod.py"
+        src.write_text("a = 1\n")
+        ctx = AnalysisContext(cache_dir=tmp_path / "cache")
+        assert ctx.source(src) == b"a = 1\n"
+        src.write_text("a = 2\n")
+        assert ctx.source(src) == b"a = 1\n"
+
+    def test_prefetch_feeds_source(self, tmp_path, monkeypatch):
+        """Test prefetched bytes are served by source() without another read"""
+        files = []
+        for i in range(3):
+            src = tmp_path / f"mod{i}.py"
+            src.write_text(f"x = {i}\n")
+            files.append(src)
+        ctx = AnalysisContext(cache_dir=tmp_path / "cache")
+        ctx.prefetch(files + [str(files[0])])
+        for future in list(ctx._pending.values()):
+            future.result()
+
+        def fail_read(*args, **kwargs):
+            raise AssertionError("file should not be read again")
+
+        monkeypatch.setattr(ast_cache.Path, "read_bytes", fail_read)
+        assert [ctx.source(f) for f in files] == [b"x = 0\n", b"x = 1\n", b"x = 2\n"]
+
+    def test_prefetch_error_raised_on_access(self, tmp_path):
+        """Test a failed background read surfaces from source()"""
+        ctx = AnalysisContext(cache_dir=tmp_path / "cache")
+        ctx.prefetch([tmp_path / "missing.py"])
+        with pytest.raises(FileNotFoundError):
+            ctx.source(tmp_path / "missing.py")
+
+    def test_syntax_error_reraised(self, tmp_path):
+        """Test a broken file raises SyntaxError on each access"""
+        src = tmp_path / "bad.py"
+        src.write_text("if:\n")
+        ctx = AnalysisContext(cache_dir=tmp_path / "cache")
+        for _ in range(2):
+            with pytest.raises(SyntaxError):
+                ctx.tree(src)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for plugins/code_metrics_plugin.py
+"""
+
+import ast
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import plugins.code_metrics_plugin as code_metrics_plugin
+from plugins.code_metrics_plugin import (
+    CodeMetricsPlugin,
+    MetricsVisitor,
+    analyze_file,
+    clear_cache,
+    count_lines,
+)
+from src.plugin_system import PluginConfig
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def complexity(code):
+    visitor = MetricsVisitor()
+    visitor.visit(ast.parse(code))
+    return visitor.complexity
+
+
+class TestCountLines:
+    """Test count_lines function"""
+
+    def test_trailing_newline(self):
+        """Test the empty line after a final newline counts as blank"""
+        assert count_lines(b"x = 1\n") == (1, 1, 0)
+
+    def test_no_trailing_newline(self):
+        """Test a last line without newline is still counted"""
+        assert count_lines(b"x = 1\n\n    # note") == (1, 1, 1)
+
+    def test_crlf(self):
+        """Test CRLF files classify lines like their LF equivalent"""
+        lf = b"import os\n\n# comment\n  \ndef f():\n    return 1\n"
+        assert count_lines(lf.replace(b"\n", b"\r\n")) == count_lines(lf) == (3, 3, 1)
+
+    def test_empty(self):
+        """Test an empty file is one blank line"""
+        assert count_lines(b"") == (0, 1, 0)
+
+
+class TestMetricsVisitor:
+    """Test MetricsVisitor complexity counting"""
+
+    def test_branches_in_function(self):
+        """Test if/for/while/with/except and extra BoolOp operands each count"""
+        code = (
+            "def f(a, b, c):\n"
+            "    if a and b and c:\n        pass\n"
+            "    for x in a:\n        pass\n"
+            "    while b:\n        pass\n"
+            "    with c:\n        pass\n"
+            "    try:\n        pass\n    except ValueError:\n        pass\n"
+        )
+        assert complexity(code) == 1 + 2 + 5
+
+    def test_nested_function_counted_once(self):
+        """Test an inner function's branches count once, not also for the outer one"""
+        code = (
+            "def outer(x):\n"
+            "    if x:\n        pass\n"
+            "    def inner(y):\n"
+            "        for i in y:\n"
+            "            if i or x:\n                pass\n"
+            "    return inner\n"
+        )
+        assert complexity(code) == 1 + 1 + 3
+
+    def test_module_level_branches_ignored(self):
+        """Test branches outside functions do not add complexity"""
+        assert complexity("if a:\n    pass\nfor b in c:\n    pass\n") == 1
+
+
+class TestAnalyzeFileMemo:
+    """Test analyze_file memoization"""
+
+    def test_unchanged_file_reused(self, tmp_path):
+        """Test an unchanged (old) file is served from the memo"""
+        src = tmp_path / "mod.py"
+        src.write_text("def f():\n    pass\n")
+        os.utime(src, ns=(1_000_000_000, 1_000_000_000))
+        first = analyze_file(str(src))
+        assert analyze_file(str(src)) is first
+
+    def test_changed_file_recomputed(self, tmp_path):
+        """Test editing a file invalidates its memo entry"""
+        src = tmp_path / "mod.py"
+        src.write_text("def f():\n    pass\n")
+        os.utime(src, ns=(1_000_000_000, 1_000_000_000))
+        assert analyze_file(str(src)).function_count == 1
+
+        src.write_text("def f():\n    pass\n\ndef g():\n    pass\n")
+        os.utime(src, ns=(2_000_000_000, 2_000_000_000))
+        assert analyze_file(str(src)).function_count == 2
+
+        src.write_text("class A:\n    pass\n")  # Fresh mtime: not memoized
+        metrics = analyze_file(str(src))
+        assert (metrics.function_count, metrics.class_count) == (0, 1)
+
+
+class TestExecute:
+    """Test CodeMetricsPlugin.execute"""
+
+    def test_serial_and_parallel_identical(self, tmp_path, monkeypatch):
+        """Test the in-process and parallel_map paths report the same data"""
+        files = []
+        for i in range(4):
+            src = tmp_path / f"mod{i}.py"
+            body = "".join(f"    if x > {j}:\n        return {j}\n" for j in range(i))
+            src.write_text(f'"""Mod {i}."""\nimport os\n\ndef f(x):\n{body}    return -1\n')
+            files.append(str(src))
+        files.append(str(tmp_path / "missing.py"))
+
+        serial = CodeMetricsPlugin().execute({"files": files})
+        clear_cache()
+
+        calls = []
+        real_parallel_map = code_metrics_plugin.parallel_map
+
+        def recording_parallel_map(*args, **kwargs):
+            calls.append(len(args[1]))
+            return real_parallel_map(*args, **kwargs)
+
+        monkeypatch.setattr(code_metrics_plugin, "parallel_map", recording_parallel_map)
+        plugin = CodeMetricsPlugin(PluginConfig(
+            settings={"parallel_min_files": 1, "max_workers": 2}))
+        parallel = plugin.execute({"files": files})
+
+        assert calls == [4]
+        assert parallel.data == serial.data
+        assert [f["complexity"] for f in serial.data["files"]] == [1, 2, 3, 4]
@@ -22,9 +22,14 @@ from code_smell_detector import (
     detect_deep_nesting,
     detect_god_class,
     detect_all_smells,
+    detect_smells_tree,
     get_smell_report,
+    format_smell_report,
+    detect_smells_batch,
     SmellConfig
 )
+import code_smell_detector
+from ast_cache import clear_memory_cache
 
 
 def test_long_function_detection():
@@ -257,6 +262,115 @@ class GodClass:
     print("="*50)
 
 
+def test_detect_smells_tree_matches_code():
+    """Parse edilmiş ağaç ile string API aynı sonucu vermeli"""
+    code = '''
+def many(a, b, c, d, e, f):
+    return a
+'''
+    from_tree = detect_smells_tree(ast.parse(code))
+    from_code = detect_all_smells(code)
+    
+    assert from_tree == from_code, "Ağaç ve string API aynı sonucu vermeli"
+    assert from_tree["total_smells"] == 1
+    
+    print(f"✅ detect_smells_tree: {from_tree['total_smells']} smell")
+
+
+def test_nested_functions_single_pass():
+    """İç fonksiyonun derinliği dıştakine eklenmeli, sonuçlar kaynak sırasında olmalı"""
+    code = '''
+def outer(a, b, c):
+    if a:
+        def inner(x, y, z):
+            for i in x:
+                if i:
+                    pass
+        return inner
+
+def last(a, b, c):
+    pass
+'''
+    tree = ast.parse(code)
+    nesting = detect_deep_nesting(tree, threshold=1)
+    params = detect_too_many_params(tree, threshold=2)
+    
+    assert [(s["name"], s["depth"]) for s in nesting] == [("outer", 3), ("inner", 2)]
+    assert [s["name"] for s in params] == ["outer", "inner", "last"]
+    assert detect_long_functions(tree, threshold=6)[0]["lines"] == 7
+    
+    # end_lineno olmayan (elle kurulmuş) fonksiyonlar da ölçülebilmeli
+    del tree.body[0].end_lineno
+    assert detect_long_functions(tree, threshold=6)[0]["lines"] == 7
+    
+    print("✅ Tek geçiş: iç içe fonksiyon derinliği ve kaynak sırası")
+
+
+def test_parse_cache_reused():
+    """Aynı kaynak ikinci kez parse edilmemeli"""
+    clear_memory_cache()
+    code = "def f(a, b, c, d, e, f, g):\n    pass\n"
+    calls = []
+    real_parse = code_smell_detector.ast.parse
+    
+    def counting_parse(*args, **kwargs):
+        calls.append(args)
+        return real_parse(*args, **kwargs)
+    
+    code_smell_detector.ast.parse = counting_parse
+    try:
+        first = detect_all_smells(code)
+        second = detect_all_smells(code, SmellConfig(too_many_params=10))
+        broken = [detect_all_smells("def (:") for _ in range(2)]
+    finally:
+        code_smell_detector.ast.parse = real_parse
+        clear_memory_cache()
+    
+    assert len(calls) == 2, "Geçerli ve hatalı kaynak birer kez parse edilmeli"
+    assert (first["total_smells"], second["total_smells"]) == (1, 0)
+    assert all("error" in result for result in broken)
+    
+    print("✅ Parse cache: aynı kaynak tek parse")
+
+
+def test_format_smell_report_reuses_result():
+    """Hazır sonuçtan üretilen rapor get_smell_report ile aynı olmalı"""
+    code = "def many(a, b, c, d, e, f):\n    return a\n"
+    smells = detect_all_smells(code)
+    
+    assert format_smell_report(smells) == get_smell_report(code)
+    assert format_smell_report(detect_all_smells("def (:")).startswith("❌")
+    
+    print("✅ format_smell_report: hazır sonuçtan rapor")
+
+
+def test_detect_smells_batch():
+    """Toplu tespit, sırayı koruyarak tek tek tespitle aynı sonucu vermeli"""
+    codes = [f"def f{i}({', '.join('p' + str(j) for j in range(i))}):\n    pass\n" for i in range(8)]
+    codes.append("def (:")
+    config = SmellConfig(too_many_params=3)
+    serial = [detect_all_smells(code, config) for code in codes]
+    
+    assert detect_smells_batch(codes, config) == serial
+    assert detect_smells_batch(codes, config, max_workers=2, min_parallel=1) == serial
+    
+    print(f"✅ Toplu tespit: {len(codes)} kaynak")
+
+
+def test_flat_module_short_circuit():
+    """Tanımsız modüller sıfır sonuç vermeli, bloklar içindeki tanımlar kaçmamalı"""
+    flat = '"""Paket."""\nimport os\nfrom x import y\n__all__ = ["y"]\n'
+    smells = detect_all_smells(flat)
+    assert smells["total_smells"] == 0
+    assert smells == detect_all_smells("")
+    assert smells["severity_counts"] == {"warning": 0, "error": 0}
+    
+    guarded = "try:\n    import x\nexcept ImportError:\n    def f(a, b, c, d, e, f, g):\n        pass\n"
+    assert len(detect_all_smells(guarded)["too_many_params"]) == 1
+    
+    print("✅ Düz modül kısa yolu: sıfır sonuç, korunan tanımlar bulundu")
+
+
 def run_all_tests():
     """Tüm testleri çalıştır"""
     print("🧪 Code Smell Detector Test Suite v1.0\n")
@@ -268,9 +382,15 @@ def run_all_tests():
         test_god_class_detection()
         test_smell_config_customization()
         test_get_smell_report()
+        test_detect_smells_tree_matches_code()
+        test_nested_functions_single_pass()
+        test_parse_cache_reused()
+        test_format_smell_report_reuses_result()
+        test_detect_smells_batch()
+        test_flat_module_short_circuit()
         
         print("\n" + "="*50)
-        print("✅ TÜM TESTLER BAŞARILI! 6/6 passed")
+        print("✅ TÜM TESTLER BAŞARILI! 12/12 passed")
         print("="*50)
         return True
         
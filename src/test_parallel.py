@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel.py
+"""
+
+import pytest
+
+from parallel import parallel_map
+
+
+class TestParallelMap:
+    """Test parallel_map helper"""
+
+    def test_small_batch_serial(self):
+        """Test small batches preserve order without a pool"""
+        assert parallel_map(len, ["a", "bb", "ccc"]) == [1, 2, 3]
+
+    def test_process_pool_preserves_order(self):
+        """Test pooled execution returns results in input order"""
+        items = ["x" * i for i in range(20)]
+        assert parallel_map(len, items, max_workers=2, min_parallel=1) == list(range(20))
+
+    def test_unpicklable_falls_back_to_serial(self, caplog):
+        """Test lambdas (not picklable) still run via serial fallback, with a warning"""
+        result = parallel_map(lambda x: x * 2, [1, 2, 3, 4], max_workers=2, min_parallel=1)
+        assert result == [2, 4, 6, 8]
+        assert "running serially" in caplog.text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -5,8 +5,11 @@ CopilotOpusAgent - Test Suite v1.0
 Aligned with actual PluginManager API
 """
 
+import os
 import pytest
 import sys
+import threading
+from pathlib import Path
 from datetime import datetime
 
 # Import from plugin_system
@@ -16,7 +19,8 @@ from plugin_system import (
     PluginPriority,
     PluginResult,
     PluginConfig,
-    HookPoint
+    HookPoint,
+    _discover_plugin_files
 )
 
 
@@ -229,6 +233,18 @@ class TestPluginBase:
         assert plugin.executed is True
         assert result.data["context"]["file"] == "test.py"
     
+    def test_default_config_copied_per_instance(self):
+        """Test mutating one instance's default config leaves others untouched"""
+        class Configured(DummyPlugin):
+            default_config = PluginConfig(settings={"threshold": 1})
+
+        first, second = Configured(), Configured()
+        first.config.enabled = False
+        first.config.settings["threshold"] = 2
+        assert second.config.enabled is True
+        assert second.config.settings["threshold"] == 1
+        assert Configured.default_config.settings == {"threshold": 1}
+    
     def test_dummy_plugin_cleanup(self):
         """Test plugin cleanup"""
         plugin = DummyPlugin()
@@ -277,14 +293,15 @@ class TestPluginManager:
         assert "DummyPlugin" in manager.plugins
     
     def test_plugins_property(self):
-        """Test plugins property returns copy"""
+        """Test plugins property returns a read-only view"""
         manager = PluginManager()
         plugin = DummyPlugin()
         manager.register_plugin(plugin)
         
         plugins = manager.plugins
-        assert isinstance(plugins, dict)
         assert "DummyPlugin" in plugins
+        with pytest.raises(TypeError):
+            plugins["Other"] = plugin
     
     def test_unregister_plugin(self):
         """Test unregistering a plugin"""
@@ -329,7 +346,32 @@ class TestPluginManager:
         # Disabled plugins should be skipped
         assert len(results) == 0
         assert plugin.executed is False
-    
+
+    def test_run_hook_config_toggle(self):
+        """Test re-enabling or disabling via plugin.config takes effect"""
+        manager = PluginManager()
+        plugin = DummyPlugin(PluginConfig(enabled=False))
+        manager.register_plugin(plugin)
+
+        plugin.config = PluginConfig(enabled=True)
+        assert len(manager.run_hook(HookPoint.POST_ANALYZE, {})) == 1
+        plugin.config = PluginConfig(enabled=False)
+        assert manager.run_hook(HookPoint.POST_ANALYZE, {}) == []
+
+    def test_run_hook_config_mutation(self):
+        """Test flipping config.enabled in place takes effect"""
+        manager = PluginManager()
+        plugin = DummyPlugin()
+        manager.register_plugin(plugin)
+
+        plugin.config.enabled = False
+        assert manager.run_hook(HookPoint.POST_ANALYZE, {}) == []
+        plugin.config.enabled = True
+        assert len(manager.run_hook(HookPoint.POST_ANALYZE, {})) == 1
+
+        manager.unregister_plugin("DummyPlugin")
+        plugin.config.enabled = False  # No longer reported to the manager
+
     def test_run_all(self):
         """Test running plugins for all hooks"""
         manager = PluginManager()
@@ -368,6 +410,261 @@ class TestPluginManagerAdvanced:
         low_config = PluginConfig(priority=PluginPriority.LOW)
         
         assert high_config.priority.value < low_config.priority.value
+    
+    def test_hook_registry_ordered_on_insert(self):
+        """Test registration keeps hooks sorted, equal priorities in arrival order"""
+        manager = PluginManager()
+        order = [("low", PluginPriority.LOW), ("first", PluginPriority.NORMAL),
+                 ("top", PluginPriority.HIGHEST), ("second", PluginPriority.NORMAL)]
+        
+        class Named(DummyPlugin):
+            def __init__(self, label, priority):
+                super().__init__(PluginConfig(priority=priority))
+                self.label = label
+            
+            @property
+            def name(self) -> str:
+                return self.label
+        
+        for name, priority in order:
+            manager.register_plugin(Named(name, priority))
+        
+        results = manager.run_hook(HookPoint.POST_ANALYZE, {})
+        assert [r.plugin_name for r in results] == ["top", "first", "second", "low"]
+    
+    def test_parallel_safe_plugins_run_concurrently(self):
+        """Test parallel_safe plugins overlap and still report in priority order"""
+        manager = PluginManager()
+        barrier = threading.Barrier(3, timeout=5)
+        
+        class Waiting(DummyPlugin):
+            def __init__(self, label, priority, hooks):
+                super().__init__(PluginConfig(priority=priority, hooks=hooks,
+                                              parallel_safe=True))
+                self.label = label
+            
+            @property
+            def name(self) -> str:
+                return self.label
+            
+            def execute(self, context: dict = None) -> PluginResult:
+                barrier.wait()  # Breaks (and fails) unless all three overlap
+                return super().execute(context)
+        
+        manager.register_plugin(Waiting("late", PluginPriority.LOW, [HookPoint.POST_ANALYZE]))
+        manager.register_plugin(Waiting("early", PluginPriority.HIGH, [HookPoint.POST_ANALYZE]))
+        manager.register_plugin(Waiting("pre", PluginPriority.NORMAL, [HookPoint.PRE_ANALYZE]))
+        
+        context = {}
+        results = manager.run_all(context)
+        assert [r.plugin_name for r in results[HookPoint.POST_ANALYZE]] == ["early", "late"]
+        assert [r.success for r in results[HookPoint.PRE_ANALYZE]] == [True]
+        
+        # Same caller-visible context as the serial path
+        serial_context = {}
+        serial_results = PluginManager().run_all(serial_context)
+        last = list(HookPoint)[-1]
+        assert context["hook"] is serial_context["hook"] is last
+        assert context["results"] is results[last]
+        assert serial_context["results"] is serial_results[last]
+    
+    def test_run_all_submits_only_active_hooks(self):
+        """Test hooks without enabled plugins are not run, just reported empty"""
+        manager = PluginManager()
+        
+        class PerHook(DummyPlugin):
+            def __init__(self, hook):
+                super().__init__(PluginConfig(hooks=[hook], parallel_safe=True))
+                self.label = hook.value
+            
+            @property
+            def name(self) -> str:
+                return self.label
+        
+        manager.register_plugin(PerHook(HookPoint.PRE_ANALYZE))
+        manager.register_plugin(PerHook(HookPoint.POST_ANALYZE))
+        
+        ran = []
+        run_hook = manager.run_hook
+        manager.run_hook = lambda hook, context: ran.append(hook) or run_hook(hook, context)
+        
+        results = manager.run_all({})
+        assert sorted(ran, key=list(HookPoint).index) == [HookPoint.PRE_ANALYZE,
+                                                          HookPoint.POST_ANALYZE]
+        assert list(results) == list(HookPoint)
+        assert results[HookPoint.ON_COMMIT] == []
+    
+    def test_process_pool_plugins_never_threaded(self):
+        """Test plugins that use a process pool run serially even if parallel_safe"""
+        manager = PluginManager()
+        threads = []
+        
+        class Forking(DummyPlugin):
+            uses_process_pool = True
+            
+            def __init__(self, label, hooks):
+                super().__init__(PluginConfig(hooks=hooks, parallel_safe=True))
+                self.label = label
+            
+            @property
+            def name(self) -> str:
+                return self.label
+            
+            def execute(self, context: dict = None) -> PluginResult:
+                threads.append(threading.current_thread())
+                return super().execute(context)
+        
+        manager.register_plugin(Forking("a", [HookPoint.POST_ANALYZE]))
+        manager.register_plugin(Forking("b", [HookPoint.POST_ANALYZE]))
+        manager.register_plugin(Forking("c", [HookPoint.PRE_ANALYZE]))
+        manager.run_all({})
+        assert threads == [threading.main_thread()] * 3
+
+
+class TestLazyPlugins:
+    """Test plugins registered with a factory"""
+    
+    def test_built_on_first_matching_hook(self):
+        """Test the factory runs once, only when a hook it is registered for fires"""
+        manager = PluginManager()
+        built = []
+        
+        def factory():
+            built.append(1)
+            return DummyPlugin()
+        
+        assert manager.register_lazy("DummyPlugin", factory)
+        assert not manager.register_lazy("DummyPlugin", factory)
+        assert manager.run_hook(HookPoint.PRE_ANALYZE, {}) == []
+        assert built == [] and manager.plugin_count == 0
+        
+        first = manager.run_hook(HookPoint.POST_ANALYZE, {})
+        second = manager.run_hook(HookPoint.POST_ANALYZE, {})
+        assert [r.plugin_name for r in first + second] == ["DummyPlugin"] * 2
+        assert built == [1]
+        assert manager.plugins["DummyPlugin"].executed
+    
+    def test_keeps_priority_position(self):
+        """Test a lazy plugin runs in its declared priority slot"""
+        manager = PluginManager()
+        manager.register_plugin(FailingPlugin(PluginConfig(priority=PluginPriority.LOW)))
+        manager.register_lazy("DummyPlugin", DummyPlugin, priority=PluginPriority.HIGH)
+        results = manager.run_hook(HookPoint.POST_ANALYZE, {})
+        assert [r.plugin_name for r in results] == ["DummyPlugin", "FailingPlugin"]
+    
+    def test_unregister_before_build(self):
+        """Test an unbuilt lazy plugin can be removed without constructing it"""
+        manager = PluginManager()
+        
+        def factory():
+            raise AssertionError("factory should not run")
+        
+        manager.register_lazy("Never", factory)
+        assert manager.unregister_plugin("Never")
+        assert manager.run_hook(HookPoint.POST_ANALYZE, {}) == []
+
+
+class TestLoadPlugins:
+    """Test plugin discovery and module reuse"""
+    
+    PLUGIN_SOURCE = """
+import builtins
+from plugin_system import PluginBase, PluginResult
+
+builtins._plugin_exec_count = getattr(builtins, "_plugin_exec_count", 0) + 1
+
+
+class CountedPlugin(PluginBase):
+    name = "CountedPlugin"
+    version = "{version}"
+    description = "Counts module executions"
+
+    def execute(self, context):
+        return PluginResult(success=True, plugin_name=self.name,
+                            plugin_version=self.version, message="ok")
+"""
+    
+    def test_unchanged_file_not_reexecuted(self, tmp_path):
+        """Test a second load reuses the module; an edit reloads it"""
+        import builtins
+        builtins._plugin_exec_count = 0
+        plugin_file = tmp_path / "counted_plugin.py"
+        plugin_file.write_text(self.PLUGIN_SOURCE.format(version="1.0.0"))
+        try:
+            assert PluginManager().load_plugins(str(tmp_path)) == 1
+            manager = PluginManager()
+            assert manager.load_plugins(str(tmp_path)) == 1
+            assert builtins._plugin_exec_count == 1
+            assert sys.modules["agent_nexus_plugins.counted_plugin"].CountedPlugin is \
+                type(manager.plugins["CountedPlugin"])
+            
+            plugin_file.write_text(self.PLUGIN_SOURCE.format(version="1.0.10"))
+            manager = PluginManager()
+            assert manager.load_plugins(str(tmp_path)) == 1
+            assert builtins._plugin_exec_count == 2
+            assert manager.plugins["CountedPlugin"].version == "1.0.10"
+        finally:
+            del builtins._plugin_exec_count
+            sys.modules.pop("agent_nexus_plugins.counted_plugin", None)
+    
+    def test_stem_does_not_shadow_stdlib(self, tmp_path):
+        """Test a plugin file named like a stdlib module leaves that module alone"""
+        import json
+        (tmp_path / "json.py").write_text("LOADED = True\n")
+        try:
+            PluginManager().load_plugins(str(tmp_path))
+            assert sys.modules["json"] is json
+            assert sys.modules["agent_nexus_plugins.json"].LOADED
+        finally:
+            sys.modules.pop("agent_nexus_plugins.json", None)
+    
+    def test_failed_import_not_left_registered(self, tmp_path):
+        """Test a plugin raising at import time is removed from sys.modules"""
+        (tmp_path / "broken_plugin.py").write_text("raise RuntimeError('boom')\n")
+        assert PluginManager().load_plugins(str(tmp_path)) == 0
+        assert "agent_nexus_plugins.broken_plugin" not in sys.modules
+    
+    def test_foreign_module_not_replaced(self, tmp_path):
+        """Test a sys.modules entry the loader did not create is never overwritten"""
+        import types
+        foreign = types.ModuleType("agent_nexus_plugins.taken")
+        sys.modules[foreign.__name__] = foreign
+        (tmp_path / "taken.py").write_text(self.PLUGIN_SOURCE.format(version="1.0.0"))
+        try:
+            assert PluginManager().load_plugins(str(tmp_path)) == 0
+            assert sys.modules[foreign.__name__] is foreign
+        finally:
+            sys.modules.pop(foreign.__name__, None)
+    
+    def test_reuse_does_not_replace_foreign_module(self, tmp_path):
+        """Test reusing a cached module still refuses to displace a foreign entry"""
+        import types
+        (tmp_path / "reused_plugin.py").write_text("LOADED = True\n")
+        name = "agent_nexus_plugins.reused_plugin"
+        try:
+            PluginManager().load_plugins(str(tmp_path))
+            foreign = sys.modules[name] = types.ModuleType(name)
+            PluginManager().load_plugins(str(tmp_path))
+            assert sys.modules[name] is foreign
+        finally:
+            sys.modules.pop(name, None)
+    
+    def test_directory_listing_reused(self, tmp_path, monkeypatch):
+        """Test an unchanged directory is not re-globbed; a new file is found"""
+        (tmp_path / "a.py").write_text("")
+        (tmp_path / "_private.py").write_text("")
+        os.utime(tmp_path, ns=(1_000_000_000, 1_000_000_000))
+        assert [f.name for f in _discover_plugin_files(tmp_path)] == ["a.py"]
+        
+        def fail_glob(*args, **kwargs):
+            raise AssertionError("directory should not be globbed again")
+        
+        with monkeypatch.context() as m:
+            m.setattr(Path, "glob", fail_glob)
+            assert [f.name for f in _discover_plugin_files(tmp_path)] == ["a.py"]
+        
+        (tmp_path / "b.py").write_text("")
+        assert sorted(f.name for f in _discover_plugin_files(tmp_path)) == ["a.py", "b.py"]
 
 
 if __name__ == "__main__":
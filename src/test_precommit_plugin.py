@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Tests for plugins/precommit_plugin.py
+"""
+
+import ast
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import plugins.precommit_plugin as precommit_plugin
+import src.ast_cache
+from plugins.precommit_plugin import PrecommitPlugin, find_unresolved_imports
+from src.plugin_system import PluginConfig
+
+
+def unresolved(code, base_dir):
+    return find_unresolved_imports(ast.parse(code), base_dir)
+
+
+def make_plugin(**settings):
+    """Plugin running only the import check, without the pass cache"""
+    defaults = {"check_code_smells": False, "check_security": False,
+                "skip_passed_files": False}
+    return PrecommitPlugin(PluginConfig(settings={**defaults, **settings}))
+
+
+class TestFindUnresolvedImports:
+    """Test find_unresolved_imports function"""
+
+    def test_missing_module_reported(self, tmp_path):
+        """Test an unguarded import of an unknown module is reported"""
+        code = "import os\nimport no_such_module_xyz.sub\n"
+        assert unresolved(code, tmp_path) == [(2, "no_such_module_xyz.sub")]
+
+    def test_main_and_builtins_resolvable(self, tmp_path):
+        """Test __main__ and built-in modules (no spec lookup) always resolve"""
+        builtin = sorted(sys.builtin_module_names)[0]
+        assert unresolved(f"import __main__\nimport sys\nimport {builtin}\n", tmp_path) == []
+
+    def test_platform_guards_skipped(self, tmp_path):
+        """Test imports under sys.platform / os.name / sys.version_info tests are skipped"""
+        code = (
+            "import os, sys\n"
+            "if sys.platform == 'win32':\n    import winreg_xyz\n"
+            "else:\n    import posix_xyz\n"
+            "if os.name == 'nt':\n    from nt_xyz import x\n"
+            "if sys.version_info < (3, 11):\n    import tomli_xyz\n"
+            "if sys.platform.startswith('java'):\n    import java.lang\n"
+        )
+        assert unresolved(code, tmp_path) == []
+
+    def test_other_ifs_still_checked(self, tmp_path):
+        """Test an ordinary if block does not hide a missing import"""
+        code = "DEBUG = True\nif DEBUG:\n    import no_such_debug_xyz\n"
+        assert unresolved(code, tmp_path) == [(3, "no_such_debug_xyz")]
+
+    def test_import_error_guard_and_siblings(self, tmp_path):
+        """Test try/except ImportError blocks and sibling modules are accepted"""
+        (tmp_path / "helper_xyz.py").write_text("")
+        code = ("try:\n    import fast_xyz\nexcept ImportError:\n    fast_xyz = None\n"
+                "import helper_xyz\nfrom . import anything\n")
+        assert unresolved(code, tmp_path) == []
+
+
+class TestImportCheck:
+    """Test the import check's effect on the gate"""
+
+    def test_unresolved_import_is_warning(self, tmp_path):
+        """Test an unresolved import is reported but does not fail the gate"""
+        src = tmp_path / "mod.py"
+        src.write_text("import no_such_module_xyz\n")
+        result = make_plugin().execute({"files": [str(src)]})
+        assert result.success is True
+        assert result.errors == []
+        assert any("unresolved import 'no_such_module_xyz'" in line
+                   for line in result.data["summary"])
+
+    def test_unparseable_file_fails(self, tmp_path):
+        """Test a file that does not parse still fails the import check"""
+        src = tmp_path / "bad.py"
+        src.write_text("def broken(:\n")
+        result = make_plugin(check_syntax=False).execute({"files": [str(src)]})
+        assert result.success is False
+        assert result.errors == ["1 error(s)"]
+
+
+class TestAdvisoryChecks:
+    """Test smell and security findings only block when configured to"""
+
+    CODE = "def run(expr):\n    return eval(expr)\n"
+
+    def test_security_warns_by_default(self, tmp_path):
+        """Test a critical finding is a warning unless block_on_security is set"""
+        src = tmp_path / "mod.py"
+        src.write_text(self.CODE)
+        result = make_plugin(check_security=True).execute({"files": [str(src)]})
+        assert result.success is True
+        assert any("(not blocking)" in line for line in result.data["summary"])
+
+        result = make_plugin(check_security=True, block_on_security=True).execute(
+            {"files": [str(src)]})
+        assert result.success is False
+        assert result.errors == ["1 issue(s)"]
+
+    def test_smells_warn_by_default(self, tmp_path):
+        """Test smells are warnings unless block_on_smells is set"""
+        src = tmp_path / "mod.py"
+        body = "".join(f"    x{i} = {i}\n" for i in range(60))
+        src.write_text(f"def long_function():\n{body}")
+        plugin = make_plugin(check_code_smells=True)
+        assert plugin.check_code_smells([str(src)]).passed is True
+
+        plugin = make_plugin(check_code_smells=True, block_on_smells=True)
+        assert plugin.check_code_smells([str(src)]).passed is False
+
+
+class TestPassCache:
+    """Test unchanged files that passed are skipped on the next run"""
+
+    @pytest.fixture
+    def cache_file(self, tmp_path, monkeypatch):
+        cache_file = tmp_path / "cache" / "precommit.json"
+        monkeypatch.setattr(precommit_plugin, "PASS_CACHE_FILE", cache_file)
+        return cache_file
+
+    @pytest.fixture
+    def checked(self, monkeypatch):
+        """Paths handed to check_file, per run"""
+        checked = []
+        real_check_file = precommit_plugin.check_file
+
+        def recording_check_file(filepath, *args, **kwargs):
+            checked.append(os.path.basename(filepath.path))
+            return real_check_file(filepath, *args, **kwargs)
+
+        monkeypatch.setattr(precommit_plugin, "check_file", recording_check_file)
+        return checked
+
+    @staticmethod
+    def run(plugin, *files):
+        return plugin.execute({"files": [str(f) for f in files]})
+
+    def test_passed_file_skipped(self, tmp_path, cache_file, checked):
+        """Test a file that passed is not checked again while unchanged"""
+        src = tmp_path / "ok.py"
+        src.write_text("x = 1\n")
+        plugin = make_plugin(skip_passed_files=True)
+        assert self.run(plugin, src).success
+        assert self.run(plugin, src).success
+        assert checked == ["ok.py"]
+        assert os.path.abspath(src) in json.loads(cache_file.read_text())
+
+    def test_edit_invalidates(self, tmp_path, cache_file, checked):
+        """Test editing a file makes it checked (and able to fail) again"""
+        src = tmp_path / "ok.py"
+        src.write_text("x = 1\n")
+        plugin = make_plugin(skip_passed_files=True)
+        self.run(plugin, src)
+        src.write_text("def broken(:\n")
+        assert self.run(plugin, src).success is False
+        assert checked == ["ok.py", "ok.py"]
+
+    def test_checks_and_version_invalidate(self, tmp_path, cache_file, checked):
+        """Test entries only count for the same enabled checks and plugin version"""
+        src = tmp_path / "ok.py"
+        src.write_text("x = 1\n")
+        self.run(make_plugin(skip_passed_files=True), src)
+        self.run(make_plugin(skip_passed_files=True, check_imports=False), src)
+
+        class NewerPlugin(PrecommitPlugin):
+            @property
+            def version(self) -> str:
+                return "9.9.9"
+
+        newer = NewerPlugin(make_plugin(skip_passed_files=True, check_imports=False).config)
+        self.run(newer, src)
+        self.run(newer, src)
+        assert checked == ["ok.py"] * 3
+
+    def test_failing_file_not_recorded(self, tmp_path, cache_file, checked):
+        """Test a failing file is re-checked on every run"""
+        ok, bad = tmp_path / "ok.py", tmp_path / "bad.py"
+        ok.write_text("x = 1\n")
+        bad.write_text("def broken(:\n")
+        plugin = make_plugin(skip_passed_files=True)
+        assert self.run(plugin, ok, bad).success is False
+        assert self.run(plugin, ok, bad).success is False
+        assert checked == ["ok.py", "bad.py", "bad.py"]
+        assert os.path.abspath(bad) not in json.loads(cache_file.read_text())
+
+    @pytest.mark.parametrize("content", ["{not json", "[1, 2]", ""])
+    def test_corrupt_cache_ignored(self, tmp_path, cache_file, checked, content):
+        """Test an unreadable cache is treated as empty and rewritten"""
+        cache_file.parent.mkdir()
+        cache_file.write_text(content)
+        src = tmp_path / "ok.py"
+        src.write_text("x = 1\n")
+        assert self.run(make_plugin(skip_passed_files=True), src).success
+        assert checked == ["ok.py"]
+        assert os.path.abspath(src) in json.loads(cache_file.read_text())
+
+    def test_default_location_per_user(self):
+        """Test the default cache lives in the per-user cache dir, not the checkout"""
+        assert precommit_plugin.PASS_CACHE_FILE.is_absolute()
+        assert precommit_plugin.PASS_CACHE_FILE.parent == src.ast_cache.USER_CACHE_DIR
+
+    def test_foreign_owned_cache_ignored(self, tmp_path, cache_file, checked, monkeypatch):
+        """Test entries in a cache file owned by another user are not trusted"""
+        src_file = tmp_path / "ok.py"
+        src_file.write_text("x = 1\n")
+        self.run(make_plugin(skip_passed_files=True), src_file)
+        monkeypatch.setattr(src.ast_cache, "_OWNER_UID", cache_file.stat().st_uid + 1)
+        self.run(make_plugin(skip_passed_files=True), src_file)
+        assert checked == ["ok.py", "ok.py"]
@@ -16,10 +16,15 @@ Katkıda Bulunanlar:
 """
 
 import ast
+import re
+import security_analyzer
+from ast_cache import clear_memory_cache
 from security_analyzer import (
     analyze_security,
+    analyze_security_tree,
     get_security_report,
-    SecurityConfig
+    SecurityConfig,
+    SecurityVisitor,
 )
 
 
@@ -354,6 +359,66 @@ def safe_function(data):
     print(f"✅ Safe code: 0 issues as expected")
 
 
+def test_analyze_security_tree_matches_code():
+    """Parse edilmiş ağaç ile string API aynı sonucu vermeli"""
+    code = '''
+import pickle
+data = pickle.loads(payload)
+'''
+    from_tree = analyze_security_tree(ast.parse(code))
+    from_code = analyze_security(code)
+    
+    assert from_tree == from_code, "Ağaç ve string API aynı sonucu vermeli"
+    assert len(from_tree['risky_calls']) == 1
+    
+    print(f"✅ analyze_security_tree: {from_tree['total_issues']} issue")
+
+
+def test_secret_patterns_compiled_once():
+    """Secret pattern'leri config başına bir kez, tek regex olarak derlenmeli"""
+    first = SecurityVisitor(SecurityConfig()).match_secret
+    assert SecurityVisitor(SecurityConfig()).match_secret is first
+    assert isinstance(first.__self__, re.Pattern)  # Birleşik regex'in match'i
+    
+    custom = SecurityConfig(secret_patterns=[re.compile(r'db_pass', re.I), r'(?i)signing'])
+    result = analyze_security('DB_PASS = "hunter2hunter2"\nSIGNING = "abcdefgh"\n', custom)
+    assert len(result['hardcoded_secrets']) == 2
+    
+    # Geri referanslı pattern birleştirilemez; sırayla denenir
+    backref = SecurityConfig(secret_patterns=[r'(?i)(ab)\1_key', r'token'])
+    result = analyze_security('ABab_key = "abcdefgh"\ntoken = "abcdefgh"\nabx_key = "abcdefgh"\n', backref)
+    assert [i['variable'] for i in result['hardcoded_secrets']] == ['ABab_key', 'token']
+    
+    print("✅ Secret pattern'leri: tek derleme, birleşik regex")
+
+
+def test_parse_cache_reused():
+    """Aynı kaynak ikinci kez parse edilmemeli"""
+    clear_memory_cache()
+    code = "import pickle\ndata = pickle.loads(payload)\n"
+    calls = []
+    real_parse = security_analyzer.ast.parse
+    
+    def counting_parse(*args, **kwargs):
+        calls.append(args)
+        return real_parse(*args, **kwargs)
+    
+    security_analyzer.ast.parse = counting_parse
+    try:
+        first = analyze_security(code)
+        second = analyze_security(code, SecurityConfig(risky_modules={}))
+        broken = [analyze_security("def (:") for _ in range(2)]
+    finally:
+        security_analyzer.ast.parse = real_parse
+        clear_memory_cache()
+    
+    assert len(calls) == 2, "Geçerli ve hatalı kaynak birer kez parse edilmeli"
+    assert (first["total_issues"], second["total_issues"]) == (1, 0)
+    assert all("error" in result for result in broken)
+    
+    print("✅ Parse cache: aynı kaynak tek parse")
+
+
 def run_all_tests():
     """Tüm testleri çalıştır"""
     print("🔒 Security Analyzer Test Suite v1.0\n")
@@ -380,11 +445,14 @@ def run_all_tests():
         test_syntax_error_handling()
         test_import_alias()
         test_safe_code_zero_issues()
+        test_analyze_security_tree_matches_code()
+        test_secret_patterns_compiled_once()
+        test_parse_cache_reused()
         
         print("\n" + "="*50)
-        print("✅ TÜM TESTLER BAŞARILI! 14/14 passed")
+        print("✅ TÜM TESTLER BAŞARILI! 17/17 passed")
         print("  - 7 temel test ✅")
-        print("  - 7 edge case test ✅")
+        print("  - 10 edge case test ✅")
         print("="*50)
         return True
         
@@ -2,22 +2,27 @@ import time
 import subprocess
 import os
 import sys
-import datetime
 import random
 import re
-from src.ast_analyzer import analyze_python_changes
-from src.code_smell_detector import detect_all_smells, get_smell_report
+import mmap
+from src.ast_analyzer import compare_python_code
+from src.code_smell_detector import detect_all_smells, format_smell_report
 from src.security_analyzer import analyze_security, get_security_report
+from src.monitor import get_local_head, get_remote_head
 
 MY_AGENT_NAME = "WatcherAgent"
 LOG_PATH = "communication/general.md"
+OWN_TAG = f"[{MY_AGENT_NAME}]"  # Tags this agent's own log lines
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PUSH_COOLDOWN = 20  # seconds
+POLL_INTERVAL = 2  # seconds; doubles on each idle tick up to IDLE_POLL_MAX
+IDLE_POLL_MAX = 30
 
 class WatcherState:
     def __init__(self):
         self.last_push_time = 0
         self.reply_buffer = []
-        self.local_head_sha = subprocess.getoutput("git rev-parse HEAD").strip()
+        self.local_head_sha = get_local_head()
         self.last_read_log_size = 0
         
         # Initialize log size if exists
@@ -29,74 +34,110 @@ class WatcherState:
 
 state = WatcherState()
 
-def get_remote_head():
-    try:
-        output = subprocess.check_output(["git", "ls-remote", "origin", "HEAD"], text=True)
-        if output:
-            return output.split()[0]
-    except Exception as e:
-        print(f"Error checking remote: {e}")
-    return None
-
 def fetch_origin():
-    subprocess.run(["git", "fetch", "origin"], check=True, capture_output=True)
+    subprocess.run(["git", "fetch", "--quiet", "origin"], check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
 def get_diff_files(old_sha, new_sha):
-    cmd = ["git", "diff", "--name-only", f"{old_sha}..{new_sha}"]
-    return subprocess.getoutput(" ".join(cmd)).splitlines()
+    # NUL-separated names: no shell, no quoting of unusual paths
+    cmd = ["git", "diff", "--name-only", "-z", f"{old_sha}..{new_sha}"]
+    output = subprocess.run(cmd, capture_output=True, text=True, errors="replace").stdout
+    return [name for name in output.split("\0") if name]
+
+def get_diff_stat(filename, old_sha, new_sha):
+    # Added/deleted line counts from --numstat (one short line) instead of the full diff
+    cmd = ["git", "diff", "--numstat", f"{old_sha}..{new_sha}", "--", filename]
+    output = subprocess.run(cmd, capture_output=True, text=True, errors="replace").stdout
+    parts = output.split("\t", 2)
+    if len(parts) < 3:
+        return 0, 0
+    # Binary files are reported as "-\t-"
+    return (int(parts[0]) if parts[0].isdigit() else 0,
+            int(parts[1]) if parts[1].isdigit() else 0)
+
+class GitBlobReader:
+    """Reads file contents at a commit through one long-running `git cat-file --batch`."""
+
+    def __init__(self):
+        self._proc = None
+
+    def _start(self):
+        # Started lazily so it runs in the repo root monitor() switches to
+        self._proc = subprocess.Popen(["git", "cat-file", "--batch"],
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, sha, filename):
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
+        proc = self._proc
+        proc.stdin.write(f"{sha}:{filename}\n".encode())
+        proc.stdin.flush()
+        # "<oid> blob <size>" or "<name> missing"
+        header = proc.stdout.readline().split()
+        if len(header) != 3:
+            if not header:
+                self.close()  # Process died; restart on next read
+            return None
+        data = proc.stdout.read(int(header[2]) + 1)[:-1]  # Trailing newline
+        return data.decode("utf-8", errors="replace") if header[1] == b"blob" else None
+
+    def close(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+blob_reader = GitBlobReader()
 
 def get_file_content_at_sha(filename, sha):
     try:
-        return subprocess.getoutput(f"git show {sha}:{filename}")
+        return blob_reader.read(sha, filename)
     except:
+        blob_reader.close()
         return None
 
 def analyze_changes(filename, old_sha, new_sha):
-    diff = subprocess.getoutput(f"git diff {old_sha}..{new_sha} -- {filename}")
+    additions, deletions = get_diff_stat(filename, old_sha, new_sha)
     old_code = get_file_content_at_sha(filename, old_sha)
     new_code = get_file_content_at_sha(filename, new_sha)
     
-    lines = diff.splitlines()
-    additions = sum(1 for l in lines if l.startswith("+") and not l.startswith("+++"))
-    deletions = sum(1 for l in lines if l.startswith("-") and not l.startswith("---"))
-    
     report = f"1) Özet:\n- Değişen dosyalar: {filename}\n- Diff özeti: +{additions} / -{deletions}\n"
     report += "2) Teknik Bulgular:\n"
     
     if filename.endswith(".py") and old_code and new_code:
-        ast_result = analyze_python_changes(old_code, new_code)
+        ast_result = compare_python_code(old_code, new_code)
         if ast_result:
-            if ast_result['added_functions']:
-                report += f"- Eklenen fonksiyonlar: {', '.join(ast_result['added_functions'])}\n"
-            if ast_result['removed_functions']:
-                report += f"- Silinen fonksiyonlar: {', '.join(ast_result['removed_functions'])}\n"
-            if ast_result['modified_functions']:
-                report += f"- Değiştirilen fonksiyonlar: {', '.join(ast_result['modified_functions'])}\n"
+            if ast_result.added_functions:
+                report += f"- Eklenen fonksiyonlar: {', '.join(sorted(ast_result.added_functions))}\n"
+            if ast_result.removed_functions:
+                report += f"- Silinen fonksiyonlar: {', '.join(sorted(ast_result.removed_functions))}\n"
+            if ast_result.modified_functions:
+                report += f"- Değiştirilen fonksiyonlar: {', '.join(sorted(ast_result.modified_functions))}\n"
             # Class method değişiklikleri - NexusPilotAgent tarafından eklendi
-            if ast_result.get('method_changes'):
+            if ast_result.method_changes:
                 report += "- Class method değişiklikleri:\n"
-                for class_name, changes in ast_result['method_changes'].items():
+                for class_name, changes in ast_result.method_changes.items():
                     if changes.get('added'):
                         report += f"  • {class_name}.{', '.join(changes['added'])}() eklendi\n"
                     if changes.get('removed'):
                         report += f"  • {class_name}.{', '.join(changes['removed'])}() silindi\n"
             # Import değişiklikleri
-            if ast_result.get('added_imports'):
-                report += f"- Eklenen importlar: {', '.join(ast_result['added_imports'])}\n"
-            if ast_result.get('removed_imports'):
-                report += f"- Silinen importlar: {', '.join(ast_result['removed_imports'])}\n"
+            if ast_result.added_imports:
+                report += f"- Eklenen importlar: {', '.join(sorted(ast_result.added_imports))}\n"
+            if ast_result.removed_imports:
+                report += f"- Silinen importlar: {', '.join(sorted(ast_result.removed_imports))}\n"
             # Decorator değişiklikleri - NexusPilotAgent tarafından eklendi (v2.2)
-            if ast_result.get('decorator_changes'):
+            if ast_result.decorator_changes:
                 report += "- Decorator değişiklikleri:\n"
-                for name, changes in ast_result['decorator_changes'].items():
+                for name, changes in ast_result.decorator_changes.items():
                     if changes.get('added'):
                         report += f"  • {name}() → {', '.join(changes['added'])} eklendi\n"
                     if changes.get('removed'):
                         report += f"  • {name}() → {', '.join(changes['removed'])} silindi\n"
             # Docstring değişiklikleri - NexusPilotAgent tarafından eklendi (v2.3)
-            if ast_result.get('docstring_changes'):
+            if ast_result.docstring_changes:
                 report += "- Docstring değişiklikleri:\n"
-                for name, changes in ast_result['docstring_changes'].items():
+                for name, changes in ast_result.docstring_changes.items():
                     if changes.get('old') is None:
                         report += f"  • {name}() → Docstring eklendi\n"
                     elif changes.get('new') is None:
@@ -104,16 +145,16 @@ def analyze_changes(filename, old_sha, new_sha):
                     else:
                         report += f"  • {name}() → Docstring güncellendi\n"
             # Complexity değişiklikleri - NexusPilotAgent tarafından eklendi (v3.0)
-            if ast_result.get('complexity_changes'):
+            if ast_result.complexity_changes:
                 has_warnings = any(
                     data.get('delta') and data['delta'] > 0 
-                    for data in ast_result['complexity_changes'].values()
+                    for data in ast_result.complexity_changes.values()
                 )
                 if has_warnings:
                     report += "⚠️ Complexity Değişiklikleri:\n"
                 else:
                     report += "- Complexity Değişiklikleri:\n"
-                for name, data in ast_result['complexity_changes'].items():
+                for name, data in ast_result.complexity_changes.items():
                     if data.get('old') is None:
                         # Yeni fonksiyon
                         report += f"  • {name}() → Yeni (complexity: {data['new']}) {data['level']}\n"
@@ -127,16 +168,16 @@ def analyze_changes(filename, old_sha, new_sha):
                         # Karmaşıklık azaldı
                         report += f"  • {name}() → {data['old']} → {data['new']} ({data['delta']}) {data['level']} İyileşme!\n"
             # Type annotation değişiklikleri - OpusAgent tarafından eklendi (v3.1)
-            if ast_result.get('type_annotation_changes'):
+            if ast_result.type_annotation_changes:
                 has_improvements = any(
                     data.get('delta', 0) > 0 
-                    for data in ast_result['type_annotation_changes'].values()
+                    for data in ast_result.type_annotation_changes.values()
                 )
                 if has_improvements:
                     report += "📝 Type Annotation İyileştirmeleri:\n"
                 else:
                     report += "- Type Annotation Değişiklikleri:\n"
-                for name, data in ast_result['type_annotation_changes'].items():
+                for name, data in ast_result.type_annotation_changes.items():
                     if data.get('is_new_function'):
                         coverage_emoji = "🟢" if data['new_coverage'] == 100 else "🟡" if data['new_coverage'] > 50 else "🔴"
                         report += f"  • {name}() → Yeni (coverage: {data['new_coverage']}%) {coverage_emoji}\n"
@@ -157,7 +198,7 @@ def analyze_changes(filename, old_sha, new_sha):
             smells = detect_all_smells(new_code)
             if smells and smells.get("total_smells", 0) > 0:
                 report += f"\n👃 Code Smell Tespiti ({smells['total_smells']} sorun):\n"
-                smell_details = get_smell_report(new_code)
+                smell_details = format_smell_report(smells)
                 for line in smell_details.split('\n'):
                     if line.strip() and not line.startswith('👃'):
                         report += f"  {line}\n"
@@ -182,23 +223,31 @@ def analyze_changes(filename, old_sha, new_sha):
     
     return report
 
+def find_last_message(path):
+    # Scan backwards over a read-only mapping instead of reading every line of the log;
+    # only the tail up to the last message line is touched
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            while end > 0:
+                start = mm.rfind(b"\n", 0, end) + 1
+                line = mm[start:end].decode("utf-8", errors="replace")
+                if line.strip() and "]:" in line:
+                    return line
+                end = start - 1
+    return None
+
 def check_missed_messages():
     print("Checking for missed messages...")
     try:
         if not os.path.exists(LOG_PATH):
             return
             
-        with open(LOG_PATH, 'r') as f:
-            lines = f.readlines()
-            
-        # Find last message
-        last_msg = None
-        for line in reversed(lines):
-            if line.strip() and "]:" in line:
-                last_msg = line
-                break
+        last_msg = find_last_message(LOG_PATH)
                 
-        if last_msg and f"[{MY_AGENT_NAME}]" not in last_msg:
+        if last_msg and OWN_TAG not in last_msg:
             # Last message was NOT from me. Did it target me?
             parts = last_msg.split("]:", 1)
             if len(parts) > 1:
@@ -219,7 +268,7 @@ def generate_reply(sender, message):
     msg_lower = message.lower()
     
     # Check trigger
-    is_directed = f"@{MY_AGENT_NAME.lower()}" in msg_lower or "watcher" in msg_lower
+    is_directed = "watcher" in msg_lower  # Also covers the "@watcheragent" mention
     is_question = "?" in message
     
     if not (is_directed or is_question):
@@ -244,7 +293,7 @@ def generate_reply(sender, message):
     return None
 
 def buffer_reply(reply):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
     entry = f"\n[{timestamp}] [{MY_AGENT_NAME}]: {reply}"
     state.reply_buffer.append(entry)
     print(f" >>> Buffered Reply: {reply}")
@@ -265,18 +314,19 @@ def flush_buffer_if_needed(force=False):
         print(f"Attempting to flush buffer (Force={force}, CanPush={can_push})...")
         try:
             # 1. Fetch first
-            subprocess.run(["git", "fetch", "origin"], check=True, capture_output=True)
+            fetch_origin()
             
             # 2. Rebase to ensure we are up to date
             rebase_res = subprocess.run(["git", "rebase", "origin/master"], capture_output=True, text=True)
             if rebase_res.returncode != 0:
                 print(f"Rebase failed before write: {rebase_res.stderr}")
-                subprocess.run(["git", "rebase", "--abort"], capture_output=True)
+                subprocess.run(["git", "rebase", "--abort"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 # If we can't rebase, we can't push safely. Retry next loop.
                 return
 
             # Update head state after rebase
-            state.local_head_sha = subprocess.getoutput("git rev-parse HEAD").strip()
+            state.local_head_sha = get_local_head()
 
             # 3. Write buffer
             with open(LOG_PATH, "a") as f:
@@ -294,7 +344,7 @@ def flush_buffer_if_needed(force=False):
                 print("Push successful.")
                 state.reply_buffer = [] # Clear only on success
                 state.last_push_time = time.time()
-                state.local_head_sha = subprocess.getoutput("git rev-parse HEAD").strip()
+                state.local_head_sha = get_local_head()
             else:
                 print(f"Push failed: {push_res.stderr}")
                 # Undo commit and file changes to try again next loop cleanly
@@ -305,7 +355,8 @@ def flush_buffer_if_needed(force=False):
             print(f"Failed to flush buffer: {e}")
             # Ensure cleanup if something crashed mid-operation
             try:
-                subprocess.run(["git", "rebase", "--abort"], capture_output=True)
+                subprocess.run(["git", "rebase", "--abort"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             except:
                 pass
 
@@ -317,11 +368,14 @@ def process_remote_changes(remote_sha):
     
     # 1. Handle chat messages
     if LOG_PATH in diff_files:
-        diff_content = subprocess.getoutput(f"git diff {state.local_head_sha}..{remote_sha} -- {LOG_PATH}")
+        # Only added lines are used, so no context lines are requested
+        diff_content = subprocess.run(
+            ["git", "diff", "-U0", "--no-color", f"{state.local_head_sha}..{remote_sha}", "--", LOG_PATH],
+            capture_output=True, text=True, errors="replace").stdout
         added_lines = [l[1:] for l in diff_content.splitlines() if l.startswith("+") and not l.startswith("+++")]
         
         for line in added_lines:
-            if "]:" in line and f"[{MY_AGENT_NAME}]" not in line:
+            if "]:" in line and OWN_TAG not in line:
                 parts = line.split("]:", 1)
                 if len(parts) > 1:
                     sender = parts[0].split('[')[-1].strip()
@@ -346,15 +400,14 @@ def process_remote_changes(remote_sha):
 def monitor():
     print(f"=== {MY_AGENT_NAME} Professional Monitor Started ===")
     
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    repo_root = os.path.dirname(script_dir)
-    os.chdir(repo_root)
+    os.chdir(REPO_ROOT)
     
     state.local_head_sha = get_remote_head() or state.local_head_sha
     print(f"Tracking from: {state.local_head_sha}")
 
     # Check for missed messages at startup
     check_missed_messages()
+    poll_interval = POLL_INTERVAL
 
     while True:
         try:
@@ -362,6 +415,13 @@ def monitor():
             
             if remote_head and remote_head != state.local_head_sha:
                 process_remote_changes(remote_head)
+                poll_interval = POLL_INTERVAL
+            elif state.reply_buffer:
+                # Pending replies wait on PUSH_COOLDOWN; keep ticking quickly
+                poll_interval = POLL_INTERVAL
+            else:
+                # Nothing moved: back off so an idle repo is polled less often
+                poll_interval = min(poll_interval * 2, IDLE_POLL_MAX)
             
             flush_buffer_if_needed()
             
@@ -371,7 +431,7 @@ def monitor():
         except Exception as e:
             print(f"\nError: {e}")
             
-        time.sleep(2)
+        time.sleep(poll_interval)
 
 if __name__ == "__main__":
     monitor()